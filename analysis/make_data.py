@@ -1,10 +1,18 @@
 import os
+import sys
 import shutil
+import time
+import argparse
 import numpy as np
 import math
 import json
+import csv
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from meshstat import *
 
+# 완료된 모델 기록 (한 줄에 하나씩 추가, 같은 모델은 마지막 줄이 유효)
+MANIFEST_NAME = "manifest.jsonl"
+
 def get_last_folder_name(directory_path):
     normalized_path = os.path.normpath(directory_path)
     last_folder_name = os.path.basename(normalized_path)
@@ -22,23 +30,263 @@ def create_folder(base_path, folder_name):
 
     return folder_path
 
-if __name__ == "__main__":
+# 모델을 처리할 방식 ("in core" 또는 "out of core"), 두 방식은 지표 키와 분위수 정밀도가 다름
+def stats_mode(file_path, out_of_core_above=None):
+    if out_of_core_above is not None and os.path.getsize(file_path) > out_of_core_above:
+        return "out of core"
+    return "in core"
 
-    crrent_path = os.path.dirname(os.path.realpath(__file__))
-    directory_path = os.path.join(crrent_path, 'models\\chai')
-    base_path = os.path.join(crrent_path, 'data')
-    folder_name = get_last_folder_name(directory_path)
+# 매니페스트에 기록할 파일 정보
+# 처리 방식과 (out of core 면) 메모리 예산도 기록해서 옵션을 바꾸면 다시 계산하게 함
+def file_record(file_path, run=DEFAULT_RUN, out_of_core_above=None, memory_budget=OUT_OF_CORE_MEMORY_BUDGET):
+    stat = os.stat(file_path)
+    mode = stats_mode(file_path, out_of_core_above)
+    return {
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "stats_version": STATS_VERSION,
+        "run": run,
+        "mode": mode,
+        "memory_budget": memory_budget if mode == "out of core" else None
+    }
+
+def load_manifest(save_path):
+    manifest_path = os.path.join(save_path, MANIFEST_NAME)
+    manifest = {}
+    if not os.path.exists(manifest_path):
+        return manifest
+
+    with open(manifest_path, 'r') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 중단되면서 잘린 줄
+            manifest[record["path"]] = record
+    return manifest
 
-    if not os.path.exists(directory_path):
-        print(f"Directory does not exist: {directory_path}")
+def append_manifest(save_path, record):
+    with open(os.path.join(save_path, MANIFEST_NAME), 'a') as file:
+        file.write(json.dumps(record) + '\n')
+
+def model_name(file_path):
+    file_name, _ = os.path.splitext(os.path.basename(file_path))
+    return file_name
+
+# 크기, 수정 시간, 지표 버전, run, 처리 방식이 같고 결과가 저장소에 남아 있으면 다시 계산하지 않음
+# (처리 방식이 없는 예전 기록은 다시 계산)
+def is_up_to_date(manifest, stored_models, file_path, run, out_of_core_above=None,
+                  memory_budget=OUT_OF_CORE_MEMORY_BUDGET):
+    record = manifest.get(os.path.abspath(file_path))
+    return record is not None and record == file_record(file_path, run, out_of_core_above, memory_budget) and \
+           model_name(file_path) in stored_models
+
+# 작업 프로세스에서 실행 (모델 하나), 결과는 각 프로세스가 저장소에 바로 씀
+# out_of_core_above 바이트보다 큰 obj 는 메모리 매핑과 청크 단위 계산으로 처리 (일부 지표만)
+def process_model(file_path, save_path, cache_dir, save_json, run, profile=False,
+                  out_of_core_above=None, memory_budget=OUT_OF_CORE_MEMORY_BUDGET):
+    store = StatsStore.in_folder(save_path)
+    if stats_mode(file_path, out_of_core_above) == "out of core":
+        save_status_out_of_core(file_path, save_path, False, save_json, memory_budget=memory_budget,
+                                store=store, run=run)
     else:
+        cache = MeshCache(cache_dir) if cache_dir else None
+        save_status(file_path, save_path, False, save_json, cache=cache, store=store, run=run, profile=profile)
+    return file_record(file_path, run, out_of_core_above, memory_budget)
+
+# 처리량과 남은 시간을 한 줄로 갱신하며 출력
+class ProgressReport:
+    def __init__(self, total, skipped=0):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.start = time.time()
+
+    def update(self, failed=False):
+        self.done += 1
+        if failed:
+            self.failed += 1
+
+        elapsed = time.time() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else 0.0
+        text = "\r{} / {} obj file is complete | {:.2f} files/s | elapsed {} | ETA {}".format(
+            self.done, self.total, rate, format_seconds(elapsed), format_seconds(remaining))
+        if self.failed:
+            text += " | failed {}".format(self.failed)
+        print(text, end='', flush=True)
+
+    def finish(self):
+        print()
+        print("processed {}, skipped {} (up to date), failed {} in {}".format(
+            self.done - self.failed, self.skipped, self.failed, format_seconds(time.time() - self.start)))
+
+# 저장소의 _timings 열을 단계별로 모아 표로 만듦 (모델 수, 시간 합/평균/p95/최대, CPU 시간 합, 최대 메모리)
+def timing_report(save_path, run=DEFAULT_RUN):
+    store = StatsStore.in_folder(save_path)
+    prefix = TIMINGS_KEY + "/"
+    timing_keys = [key for key in store.keys() if key.startswith(prefix)]
+    if not timing_keys:
+        return []
+
+    _, columns = store.read_columns(timing_keys, run)
+    stages = []
+    for key in timing_keys:
+        stage = key[len(prefix):].rsplit("/", 1)[0]
+        if stage not in stages:
+            stages.append(stage)
+
+    rows = []
+    for stage in stages:
+        wall = columns[prefix + stage + "/wall"]
+        wall = wall[~np.isnan(wall)]
+        if len(wall) == 0:
+            continue
+        cpu = columns[prefix + stage + "/cpu"]
+        peak = columns[prefix + stage + "/peak_bytes"]
+        rows.append({
+            "stage": stage,
+            "models": len(wall),
+            "total_wall": float(np.sum(wall)),
+            "mean_wall": float(np.mean(wall)),
+            "p95_wall": float(np.percentile(wall, 95)),
+            "max_wall": float(np.max(wall)),
+            "total_cpu": float(np.nansum(cpu)),
+            "max_peak_mb": float(np.nanmax(peak)) / (1 << 20)
+        })
+
+    # 오래 걸린 단계부터
+    rows.sort(key=lambda row: row["total_wall"], reverse=True)
+    return rows
+
+def print_timing_report(rows):
+    total = sum(row["total_wall"] for row in rows)
+    print("{:<24}{:>8}{:>12}{:>8}{:>12}{:>12}{:>12}{:>14}".format(
+        "stage", "models", "total s", "share", "mean ms", "p95 ms", "max ms", "max peak MB"))
+    for row in rows:
+        print("{:<24}{:>8}{:>12.2f}{:>7.1f}%{:>12.2f}{:>12.2f}{:>12.2f}{:>14.1f}".format(
+            row["stage"], row["models"], row["total_wall"], row["total_wall"] / total * 100 if total else 0.0,
+            row["mean_wall"] * 1000, row["p95_wall"] * 1000, row["max_wall"] * 1000, row["max_peak_mb"]))
+
+def save_timing_report(rows, save_path):
+    report_path = os.path.join(save_path, "timing_report.csv")
+    with open(report_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return report_path
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return "{:d}:{:02d}:{:02d}".format(hours, minutes, seconds)
+
+# 결과는 data/<폴더>/stats.sqlite 에 저장 (save_json 이면 예전처럼 모델별 json 도 씀)
+# profile 이면 모델마다 단계별 시간/메모리를 저장소에 기록 (timing_report 로 집계)
+def make_data(directory_path, base_path, workers=None, force=False, use_cache=True, save_json=False,
+              run=DEFAULT_RUN, profile=False, out_of_core_above=None, memory_budget=OUT_OF_CORE_MEMORY_BUDGET):
+    folder_name = get_last_folder_name(directory_path)
+
+    if force:
         save_path = create_folder(base_path, folder_name)
-        num_of_file = len([file for file in os.listdir(directory_path) if file.endswith('.obj')])
-        count = 0
-
-        for filename in os.listdir(directory_path):
-            if filename.endswith('.obj'):
-                file_path = os.path.join(directory_path, filename)
-                save_status(file_path, save_path, False, True)
-                count += 1
-                print("{} / {} obj file is complete".format(count, num_of_file))
+    else:
+        save_path = os.path.join(base_path, folder_name)
+        os.makedirs(save_path, exist_ok=True)
+
+    # 같은 obj를 다시 분석할 때 텍스트 파싱을 건너뛰기 위한 캐시 (data 폴더에 유지)
+    cache_dir = os.path.join(base_path, MESH_CACHE_DIR_NAME) if use_cache else None
+
+    file_paths = [os.path.join(directory_path, filename)
+                  for filename in sorted(os.listdir(directory_path)) if filename.endswith('.obj')]
+
+    manifest = load_manifest(save_path)
+    stored_models = set(StatsStore.in_folder(save_path).models(run))
+    pending = [file_path for file_path in file_paths
+               if not is_up_to_date(manifest, stored_models, file_path, run, out_of_core_above, memory_budget)]
+
+    progress = ProgressReport(len(pending), len(file_paths) - len(pending))
+    failures = []
+
+    if workers == 1:
+        for file_path in pending:
+            try:
+                append_manifest(save_path, process_model(file_path, save_path, cache_dir, save_json, run, profile,
+                                                          out_of_core_above, memory_budget))
+                progress.update()
+            except Exception as error:
+                failures.append((file_path, error))
+                progress.update(failed=True)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process_model, file_path, save_path, cache_dir, save_json, run, profile,
+                                       out_of_core_above, memory_budget): file_path
+                       for file_path in pending}
+            for future in as_completed(futures):
+                try:
+                    # 매니페스트는 메인 프로세스만 씀
+                    append_manifest(save_path, future.result())
+                    progress.update()
+                except Exception as error:
+                    failures.append((futures[future], error))
+                    progress.update(failed=True)
+
+    progress.finish()
+    for file_path, error in failures:
+        print("failed: {} ({})".format(file_path, error))
+
+    return save_path, failures
+
+def parse_args():
+    crrent_path = os.path.dirname(os.path.realpath(__file__))
+
+    parser = argparse.ArgumentParser(description="obj 폴더의 모든 모델에 대해 meshstat 데이터를 만듦")
+    parser.add_argument("directory", nargs="?", default=os.path.join(crrent_path, 'models', 'chai'),
+                        help="obj 파일이 있는 폴더 (기본: models/chai)")
+    parser.add_argument("--output", default=os.path.join(crrent_path, 'data'),
+                        help="결과를 저장할 폴더 (기본: data), 그 안에 입력 폴더 이름으로 저장")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="작업 프로세스 수 (기본: CPU 수, 1이면 현재 프로세스에서 실행)")
+    parser.add_argument("--force", action="store_true",
+                        help="기존 결과와 매니페스트를 지우고 모두 다시 계산")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="파싱 결과 캐시(.meshcache)를 사용하지 않음")
+    parser.add_argument("--run", default=DEFAULT_RUN,
+                        help="저장소에 기록할 실행 이름 (같은 모델을 여러 번 분석해 비교할 때)")
+    parser.add_argument("--json", action="store_true",
+                        help="저장소와 함께 모델별 data_<이름>.json 도 저장")
+    parser.add_argument("--export-json", metavar="FOLDER",
+                        help="끝난 뒤 저장소의 결과를 모델별 json 으로 FOLDER 에 내보냄")
+    parser.add_argument("--profile", action="store_true",
+                        help="파싱과 지표별 시간, CPU 시간, 최대 메모리를 기록하고 끝난 뒤 단계별 보고서 출력")
+    parser.add_argument("--out-of-core-above", type=float, metavar="MB",
+                        help="이 크기(MB)보다 큰 obj 는 메모리 매핑으로 나눠서 처리 (일부 지표만, 분위수는 근사)")
+    parser.add_argument("--memory-budget", type=float, default=OUT_OF_CORE_MEMORY_BUDGET / (1 << 20), metavar="MB",
+                        help="메모리 매핑 처리에서 한 번에 사용할 메모리 (MB, 작업 프로세스마다)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+
+    args = parse_args()
+
+    if not os.path.exists(args.directory):
+        print(f"Directory does not exist: {args.directory}")
+        sys.exit(1)
+
+    save_path, failures = make_data(args.directory, args.output, args.workers, args.force, not args.no_cache,
+                                    args.json, args.run, args.profile,
+                                    None if args.out_of_core_above is None else int(args.out_of_core_above * (1 << 20)),
+                                    int(args.memory_budget * (1 << 20)))
+
+    if args.profile:
+        rows = timing_report(save_path, args.run)
+        if rows:
+            print_timing_report(rows)
+            print("timing report saved: {}".format(save_timing_report(rows, save_path)))
+
+    if args.export_json:
+        num_exported = StatsStore.in_folder(save_path).export_json(args.export_json, args.run)
+        print("exported {} models to {}".format(num_exported, args.export_json))
+    if failures:
+        sys.exit(1)
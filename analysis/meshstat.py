@@ -1,30 +1,876 @@
 import os
+import time
+import shutil
+import hashlib
+import tempfile
+import warnings
 import numpy as np
 import math
 import json
+import sqlite3
+import tracemalloc
+from contextlib import contextmanager
 
 
-class Mesh:
-    def __init__(self):
-        self.vertices = []  # 정점 배열
-        self.edges = set()  # 엣지 배열 (중복을 피하기 위해 집합 사용)
-        self.faces = []     # 면 배열
-        self.edge_face_map = {}
+# 면 배열에서 다각형 크기가 섞여 있을 때 빈 자리를 채우는 값
+FACE_PAD = -1
+
+
+# 길이가 다른 면 리스트를 (F,k) int32 배열로 변환 (짧은 면은 FACE_PAD로 채움)
+def _pad_faces(face_list):
+    if not face_list:
+        return np.zeros((0, 3), dtype=np.int32)
+
+    max_size = max(len(face) for face in face_list)
+    if all(len(face) == max_size for face in face_list):
+        return np.array(face_list, dtype=np.int32).reshape(-1, max_size)
+
+    faces = np.full((len(face_list), max_size), FACE_PAD, dtype=np.int32)
+    for i, face in enumerate(face_list):
+        faces[i, :len(face)] = face
+    return faces
+
+
+# OBJ 파일을 한 번에 읽어들이는 크기 (바이트)
+OBJ_CHUNK_SIZE = 1 << 24
+
+# 파서 결과가 달라지는 수정을 하면 올려서 이전 메쉬 캐시를 무효화
+PARSER_VERSION = 3
+
+# 지표 계산 결과가 달라지는 수정을 하면 올려서 make_data 가 모든 모델을 다시 계산하게 함
+STATS_VERSION = 4
+
+# 법선 계산에서 퇴화된 면으로 볼 길이 기준 (데이터에 맞게 조정 가능)
+NORMAL_TOLERANCE = 1e-10
+
+# 넓이가 이보다 작은 면은 퇴화된 면으로 봄 (종횡비에서 제외, num degenerated faces)
+DEGENERATE_AREA_TOLERANCE = 1e-15
+
+# 이 거리 이하의 정점은 거의 같은 위치의 중복 정점으로 봄
+NEAR_DUPLICATE_EPSILON = 1e-6
+
+# 분위수 스케치가 유지하는 점의 수 (클수록 정확하지만 메모리를 더 씀)
+QUANTILE_SKETCH_SIZE = 2048
+
+# info 에서 단계별 시간/메모리 측정 결과를 담는 키 (save_status(profile=True))
+TIMINGS_KEY = "_timings"
+
+# 메모리보다 큰 메쉬를 처리할 때 한 번에 사용할 메모리 (OutOfCoreMesh)
+OUT_OF_CORE_MEMORY_BUDGET = 512 << 20
+
+# 데이터셋별 지표 저장소 파일 이름과 기본 실행 이름
+STATS_STORE_NAME = "stats.sqlite"
+DEFAULT_RUN = "default"
+
+# 메쉬 캐시 디렉토리 이름과 기본 최대 크기 (바이트)
+MESH_CACHE_DIR_NAME = ".meshcache"
+MESH_CACHE_MAX_BYTES = 2 << 30
+
+_V_RECORD = bytes.maketrans(b'v', b' ')
+_F_RECORD = bytes.maketrans(b'f', b' ')
+
+
+# 한 줄씩 읽는 OBJ 파서 (빠른 파서가 처리하지 못한 레코드에도 사용)
+def _parse_vertex_line(line):
+    parts = line.split()
+    return tuple(map(float, parts[1:4]))  # x, y, z 좌표
+
+
+def _parse_face_line(line, num_vertices):
+    parts = line.split()
+    face = []
+    for p in parts[1:]:
+        index = int(p.split('/')[0])
+        # OBJ 파일은 1부터 인덱싱하지만 Python은 0부터 인덱싱함을 고려
+        # 음수 인덱스는 지금까지 읽은 정점 수 기준의 상대 위치
+        face.append(index - 1 if index > 0 else num_vertices + index)
+    return face
+
+
+def parse_obj_lines(filename):
+    vertices = []
+    faces = []
+    with open(filename, 'r') as file:
+        for line in file:
+            if line.startswith('v '):
+                vertices.append(_parse_vertex_line(line))
+            elif line.startswith('f '):
+                faces.append(_parse_face_line(line, len(vertices)))
+
+    return np.array(vertices, dtype=np.float64).reshape(-1, 3), _pad_faces(faces)
+
+
+# 줄바꿈으로 끝나는 바이트 데이터에서 각 줄의 토큰 수를 계산
+def _count_tokens_per_line(data):
+    buf = np.frombuffer(data, dtype=np.uint8)
+    is_space = buf <= ord(' ')  # 공백, 탭, \r, \n
+
+    # 공백 다음에 오는 공백이 아닌 문자가 토큰의 시작
+    token_start = ~is_space
+    token_start[1:] &= is_space[:-1]
+
+    token_positions = np.flatnonzero(token_start)
+    newlines = np.flatnonzero(buf == ord('\n'))
+    return np.diff(np.searchsorted(token_positions, newlines), prepend=0)
+
+
+# 면 레코드의 모든 토큰이 같은 형식(v, v/vt, v//vn, v/vt/vn)이면 토큰마다 숫자 수, 아니면 None
+# 토큰마다 '/' 수와 숫자 수가 모두 같아야 '/' 를 공백으로 바꾼 숫자열에서 일정한 간격으로 정점 인덱스를 꺼낼 수 있음
+# (f 1/1/1 2 3/3 처럼 섞이면 줄마다 숫자 수가 맞아도 간격이 어긋남)
+def _numbers_per_token(data):
+    buf = np.frombuffer(data, dtype=np.uint8)
+    is_space = buf <= ord(' ')
+    is_slash = buf == ord('/')
+
+    token_start = ~is_space
+    token_start[1:] &= is_space[:-1]
+    # 공백이나 '/' 다음에 오는 숫자 문자가 숫자의 시작
+    is_separator = is_space | is_slash
+    number_start = ~is_separator
+    number_start[1:] &= is_separator[:-1]
+
+    token_positions = np.flatnonzero(token_start)
+    num_tokens = len(token_positions)
+    if num_tokens == 0:
+        return None
+    slashes = np.bincount(np.searchsorted(token_positions, np.flatnonzero(is_slash), 'right') - 1,
+                          minlength=num_tokens)
+    numbers = np.bincount(np.searchsorted(token_positions, np.flatnonzero(number_start), 'right') - 1,
+                          minlength=num_tokens)
+    if np.any(slashes != slashes[0]) or np.any(numbers != numbers[0]) or numbers[0] == 0:
+        return None
+    return int(numbers[0])
+
+
+# 선택된 줄들을 연속 구간 단위로 잘라 붙임 (줄 하나씩 나누지 않음)
+def _join_lines(chunk, selected, line_starts, line_ends):
+    change = np.diff(selected.astype(np.int8), prepend=0, append=0)
+    run_starts = line_starts[np.flatnonzero(change == 1)]
+    run_ends = line_ends[np.flatnonzero(change == -1) - 1] + 1
+    return b''.join(chunk[start:end] for start, end in zip(run_starts.tolist(), run_ends.tolist()))
+
+
+# 공백으로 구분된 숫자들을 한 번에 변환, 숫자가 아닌 토큰이 있으면 None
+def _parse_numbers(data, dtype):
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return np.fromstring(data, dtype=dtype, sep=' ')
+    except ValueError:
+        return None
+
+
+def _parse_obj_chunk(chunk, num_vertices):
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    line_ends = np.flatnonzero(buf == ord('\n'))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+
+    # 각 줄의 앞 두 글자로 'v ', 'f ' 레코드를 한 번에 분류
+    first = buf[line_starts]
+    second = buf[np.minimum(line_starts + 1, len(buf) - 1)]
+    is_v = (first == ord('v')) & (second == ord(' '))
+    is_f = (first == ord('f')) & (second == ord(' '))
+
+    # --- 정점 ---
+    num_v_lines = int(np.count_nonzero(is_v))
+    vertices = np.zeros((0, 3), dtype=np.float64)
+    if num_v_lines:
+        v_data = _join_lines(chunk, is_v, line_starts, line_ends).translate(_V_RECORD)
+        counts = _count_tokens_per_line(v_data)
+        width = int(counts[0])
+        values = None
+        if width >= 3 and np.all(counts == width):
+            values = _parse_numbers(v_data, np.float64)
+        if values is not None and len(values) == width * num_v_lines:
+            vertices = values.reshape(-1, width)[:, :3]
+        else:
+            # 정점 색상 등이 섞인 특이한 레코드는 한 줄씩 파싱
+            vertices = np.array([_parse_vertex_line('v' + line.decode()) for line in v_data.splitlines()],
+                                dtype=np.float64).reshape(-1, 3)
+
+    # --- 면 ---
+    f_line_ids = np.flatnonzero(is_f)
+    flat = np.zeros(0, dtype=np.int64)
+    sizes = np.zeros(0, dtype=np.int64)
+    if len(f_line_ids):
+        # 각 면이 나오기 전까지 읽은 정점 수 (음수 인덱스 계산용)
+        vertices_before = num_vertices + np.cumsum(is_v)[f_line_ids]
+
+        f_data = _join_lines(chunk, is_f, line_starts, line_ends).translate(_F_RECORD)
+        sizes = _count_tokens_per_line(f_data)
+        num_tokens = int(np.sum(sizes))
+
+        # 모든 토큰의 형식이 같으면 '/'를 공백으로 바꿔 한 번에 변환하고 토큰의 첫 숫자(정점 인덱스)만 사용
+        # 형식이 섞여 있으면 아래에서 한 줄씩 파싱
+        flat = None
+        per_token = _numbers_per_token(f_data)
+        if per_token:
+            numbers = _parse_numbers(f_data.replace(b'/', b' '), np.int64)
+            if numbers is not None and len(numbers) == per_token * num_tokens:
+                flat = numbers[::per_token]
+
+        if flat is not None and len(flat) == int(np.sum(sizes)):
+            base = np.repeat(vertices_before, sizes)
+            # OBJ 파일은 1부터 인덱싱하지만 Python은 0부터 인덱싱함을 고려
+            flat = np.where(flat > 0, flat - 1, base + flat)
+        else:
+            # 토큰 형식이 섞였거나 숫자가 아닌 토큰이 있는 특이한 레코드는 한 줄씩 파싱
+            faces = [_parse_face_line('f' + line.decode(), int(before))
+                     for line, before in zip(f_data.splitlines(), vertices_before.tolist())]
+            sizes = np.array([len(face) for face in faces], dtype=np.int64)
+            flat = np.array([i for face in faces for i in face], dtype=np.int64)
+
+    return vertices, flat, sizes
+
+
+# 평탄화된 면 인덱스와 면 크기로 (F,k) 면 배열을 만듦
+def _faces_from_flat(flat, sizes):
+    if len(sizes) == 0:
+        return np.zeros((0, 3), dtype=np.int32)
+
+    width = int(sizes.max())
+    if np.all(sizes == width):
+        return flat.astype(np.int32).reshape(-1, width)
+
+    faces = np.full((len(sizes), width), FACE_PAD, dtype=np.int32)
+    rows = np.repeat(np.arange(len(sizes)), sizes)
+    cols = np.arange(len(flat)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    faces[rows, cols] = flat
+    return faces
+
+
+# 파일을 chunk_size 단위로 읽어 청크마다 (정점, 평탄화된 면 인덱스, 면 크기)를 반환
+def _iter_obj_chunks(filename, chunk_size=OBJ_CHUNK_SIZE):
+    num_vertices = 0
+    rest = b''
+
+    with open(filename, 'rb') as file:
+        while True:
+            data = file.read(chunk_size)
+            if not data:
+                break
+
+            # 마지막 줄은 다음 청크와 이어질 수 있으므로 남겨둠
+            data = rest + data
+            cut = data.rfind(b'\n') + 1
+            chunk, rest = data[:cut], data[cut:]
+            if not chunk:
+                continue
+
+            vertices, flat, sizes = _parse_obj_chunk(chunk, num_vertices)
+            num_vertices += len(vertices)
+            yield vertices, flat, sizes
+
+    if rest:
+        yield _parse_obj_chunk(rest + b'\n', num_vertices)
+
+
+# 큰 단위로 파일을 읽어 정점/면 레코드를 NumPy로 한 번에 변환하는 OBJ 파서
+def parse_obj(filename, chunk_size=OBJ_CHUNK_SIZE):
+    vertex_chunks = []
+    flat_chunks = []
+    size_chunks = []
+
+    for vertices, flat, sizes in _iter_obj_chunks(filename, chunk_size):
+        vertex_chunks.append(vertices)
+        flat_chunks.append(flat)
+        size_chunks.append(sizes)
+
+    if not vertex_chunks:
+        return np.zeros((0, 3), dtype=np.float64), np.zeros((0, 3), dtype=np.int32)
+
+    vertices = np.ascontiguousarray(np.concatenate(vertex_chunks), dtype=np.float64)
+    faces = _faces_from_flat(np.concatenate(flat_chunks), np.concatenate(size_chunks))
+    return vertices, faces
+
+
+# 파일 내용의 해시값
+def file_digest(path, chunk_size=OBJ_CHUNK_SIZE):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 파싱한 정점/면/엣지 배열을 .npy 파일로 저장해두고 메모리 매핑으로 다시 읽는 캐시
+# 항목은 OBJ 파일 내용의 해시와 크기로 구분하고, 전체 크기가 max_bytes를 넘으면
+# 가장 오래 사용하지 않은 항목부터 지움
+class MeshCache:
+    ARRAYS = ("vertices", "faces", "edges")
+
+    def __init__(self, cache_dir, max_bytes=MESH_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    # obj 파일과 같은 디렉토리의 .meshcache 에 캐시를 둠
+    @classmethod
+    def sidecar(cls, obj_path, max_bytes=MESH_CACHE_MAX_BYTES):
+        obj_directory = os.path.dirname(os.path.abspath(obj_path))
+        return cls(os.path.join(obj_directory, MESH_CACHE_DIR_NAME), max_bytes)
+
+    def key(self, obj_path):
+        return "{}_{}".format(file_digest(obj_path), os.path.getsize(obj_path))
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    # 캐시된 배열을 (vertices, faces, edges)로 반환, 없거나 파서 버전이 다르면 None
+    def load(self, key):
+        entry_path = self._entry_path(key)
+        meta_path = os.path.join(entry_path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, 'r') as file:
+                meta = json.load(file)
+            if meta.get("parser_version") != PARSER_VERSION:
+                raise ValueError("parser version changed")
+
+            arrays = []
+            for name in self.ARRAYS:
+                array_path = os.path.join(entry_path, name + ".npy")
+                arrays.append(np.load(array_path, mmap_mode='r') if os.path.exists(array_path) else None)
+        except (OSError, ValueError):
+            # 깨졌거나 오래된 항목은 지움
+            shutil.rmtree(entry_path, ignore_errors=True)
+            return None
+
+        # 최근 사용 시간 갱신 (삭제 순서에 사용)
+        os.utime(meta_path)
+        return tuple(arrays)
+
+    def save(self, key, mesh):
+        entry_path = self._entry_path(key)
+        if os.path.exists(entry_path):
+            return
+
+        # 다른 프로세스가 같은 항목을 쓰는 중일 수 있으므로 임시 디렉토리에 쓰고 이름을 바꿈
+        temp_path = "{}.tmp-{}".format(entry_path, os.getpid())
+        os.makedirs(temp_path, exist_ok=True)
+        np.save(os.path.join(temp_path, "vertices.npy"), np.ascontiguousarray(mesh.vertices))
+        np.save(os.path.join(temp_path, "faces.npy"), np.ascontiguousarray(mesh.faces))
+        np.save(os.path.join(temp_path, "edges.npy"), np.ascontiguousarray(mesh.edges))
+
+        meta = {
+            "parser_version": PARSER_VERSION,
+            "num_vertices": len(mesh.vertices),
+            "num_faces": len(mesh.faces),
+            "created": time.time()
+        }
+        with open(os.path.join(temp_path, "meta.json"), 'w') as file:
+            json.dump(meta, file)
+
+        try:
+            os.rename(temp_path, entry_path)
+        except OSError:
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+        self.evict()
+
+    # (항목 경로, 크기, 마지막 사용 시간) 리스트
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_path = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry_path, "meta.json")
+            if not os.path.exists(meta_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(entry_path) if entry.is_file())
+            entries.append((entry_path, size, os.path.getmtime(meta_path)))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+
+        for entry_path, size, _ in entries:
+            if total_size <= self.max_bytes:
+                break
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+# 엣지-면 인접 정보 (half-edge를 정렬해서 한 번에 만듦)
+#   edges        : (E,2) 중복 제거된 (min, max) 정점 쌍
+#   face_count   : (E,) 엣지를 지나는 half-edge 수 (엣지가 속한 면의 수)
+#   edge_faces   : (E,2) 엣지에 속한 처음 두 면 (없으면 -1)
+#   edge_half_edges : (E,2) 엣지를 지나는 처음 두 half-edge 번호 (없으면 -1)
+#   half_edge_*  : half-edge 별 면 번호, 시작/끝 정점, 엣지 번호
+class EdgeIncidence:
+    def __init__(self, face_ids, v_from, v_to, num_vertices):
+        self.half_edge_face = face_ids
+        self.half_edge_from = v_from
+        self.half_edge_to = v_to
+
+        lo = np.minimum(v_from, v_to).astype(np.int64)
+        hi = np.maximum(v_from, v_to).astype(np.int64)
+        num_vertices = max(num_vertices, int(hi.max()) + 1 if len(hi) else 0)
+
+        # (min, max) 쌍을 하나의 정수 키로 묶어 정렬 (같은 엣지는 면 순서를 유지)
+        keys = lo * num_vertices + hi
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        is_first = np.ones(len(sorted_keys), dtype=bool)
+        is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        first = np.flatnonzero(is_first)
+
+        self.half_edge_edge = np.empty(len(keys), dtype=np.int64)
+        self.half_edge_edge[order] = np.cumsum(is_first) - 1
+
+        self.edges = np.empty((len(first), 2), dtype=np.int32)
+        self.edges[:, 0] = lo[order[first]]
+        self.edges[:, 1] = hi[order[first]]
+
+        self.face_count = np.diff(np.append(first, len(keys)))
+
+        self.edge_half_edges = np.full((len(first), 2), -1, dtype=np.int64)
+        self.edge_half_edges[:, 0] = order[first]
+        has_second = self.face_count >= 2
+        self.edge_half_edges[has_second, 1] = order[first[has_second] + 1]
+
+        self.edge_faces = np.where(self.edge_half_edges >= 0, face_ids[self.edge_half_edges], -1)
+
+    def boundary_mask(self):
+        return self.face_count == 1
+
+    def manifold_mask(self):
+        return self.face_count == 2
+
+
+# 정점 라벨 배열에서 연결 요소를 0부터 다시 번호 매기고 요소별 통계를 계산
+#   vertex_labels / face_labels : 정점, 면 별 연결 요소 번호
+#   vertex_count / face_count   : 요소별 정점 수, 면 수
+#   area                        : 요소별 면적 합
+#   bbox_min / bbox_max         : 요소별 바운딩 박스 (C,3)
+class ConnectedComponents:
+    def __init__(self, labels, vertices, faces, face_areas):
+        roots, self.vertex_labels = np.unique(labels, return_inverse=True)
+        self.num_components = len(roots)
+        self.vertex_count = np.bincount(self.vertex_labels, minlength=self.num_components)
+
+        # 면은 첫 정점이 속한 요소로 분류
+        self.face_labels = self.vertex_labels[faces[:, 0]] if len(faces) else np.zeros(0, dtype=np.int64)
+        self.face_count = np.bincount(self.face_labels, minlength=self.num_components)
+        self.area = np.bincount(self.face_labels, weights=face_areas, minlength=self.num_components)
+
+        # 정점을 요소 순서로 정렬한 뒤 구간별 최소/최대
+        order = np.argsort(self.vertex_labels, kind='stable')
+        starts = np.searchsorted(self.vertex_labels[order], np.arange(self.num_components))
+        sorted_vertices = vertices[order]
+        if self.num_components:
+            self.bbox_min = np.minimum.reduceat(sorted_vertices, starts, axis=0)
+            self.bbox_max = np.maximum.reduceat(sorted_vertices, starts, axis=0)
+        else:
+            self.bbox_min = self.bbox_max = np.zeros((0, 3), dtype=np.float64)
+
+
+# 엣지 배열로 정점의 연결 요소 라벨을 구함 (재귀 없이 최소 라벨 전파 + 포인터 점프)
+def label_vertices(num_vertices, edges):
+    labels = np.arange(num_vertices, dtype=np.int64)
+    a = edges[:, 0].astype(np.int64)
+    b = edges[:, 1].astype(np.int64)
+
+    while True:
+        label_a, label_b = labels[a], labels[b]
+        differ = label_a != label_b
+        if not np.any(differ):
+            return labels
+
+        # 엣지 양 끝 라벨의 루트를 둘 중 작은 라벨에 연결
+        low = np.minimum(label_a[differ], label_b[differ])
+        np.minimum.at(labels, label_a[differ], low)
+        np.minimum.at(labels, label_b[differ], low)
 
+        # 각 정점이 자기 루트를 바로 가리키도록 압축
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+# 공간 해시 격자에서 확인할 이웃 셀 (자기 자신을 제외한 26개 중 절반, 나머지 절반은 반대쪽에서 확인)
+_FORWARD_CELL_OFFSETS = np.array([(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                                  if (dx, dy, dz) > (0, 0, 0)], dtype=np.int64)
+
+
+def _cell_hash(cells):
+    return (cells[:, 0] * 73856093) ^ (cells[:, 1] * 19349663) ^ (cells[:, 2] * 83492791)
+
+
+# 정렬된 그룹마다 가장 작은 원래 번호를 대표로 하는 병합 맵
+def _group_merge_map(order, is_first):
+    group_ids = np.cumsum(is_first) - 1
+    representatives = np.minimum.reduceat(order, np.flatnonzero(is_first))
+    merge_map = np.empty(len(order), dtype=np.int64)
+    merge_map[order] = representatives[group_ids]
+    return merge_map
+
+
+# 정점 병합 맵 (정점마다 같은 위치로 볼 정점들 중 가장 작은 번호)
+# epsilon이 0이면 좌표가 정확히 같은 정점만, 아니면 거리가 epsilon 이하인 정점들을 이어서 묶음
+def find_duplicate_vertices(vertices, epsilon=0.0):
+    num_vertices = len(vertices)
+    if num_vertices == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # -0.0 과 0.0 을 같은 좌표로 보기 위해 0.0 을 더함
+    vertices = vertices + 0.0
+
+    if epsilon <= 0:
+        order = np.lexsort((vertices[:, 2], vertices[:, 1], vertices[:, 0]))
+        sorted_vertices = vertices[order]
+        is_first = np.ones(num_vertices, dtype=bool)
+        is_first[1:] = np.any(sorted_vertices[1:] != sorted_vertices[:-1], axis=1)
+        return _group_merge_map(order, is_first)
+
+    # epsilon 크기의 격자에 정점을 넣으면 거리가 epsilon 이하인 정점은 같은 셀이나 이웃 셀에 있음
+    cells = np.floor(vertices / epsilon).astype(np.int64)
+    keys = _cell_hash(cells)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    sorted_cells = cells[order]
+    positions = np.arange(num_vertices)
+
+    # 같은 키를 가진 정점들의 구간 (정렬된 위치 기준)
+    is_first = np.ones(num_vertices, dtype=bool)
+    is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    group_starts = np.flatnonzero(is_first)
+    group_ends = np.append(group_starts[1:], num_vertices)
+    unique_keys = sorted_keys[group_starts]
+    unique_cells = sorted_cells[group_starts]
+    vertex_group = np.cumsum(is_first) - 1
+
+    # 같은 셀: 정렬된 위치에서 자기 뒤에 있는 같은 키의 정점들
+    candidates = [(positions + 1, group_ends[vertex_group])]
+    for offset in _FORWARD_CELL_OFFSETS:
+        # 이웃 셀은 셀 단위로 한 번만 찾음
+        neighbor_keys = _cell_hash(unique_cells + offset)
+        neighbor = np.minimum(np.searchsorted(unique_keys, neighbor_keys), len(unique_keys) - 1)
+        found = unique_keys[neighbor] == neighbor_keys
+        start = np.where(found, group_starts[neighbor], 0)
+        end = np.where(found, group_ends[neighbor], 0)
+        candidates.append((start[vertex_group], end[vertex_group]))
+
+    pairs = []
+    for start, end in candidates:
+        counts = np.maximum(end - start, 0)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+
+        rows = np.repeat(positions, counts)
+        cols = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(start, counts)
+        first, second = order[rows], order[cols]
+
+        # 해시 충돌이나 셀 경계 때문에 들어온 후보는 실제 거리로 거름
+        close = np.linalg.norm(vertices[first] - vertices[second], axis=1) <= epsilon
+        pairs.append(np.stack([first[close], second[close]], axis=1))
+
+    if not pairs:
+        return positions.astype(np.int64)
+
+    # 가까운 정점 쌍으로 이어진 정점들을 하나로 묶음 (라벨은 묶음의 가장 작은 번호)
+    return label_vertices(num_vertices, np.concatenate(pairs))
+
+
+# 면 병합 맵 (면마다 같은 정점 집합으로 이루어진 면들 중 가장 작은 번호)
+def find_duplicate_faces(faces):
+    num_faces = len(faces)
+    if num_faces == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # 정점들을 정렬하여 순서에 상관없이 동일한 면을 비교할 수 있도록 함
+    sorted_faces = np.sort(faces, axis=1)
+    order = np.lexsort(sorted_faces.T[::-1])
+    sorted_faces = sorted_faces[order]
+    is_first = np.ones(num_faces, dtype=bool)
+    is_first[1:] = np.any(sorted_faces[1:] != sorted_faces[:-1], axis=1)
+    return _group_merge_map(order, is_first)
+
+
+# 병합 맵에서 두 개 이상이 묶인 그룹들을 번호 배열 리스트로 반환
+def duplicate_clusters(merge_map):
+    duplicated = np.flatnonzero(np.bincount(merge_map, minlength=len(merge_map)) > 1)
+    members = np.flatnonzero(np.isin(merge_map, duplicated))
+    order = np.argsort(merge_map[members], kind='stable')
+    members = members[order]
+    starts = np.searchsorted(merge_map[members], duplicated)
+    return np.split(members, starts[1:])
+
+
+# 경계 루프 목록과 루프별 엣지 수, 둘레
+#   loops      : 루프마다 정점 번호 배열 (닫힌 루프는 시작 정점을 반복하지 않음)
+#   edge_ids   : 루프마다 엣지 번호 배열 (mesh.edges 기준)
+#   closed     : 시작 정점으로 돌아온 루프인지 여부
+#   lengths    : 루프의 엣지 수
+#   perimeters : 루프의 둘레
+class BoundaryLoops:
+    def __init__(self, loops, edge_ids, closed, edge_lengths):
+        self.loops = loops
+        self.edge_ids = edge_ids
+        self.num_loops = len(loops)
+        self.closed = np.array(closed, dtype=bool)
+        self.lengths = np.array([len(ids) for ids in edge_ids], dtype=np.int64)
+        self.perimeters = np.array([edge_lengths[ids].sum() for ids in edge_ids], dtype=np.float64)
+
+
+# 면 방향 일관성 정보 (half-edge 방향 기준)
+# 두 면에 속한 엣지는 두 면이 서로 반대 방향으로 지나가야 일관된 방향
+#   inconsistent_edges   : 두 면이 같은 방향으로 지나가는 엣지 번호
+#   patch_labels         : 면 별 패치 번호 (두 면에 속한 엣지로 연결된 면들)
+#   orientable           : 패치 별로 면을 뒤집어 방향을 맞출 수 있는지 여부
+#   flipped              : 방향을 맞추려면 뒤집어야 하는 면 (패치 안에서 적은 쪽)
+class FaceOrientation:
+    def __init__(self, incidence, num_faces):
+        manifold = np.flatnonzero(incidence.manifold_mask())
+        half_edges = incidence.edge_half_edges[manifold]
+        face1 = incidence.half_edge_face[half_edges[:, 0]].astype(np.int64)
+        face2 = incidence.half_edge_face[half_edges[:, 1]].astype(np.int64)
+
+        # 같은 면이 두 번 지나가는 엣지는 제외
+        different = face1 != face2
+        manifold, half_edges = manifold[different], half_edges[different]
+        face1, face2 = face1[different], face2[different]
+
+        # half-edge가 (작은 정점 -> 큰 정점) 방향인지
+        forward = incidence.half_edge_from < incidence.half_edge_to
+        same_direction = forward[half_edges[:, 0]] == forward[half_edges[:, 1]]
+        self.inconsistent_edges = manifold[same_direction]
+
+        # 패치: 두 면에 속한 엣지로 연결된 면들의 연결 요소
+        self.patch_labels = np.unique(label_vertices(num_faces, np.stack([face1, face2], axis=1)),
+                                      return_inverse=True)[1]
+        self.num_patches = int(self.patch_labels.max()) + 1 if num_faces else 0
+
+        # 면마다 (그대로, 뒤집음) 두 상태를 두고, 일관된 엣지는 같은 상태끼리,
+        # 일관되지 않은 엣지는 다른 상태끼리 연결
+        # 한 면의 두 상태가 같은 요소에 속하면 그 패치는 방향을 맞출 수 없음
+        state_edges = np.concatenate([
+            np.stack([face1, np.where(same_direction, face2 + num_faces, face2)], axis=1),
+            np.stack([face1 + num_faces, np.where(same_direction, face2, face2 + num_faces)], axis=1)
+        ])
+        state_labels = label_vertices(2 * num_faces, state_edges)
+        keep_labels, flip_labels = state_labels[:num_faces], state_labels[num_faces:]
+
+        non_orientable_patches = np.unique(self.patch_labels[keep_labels == flip_labels])
+        self.orientable = np.ones(self.num_patches, dtype=bool)
+        self.orientable[non_orientable_patches] = False
+
+        # 각 패치의 대표 면과 같은 쪽 상태인 면과 반대쪽 상태인 면으로 나누고 적은 쪽을 뒤집을 면으로 봄
+        representative = np.zeros(self.num_patches, dtype=np.int64)
+        representative[self.patch_labels[::-1]] = np.arange(num_faces)[::-1]
+        opposite = keep_labels != keep_labels[representative[self.patch_labels]]
+        opposite_count = np.bincount(self.patch_labels, weights=opposite, minlength=self.num_patches)
+        patch_size = np.bincount(self.patch_labels, minlength=self.num_patches)
+        flip_opposite = opposite_count <= patch_size - opposite_count
+
+        self.flipped = np.where(flip_opposite[self.patch_labels], opposite, ~opposite)
+        self.flipped &= self.orientable[self.patch_labels]
+
+    @property
+    def num_inconsistent_edges(self):
+        return len(self.inconsistent_edges)
+
+    @property
+    def num_inconsistent_faces(self):
+        return int(np.count_nonzero(self.flipped))
+
+    @property
+    def num_orientable_patches(self):
+        return int(np.count_nonzero(self.orientable))
+
+
+# 정점/면 배열과, 그 배열에서 계산한 중간 결과 캐시
+# vertices 나 faces 에 새 배열을 대입하면 관련된 캐시가 지워짐
+# (배열 안의 값을 직접 바꿨다면 _invalidate()를 호출해야 함)
+# add_vertex/add_face 로 하나씩 추가한 것은 모아 두었다가 vertices/faces 를 읽을 때 한 번에 붙임
+class Mesh:
+    def __init__(self, vertices=None, faces=None):
+        self._pending_vertices = []  # add_vertex 로 추가했지만 아직 배열에 붙이지 않은 정점
+        self._pending_faces = []  # add_face 로 추가했지만 아직 배열에 붙이지 않은 면
+        self._edges = None  # 엣지 배열 (E,2), 처음 사용할 때 생성
+        self._incidence = None  # 엣지-면 인접 정보, 처음 사용할 때 생성
+        self._components = None  # 연결 요소 정보, 처음 사용할 때 생성
+        self._boundary_loops = None  # 경계 루프 정보, 처음 사용할 때 생성
+        self._orientation = None  # 면 방향 일관성 정보, 처음 사용할 때 생성
+        self._face_areas = None  # 면 넓이 (F,), 처음 사용할 때 생성
+        self._face_normals = None  # 면 법선 (F,3), 처음 사용할 때 생성
+        self._face_csr = None  # 면 배열의 CSR 표현, 처음 사용할 때 생성
+        self._edge_lengths = None  # 엣지 길이 (E,), 처음 사용할 때 생성
+        self._vertex_degrees = None  # 정점 차수 (V,), 처음 사용할 때 생성
+        self._degenerate_faces = None  # 퇴화된 면 마스크 (F,), 처음 사용할 때 생성
+
+        # 정점 배열 (V,3) float64
+        if vertices is None:
+            vertices = np.zeros((0, 3), dtype=np.float64)
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+
+        # 면 배열 (F,k) int32, 다각형 크기가 섞이면 FACE_PAD로 채움
+        if faces is None:
+            faces = np.zeros((0, 3), dtype=np.int32)
+        elif not isinstance(faces, np.ndarray):
+            faces = _pad_faces(faces)
+        self.faces = np.asarray(faces, dtype=np.int32)
+
+    @property
+    def vertices(self):
+        if self._pending_vertices:
+            pending, self._pending_vertices = self._pending_vertices, []
+            self.vertices = np.concatenate([self._vertices, np.array(pending, dtype=np.float64)])
+        return self._vertices
+
+    # 정점 위치만 바뀌면 위상 정보(엣지, 인접 정보, 방향)는 그대로 사용
+    @vertices.setter
+    def vertices(self, vertices):
+        self._pending_vertices = []
+        self._vertices = vertices
+        self._invalidate(geometry_only=True)
+        # 정점 수가 바뀌면 정점 차수도 다시 계산
+        if self._vertex_degrees is not None and len(self._vertex_degrees) != len(vertices):
+            self._vertex_degrees = None
+
+    @property
+    def faces(self):
+        if self._pending_faces:
+            pending, self._pending_faces = _pad_faces(self._pending_faces), []
+            width = max(self._faces.shape[1], pending.shape[1]) if len(self._faces) else pending.shape[1]
+            faces = np.full((len(self._faces) + len(pending), width), FACE_PAD, dtype=np.int32)
+            faces[:len(self._faces), :self._faces.shape[1]] = self._faces
+            faces[len(self._faces):, :pending.shape[1]] = pending
+            self.faces = faces
+        return self._faces
+
+    @faces.setter
+    def faces(self, faces):
+        self._pending_faces = []
+        self._faces = faces
+        self._invalidate()
+
+    # 엣지 배열 (중복 제거된 (min, max) 정점 쌍)
+    @property
+    def edges(self):
+        if self._edges is None:
+            self._edges = self.incidence.edges
+        return self._edges
+
+    # 모든 위상 지표가 같이 사용하는 엣지-면 인접 정보
+    @property
+    def incidence(self):
+        if self._incidence is None:
+            face_ids, v_from, v_to = self._face_corners()
+            self._incidence = EdgeIncidence(face_ids, v_from, v_to, len(self.vertices))
+        return self._incidence
+
+    # 연결 요소 라벨과 요소별 정점 수, 면 수, 면적, 바운딩 박스
+    @property
+    def components(self):
+        if self._components is None:
+            labels = label_vertices(len(self.vertices), self.edges)
+            self._components = ConnectedComponents(labels, self.vertices, self.faces, self.face_areas)
+        return self._components
+
+    # 경계 루프 (루프별 정점 번호, 엣지 수, 둘레)
+    @property
+    def boundary_loops(self):
+        if self._boundary_loops is None:
+            self._boundary_loops = self._extract_boundary_loops()
+        return self._boundary_loops
+
+    # 면 방향 일관성 (일관되지 않은 엣지, 뒤집어야 하는 면, 방향을 맞출 수 있는 패치)
+    @property
+    def orientation(self):
+        if self._orientation is None:
+            self._orientation = FaceOrientation(self.incidence, len(self.faces))
+        return self._orientation
+
+    # 면 넓이 (지표 여러 개가 같이 사용)
+    @property
+    def face_areas(self):
+        if self._face_areas is None:
+            self._face_areas = self.get_face_areas()
+        return self._face_areas
+
+    # 면 법선 (퇴화된 면은 NaN)
+    @property
+    def face_normals(self):
+        if self._face_normals is None:
+            self._face_normals = self.get_face_normals()
+        return self._face_normals
+
+    # 엣지 길이 (edges 순서)
+    @property
+    def edge_lengths(self):
+        if self._edge_lengths is None:
+            self._edge_lengths = self.get_edge_lengths()
+        return self._edge_lengths
+
+    # 정점 차수 (정점이 속한 면의 수)
+    @property
+    def vertex_degrees(self):
+        if self._vertex_degrees is None:
+            self._vertex_degrees = self.calculate_vertex_degrees()
+        return self._vertex_degrees
+
+    def _invalidate(self, geometry_only=False):
+        # 좌표로 계산한 값
+        self._face_areas = None
+        self._face_normals = None
+        self._edge_lengths = None
+        self._degenerate_faces = None
+        self._components = None  # 요소별 넓이, 바운딩 박스 포함
+        self._boundary_loops = None  # 루프 둘레 포함
+        if geometry_only:
+            return
+
+        self._edges = None
+        self._incidence = None
+        self._orientation = None
+        self._face_csr = None
+        self._vertex_degrees = None
+
+    # 정점/면을 하나씩 추가 (배열은 vertices/faces 를 읽을 때 한 번에 만들어지므로 n 개 추가에 O(n))
+    # 캐시는 바로 지워서 추가한 뒤에 읽는 중간 결과가 이전 메쉬 기준으로 남지 않게 함
     def add_vertex(self, vertex):
-        self.vertices.append(vertex)
+        self._pending_vertices.append(tuple(vertex))
+        self._invalidate(geometry_only=True)
+        self._vertex_degrees = None
 
     def add_face(self, face):
-        self.faces.append(face)
-        self._add_edges_from_face(face)
+        self._pending_faces.append(list(face))
+        self._invalidate()
+
+    # 각 면의 정점 수
+    def face_sizes(self):
+        return np.count_nonzero(self.faces != FACE_PAD, axis=1)
 
-    def _add_edges_from_face(self, face):
-        num_vertices = len(face)
-        for i in range(num_vertices):
-            # 순환적인 엣지를 위해 (i+1) % num_vertices 사용
-            edge = (min(face[i], face[(i + 1) % num_vertices]), 
-                    max(face[i], face[(i + 1) % num_vertices]))
-            self.edges.add(edge)
+    # 모든 면의 코너(half-edge)를 (면 번호, 시작 정점, 끝 정점) 배열로 반환
+    def _face_corners(self):
+        num_faces, width = self.faces.shape
+        sizes = self.face_sizes()
+        cols = np.arange(width)
+
+        # 순환적인 엣지를 위해 (i+1) % 면의 정점 수 사용
+        next_cols = (cols[None, :] + 1) % np.maximum(sizes, 1)[:, None]
+        next_vertices = np.take_along_axis(self.faces, next_cols, axis=1)
+
+        valid = cols[None, :] < sizes[:, None]
+        face_ids = np.broadcast_to(np.arange(num_faces)[:, None], self.faces.shape)
+        return face_ids[valid], self.faces[valid], next_vertices[valid]
+
+    # 면을 파이썬 정수 리스트로 하나씩 반환 (채움 값 제외)
+    def _iter_faces(self):
+        for face, size in zip(self.faces.tolist(), self.face_sizes().tolist()):
+            yield face[:size]
 
     def calculate_edge_length(self, edge):
         vertex1 = self.vertices[edge[0]]
@@ -32,426 +878,534 @@ class Mesh:
         return math.sqrt((vertex1[0] - vertex2[0])**2 + (vertex1[1] - vertex2[1])**2 + (vertex1[2] - vertex2[2])**2)
 
     def get_edge_lengths(self):
-        return [self.calculate_edge_length(edge) for edge in self.edges]
-    
+        edges = self.edges
+        return np.linalg.norm(self.vertices[edges[:, 0]] - self.vertices[edges[:, 1]], axis=1)
+
+    # 면 배열의 CSR 표현 (offsets (F+1,), indices), 면 i 의 정점은 indices[offsets[i]:offsets[i+1]]
+    @property
+    def face_csr(self):
+        if self._face_csr is None:
+            sizes = self.face_sizes()
+            offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=offsets[1:])
+            self._face_csr = (offsets, self.faces[self.faces != FACE_PAD])
+        return self._face_csr
+
+    # 모든 면을 첫 정점 기준 부채꼴로 나눈 삼각형 (T,3)과 각 삼각형이 속한 면 번호 (T,)
+    # n각형은 n-2개의 삼각형이 되고 정점이 3개 미만인 면은 삼각형이 없음
+    def fan_triangles(self):
+        num_faces = len(self.faces)
+        if self.faces.shape[1] == 3 and not np.any(self.faces == FACE_PAD):
+            return self.faces, np.arange(num_faces)
+
+        offsets, indices = self.face_csr
+        num_triangles = np.maximum(np.diff(offsets) - 2, 0)
+        triangle_faces = np.repeat(np.arange(num_faces), num_triangles)
+        # 면 안에서 몇 번째 삼각형인지
+        local = np.arange(len(triangle_faces)) - np.repeat(np.cumsum(num_triangles) - num_triangles, num_triangles)
+
+        starts = offsets[:-1][triangle_faces]
+        triangles = np.stack([indices[starts], indices[starts + local + 1], indices[starts + local + 2]], axis=1)
+        return triangles, triangle_faces
+
+    # 삼각형의 세 변 길이 (T,3), 기본은 부채꼴 삼각형 전체
+    def _triangle_edge_lengths(self, triangles=None):
+        if triangles is None:
+            triangles, _ = self.fan_triangles()
+        v0 = self.vertices[triangles[:, 0]]
+        v1 = self.vertices[triangles[:, 1]]
+        v2 = self.vertices[triangles[:, 2]]
+        return np.stack([
+            np.linalg.norm(v0 - v1, axis=1),
+            np.linalg.norm(v1 - v2, axis=1),
+            np.linalg.norm(v2 - v0, axis=1)
+        ], axis=1)
+
+    # 면 하나를 받는 예전 함수들은 같은 벡터화 계산을 그 면에만 적용
+    def _single_face_mesh(self, face):
+        return Mesh(self.vertices, np.asarray(face, dtype=np.int32).reshape(1, -1))
+
     def calculate_triangle_area(self, face):
-        # 삼각형의 각 변의 길이 계산
-        edge_lengths = [
-            self.calculate_edge_length((face[0], face[1])),
-            self.calculate_edge_length((face[1], face[2])),
-            self.calculate_edge_length((face[2], face[0]))
-        ]
-
-        # 헤론의 공식을 사용하여 면적 계산
-        s = sum(edge_lengths) / 2  # 반둘레
-        area = math.sqrt(s * (s - edge_lengths[0]) * (s - edge_lengths[1]) * (s - edge_lengths[2]))
-        return area
-        """
-        area_value = s * (s - edge_lengths[0]) * (s - edge_lengths[1]) * (s - edge_lengths[2])
-
-        # 음수 값 방지
-        
-        if area_value < 0:
-            return 0  # 또는 다른 적절한 처리
-
-        area = math.sqrt(area_value)
-        return area
-        """
+        return float(self._single_face_mesh(face).get_face_areas()[0])
+
+    # 부채꼴 삼각형마다 첫 정점에서 나머지 두 정점으로 가는 벡터와 그 외적
+    def _fan_cross_products(self):
+        triangles, triangle_faces = self.fan_triangles()
+        v0 = self.vertices[triangles[:, 0]]
+        v1, v2 = self.vertices[triangles[:, 1]] - v0, self.vertices[triangles[:, 2]] - v0
+        return triangles, triangle_faces, v1, v2, np.cross(v1, v2)
 
     def get_face_areas(self):
-        return [self.calculate_triangle_area(face) for face in self.faces]
+        # 삼각형 넓이는 두 변 벡터 외적 크기의 절반 (헤론 공식과 달리 얇은 삼각형에서도 음수가 생기지 않음)
+        triangles, triangle_faces, _, _, cross = self._fan_cross_products()
+        triangle_areas = np.linalg.norm(cross, axis=1) / 2
+        if triangles is self.faces:
+            return triangle_areas
+
+        # 다각형은 부채꼴 외적(벡터 넓이)을 먼저 더한 뒤 크기를 구함
+        # 삼각형 넓이를 그대로 더하면 오목한 다각형에서 면 밖의 삼각형까지 더해지고 시작 정점에 따라 값이 달라짐
+        num_faces = len(self.faces)
+        face_cross = np.zeros((num_faces, 3))
+        for axis in range(3):
+            face_cross[:, axis] = np.bincount(triangle_faces, weights=cross[:, axis], minlength=num_faces)
+        return np.linalg.norm(face_cross, axis=1) / 2
     
     def calculate_vertex_degrees(self):
-        vertex_degrees = [0] * len(self.vertices)
-        for face in self.faces:
-            for vertex in face:
-                vertex_degrees[vertex] += 1
-        return vertex_degrees
+        # 각 정점이 속한 면의 수
+        return np.bincount(self.faces[self.faces != FACE_PAD], minlength=len(self.vertices))
     
     def calculate_triangle_aspect_ratio(self, face):
-        # 삼각형의 각 변의 길이 계산
-        edge_lengths = [
-            self.calculate_edge_length((face[0], face[1])),
-            self.calculate_edge_length((face[1], face[2])),
-            self.calculate_edge_length((face[2], face[0]))
-        ]
-
-        # 가장 긴 변과 가장 짧은 변 찾기
-        longest_edge = max(edge_lengths)
-        shortest_edge = min(edge_lengths)
-
-        # 종횡비 계산
-        if shortest_edge == 0:
-            return float('inf')  # 0으로 나누기 방지
-        return longest_edge / shortest_edge
-
-    def get_face_aspect_ratios(self):
-        # Calculate aspect ratios and filter out infinite values
-        return [ratio for face in self.faces 
-                if (ratio := self.calculate_triangle_aspect_ratio(face)) != float('inf')]
+        aspect_ratios = self._single_face_mesh(face).get_face_aspect_ratios(include_degenerate=True)
+        return float(aspect_ratios[0])  # 퇴화된 면은 NaN
+
+    # 넓이가 0에 가까운(또는 좌표가 잘못된) 면
+    @property
+    def degenerate_faces(self):
+        if self._degenerate_faces is None:
+            face_areas = self.face_areas
+            self._degenerate_faces = ~(face_areas >= DEGENERATE_AREA_TOLERANCE)  # NaN 도 포함
+        return self._degenerate_faces
+
+    # 면 종횡비
+    #   삼각형: 외접원 반지름 / (2 * 내접원 반지름) = abc(a+b+c) / (16 * 넓이^2), 정삼각형이 1
+    #   다각형: 둘레의 가장 긴 변 / 가장 짧은 변
+    # 퇴화된 면은 제외 (include_degenerate=True 이면 모든 면에 대해 반환하고 퇴화된 면은 NaN)
+    def get_face_aspect_ratios(self, include_degenerate=False):
+        offsets, _ = self.face_csr
+        sizes = np.diff(offsets)
+        if self._incidence is not None:
+            # 인접 정보가 이미 있으면 엣지 길이 캐시를 코너(half-edge)로 펼침
+            corner_lengths = self.edge_lengths[self._incidence.half_edge_edge]
+        else:
+            _, v_from, v_to = self._face_corners()
+            corner_lengths = np.linalg.norm(self.vertices[v_from] - self.vertices[v_to], axis=1)
+
+        aspect_ratios = np.full(len(sizes), np.nan)
+        valid = ~self.degenerate_faces & (sizes >= 3)
+
+        is_triangle = valid & (sizes == 3)
+        if np.any(is_triangle):
+            corners = offsets[:-1][is_triangle][:, None] + np.arange(3)
+            lengths = corner_lengths[corners]
+            areas = self.face_areas[is_triangle]
+            aspect_ratios[is_triangle] = np.prod(lengths, axis=1) * lengths.sum(axis=1) / (16 * areas * areas)
+
+        # 코너는 면 순서대로 나오므로 면마다 구간 최대/최소
+        is_polygon = valid & (sizes > 3)
+        if np.any(is_polygon):
+            starts = offsets[:-1][is_polygon]
+            ends = offsets[1:][is_polygon]
+            # reduceat 이 다음 면까지 넘어가지 않도록 시작과 끝을 번갈아 넣음
+            bounds = np.stack([starts, ends], axis=1).ravel()
+            padded = np.append(corner_lengths, 0.0)
+            longest_edge = np.maximum.reduceat(padded, bounds)[::2]
+            shortest_edge = np.minimum.reduceat(padded, bounds)[::2]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                aspect_ratios[is_polygon] = np.where(shortest_edge > 0, longest_edge / shortest_edge, np.nan)
+
+        if include_degenerate:
+            return aspect_ratios
+        return aspect_ratios[~np.isnan(aspect_ratios)]
     
 
     def is_valid_vertex(self, vertex):
         return not (np.any(np.isnan(vertex)) or np.any(np.isinf(vertex)))
 
     def calculate_normal(self, face):
-        vertices = [np.array(self.vertices[idx]) for idx in face]
-
-        # Check if any vertex in the face is invalid
-        if not all(self.is_valid_vertex(v) for v in vertices):
-            return np.array([np.nan, np.nan, np.nan])
+        return self._single_face_mesh(face).get_face_normals()[0]
 
-        v1, v2 = vertices[1] - vertices[0], vertices[2] - vertices[0]
+    # 모든 면의 법선 (F,3), 퇴화된 면이나 잘못된 정점이 있는 면은 NaN
+    # 다각형은 부채꼴 삼각형 법선(외적)의 합 (크기는 면 넓이의 두 배)
+    def get_face_normals(self):
+        num_faces = len(self.faces)
+        triangles, triangle_faces, v1, v2, triangle_normals = self._fan_cross_products()
 
         # Introduce a tolerance for degenerate faces
-        tolerance = 1e-10  # This can be adjusted based on your data
-        if np.linalg.norm(v1) < tolerance or np.linalg.norm(v2) < tolerance:
-            return np.array([np.nan, np.nan, np.nan])
+        # 부채꼴 중심 정점과 거의 겹치는 정점이 있으면 퇴화된 면
+        tolerance = NORMAL_TOLERANCE
+        short_spoke = (np.linalg.norm(v1, axis=1) < tolerance) | (np.linalg.norm(v2, axis=1) < tolerance)
 
-        normal = np.cross(v1, v2)
+        if triangles is self.faces:
+            normals = triangle_normals
+            degenerate = short_spoke
+        else:
+            normals = np.zeros((num_faces, 3))
+            for axis in range(3):
+                normals[:, axis] = np.bincount(triangle_faces, weights=triangle_normals[:, axis], minlength=num_faces)
+            # 삼각형이 없는 면(정점 3개 미만)도 퇴화된 면
+            degenerate = np.bincount(triangle_faces, weights=short_spoke, minlength=num_faces) > 0
+            degenerate |= np.bincount(triangle_faces, minlength=num_faces) == 0
+        degenerate |= np.linalg.norm(normals, axis=1) < tolerance
 
-        # Further check for very small area
-        if np.linalg.norm(normal) < tolerance:
-            return np.array([np.nan, np.nan, np.nan])
+        # Check if any vertex in the face is invalid
+        faces = self.faces
+        valid_vertex = np.all(np.isfinite(self.vertices), axis=1)
+        invalid = ~np.all(np.where(faces != FACE_PAD, valid_vertex[faces], True), axis=1)
 
-        return normal
+        normals[invalid | degenerate] = np.nan
+        return normals
 
     def get_edge_dihedral_angles(self):
-        # 각 엣지에 대한 면의 리스트를 저장
-        edge_faces = {edge: [] for edge in self.edges}
-
-        # 각 면에 대해, 엣지를 만들고 해당 엣지에 면을 할당
-        for face in self.faces:
-            num_vertices = len(face)
-            for i in range(num_vertices):
-                edge = (min(face[i], face[(i + 1) % num_vertices]), 
-                        max(face[i], face[(i + 1) % num_vertices]))
-                edge_faces[edge].append(face)
-
-        # 이면각 계산
-        edge_dihedral_angles = []
-        for edge, faces in edge_faces.items():
-            if len(faces) != 2:
-                continue  # Skip edges that don't have exactly two adjacent faces
-
-            normals = [self.calculate_normal(face) for face in faces]
-            normal1, normal2 = normals[0], normals[1]
-
-            # Check for degenerate faces (indicated by NaN in normals)
-            if np.any(np.isnan(normal1)) or np.any(np.isnan(normal2)):
-                continue  # Skip this edge as it involves a degenerate face
-
-            # Calculate the dihedral angle
-            cos_angle = np.dot(normal1, normal2) / (np.linalg.norm(normal1) * np.linalg.norm(normal2))
-            cos_angle = np.clip(cos_angle, -1.0, 1.0)  # Ensure the value is within the valid range for arccos
-            angle = np.arccos(cos_angle)  # This is where 'angle' is defined
-
-            edge_dihedral_angles.append(angle)  # Append the calculated angle
-
-        return edge_dihedral_angles
+        incidence = self.incidence
+        normals = self.face_normals
+
+        # 정확히 두 면에 속한 엣지의 두 면 법선
+        edge_faces = incidence.edge_faces[incidence.manifold_mask()]
+        normal1 = normals[edge_faces[:, 0]]
+        normal2 = normals[edge_faces[:, 1]]
+
+        # 퇴화된 면(NaN 법선)이 포함된 엣지는 제외
+        valid = ~(np.any(np.isnan(normal1), axis=1) | np.any(np.isnan(normal2), axis=1))
+        normal1, normal2 = normal1[valid], normal2[valid]
+
+        # Calculate the dihedral angle
+        cos_angle = np.einsum('ij,ij->i', normal1, normal2) / \
+                    (np.linalg.norm(normal1, axis=1) * np.linalg.norm(normal2, axis=1))
+        cos_angle = np.clip(cos_angle, -1.0, 1.0)  # Ensure the value is within the valid range for arccos
+        return np.arccos(cos_angle)
     
-    def find(self, parent, i):
-        if parent[i] == i:
-            return i
-        return self.find(parent, parent[i])
-
-    def union(self, parent, rank, x, y):
-        xroot = self.find(parent, x)
-        yroot = self.find(parent, y)
-
-        if rank[xroot] < rank[yroot]:
-            parent[xroot] = yroot
-        elif rank[xroot] > rank[yroot]:
-            parent[yroot] = xroot
-        else:
-            parent[yroot] = xroot
-            rank[xroot] += 1
-
     def count_connected_components(self):
-        parent = [i for i in range(len(self.vertices))]
-        rank = [0] * len(self.vertices)
-
-        for face in self.faces:
-            for i in range(len(face)):
-                x = self.find(parent, face[i])
-                y = self.find(parent, face[(i + 1) % len(face)])
-                self.union(parent, rank, x, y)
-
-        # 연결된 컴포넌트의 수를 세어 반환
-        return len(set([self.find(parent, i) for i in range(len(self.vertices))]))
+        # 연결된 컴포넌트의 수를 세어 반환 (고립된 정점도 하나의 컴포넌트)
+        return self.components.num_components
     
     def calculate_bounding_box(self):
-        if not self.vertices:
+        if len(self.vertices) == 0:
             return None
 
-        min_x = min_y = min_z = float('inf')
-        max_x = max_y = max_z = float('-inf')
-
-        for vertex in self.vertices:
-            x, y, z = vertex
-            min_x = min(min_x, x)
-            max_x = max(max_x, x)
-            min_y = min(min_y, y)
-            max_y = max(max_y, y)
-            min_z = min(min_z, z)
-            max_z = max(max_z, z)
-
-        return [min_x, min_y, min_z], [max_x, max_y, max_z]
+        return self.vertices.min(axis=0).tolist(), self.vertices.max(axis=0).tolist()
     
     # 고립된 정점 탐지
     def count_isolated_vertices(self):
-        # 모든 정점을 면에 포함되지 않았다고 가정
-        is_isolated = [True] * len(self.vertices)
+        # 면에 한 번도 포함되지 않은 정점의 수를 반환
+        return int(np.count_nonzero(self.vertex_degrees == 0))
+    
+    # 중복 정점 갯수 (epsilon 이하 거리의 정점도 중복으로 볼 수 있음)
+    def count_duplicated_vertices(self, epsilon=0.0):
+        merge_map = self.find_duplicate_vertices(epsilon)
+        return int(np.count_nonzero(merge_map != np.arange(len(merge_map))))
 
-        # 모든 면을 순회하면서 면에 포함된 정점을 표시
-        for face in self.faces:
-            for vertex in face:
-                is_isolated[vertex] = False
+    # 정점 병합 맵 (정점마다 대표 정점 번호)
+    def find_duplicate_vertices(self, epsilon=0.0):
+        return find_duplicate_vertices(self.vertices, epsilon)
 
-        # 고립된 정점의 수를 반환
-        return sum(is_isolated)
-    
-    # 중복 정점 갯수
-    def count_duplicated_vertices(self):
-        unique_vertices = set()
-        duplicated_count = 0
-
-        for vertex in self.vertices:
-            if vertex in unique_vertices:
-                duplicated_count += 1
-            else:
-                unique_vertices.add(vertex)
+    # 두 개 이상의 정점이 묶인 중복 정점 그룹들
+    def get_duplicate_vertex_clusters(self, epsilon=0.0):
+        return duplicate_clusters(self.find_duplicate_vertices(epsilon))
 
-        return duplicated_count
+    # 중복 정점을 대표 정점으로 합친 새 메쉬 (블렌더 없이 정점 병합)
+    def weld_vertices(self, epsilon=0.0, merge_map=None):
+        if merge_map is None:
+            merge_map = self.find_duplicate_vertices(epsilon)
+
+        representatives, new_index = np.unique(merge_map, return_inverse=True)
+        faces = np.where(self.faces != FACE_PAD, new_index[self.faces], FACE_PAD)
+        return Mesh(self.vertices[representatives], faces)
 
     # 중복 면 갯수
     def count_duplicated_faces(self):
-        unique_faces = set()
-        duplicated_count = 0
-
-        for face in self.faces:
-            # 정점들을 정렬하여 순서에 상관없이 동일한 면을 비교할 수 있도록 함
-            sorted_face = tuple(sorted(face))
-            if sorted_face in unique_faces:
-                duplicated_count += 1
-            else:
-                unique_faces.add(sorted_face)
-
-        return duplicated_count
+        face_map = find_duplicate_faces(self.faces)
+        return int(np.count_nonzero(face_map != np.arange(len(face_map))))
     
     # 경계 엣지 수
     def count_boundary_edges(self):
-        # A dictionary to count the number of faces each edge belongs to
-        edge_face_count = {}
-
-        # Iterate over all faces and increment the count for each edge
-        for face in self.faces:
-            num_vertices = len(face)
-            for i in range(num_vertices):
-                edge = (min(face[i], face[(i + 1) % num_vertices]), 
-                        max(face[i], face[(i + 1) % num_vertices]))
-                if edge in edge_face_count:
-                    edge_face_count[edge] += 1
-                else:
-                    edge_face_count[edge] = 1
-
         # Count edges that belong to only one face
-        boundary_edges_count = sum(1 for edge in edge_face_count if edge_face_count[edge] == 1)
-
-        return boundary_edges_count
+        return int(np.count_nonzero(self.incidence.boundary_mask()))
     
     # 경계 루프 갯수
     def count_boundary_loops(self):
-        boundary_edges = self._find_boundary_edges()
-        visited_edges = set()
-        loop_count = 0
-
-        for edge in boundary_edges:
-            if edge not in visited_edges:
-                self._follow_boundary_loop(edge, boundary_edges, visited_edges)
-                loop_count += 1
-
-        return loop_count
+        return self.boundary_loops.num_loops
 
+    # 경계 엣지 번호 배열 (한 면에만 속한 엣지)
     def _find_boundary_edges(self):
-        edge_face_count = {}
-        for face in self.faces:
-            for i in range(len(face)):
-                edge = (min(face[i], face[(i + 1) % len(face)]), max(face[i], face[(i + 1) % len(face)]))
-                edge_face_count[edge] = edge_face_count.get(edge, 0) + 1
-
-        return {edge for edge, count in edge_face_count.items() if count == 1}
-
-    def _follow_boundary_loop(self, start_edge, boundary_edges, visited_edges):
-        current_edge = start_edge
-        visited_edges.add(current_edge)
-
-        # Start vertex to check if we have completed the loop
-        start_vertex = current_edge[0]
-        current_vertex = current_edge[1]
-
-        while True:
-            # Find the next boundary edge that shares the current vertex and is not already visited
-            next_edges = [edge for edge in boundary_edges if edge not in visited_edges and current_vertex in edge]
-
-            if not next_edges:
-                # No more connected edges, end of loop
-                break
-
-            next_edge = next_edges[0]
-            visited_edges.add(next_edge)
-            current_edge = next_edge
-
-            # Update the current vertex
-            current_vertex = next_edge[0] if next_edge[0] != current_vertex else next_edge[1]
-
-            # Check if the loop is closed
-            if current_vertex == start_vertex:
-                break
+        return np.flatnonzero(self.incidence.boundary_mask())
+
+    # 경계 엣지를 따라가며 루프를 추출
+    def _extract_boundary_loops(self):
+        boundary_edge_ids = self._find_boundary_edges()
+        boundary_edges = self.incidence.edges[boundary_edge_ids].astype(np.int64)
+        num_boundary = len(boundary_edges)
+
+        # 정점 -> 경계 엣지 인접 목록 (CSR)
+        endpoints = boundary_edges.T.ravel()
+        order = np.argsort(endpoints, kind='stable')
+        adjacent_edges = (order % max(num_boundary, 1)).tolist()
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(endpoints, minlength=len(self.vertices)))))
+        cursor = offsets[:-1].tolist()
+        adjacent_end = offsets[1:].tolist()
+
+        edge_list = boundary_edges.tolist()
+        visited = [False] * num_boundary
+        loops = []
+        loop_edges = []
+        closed = []
+
+        for start in range(num_boundary):
+            if visited[start]:
+                continue
+            visited[start] = True
+
+            # Start vertex to check if we have completed the loop
+            start_vertex, current_vertex = edge_list[start]
+            vertices = [start_vertex, current_vertex]
+            edges = [start]
+            is_closed = False
+
+            while True:
+                # 현재 정점에서 아직 방문하지 않은 경계 엣지를 찾음 (이미 본 엣지는 건너뜀)
+                end = adjacent_end[current_vertex]
+                position = cursor[current_vertex]
+                while position < end and visited[adjacent_edges[position]]:
+                    position += 1
+                cursor[current_vertex] = position
+
+                if position == end:
+                    # No more connected edges, end of loop
+                    break
+
+                next_edge = adjacent_edges[position]
+                visited[next_edge] = True
+                edges.append(next_edge)
+
+                # Update the current vertex
+                a, b = edge_list[next_edge]
+                current_vertex = a if b == current_vertex else b
+
+                # Check if the loop is closed
+                if current_vertex == start_vertex:
+                    is_closed = True
+                    break
+                vertices.append(current_vertex)
+
+            loops.append(np.array(vertices, dtype=np.int64))
+            loop_edges.append(boundary_edge_ids[edges])
+            closed.append(is_closed)
+
+        return BoundaryLoops(loops, loop_edges, closed, self.edge_lengths)
 
     # 면적이 0인 면의 수
     def count_degenerated_faces(self):
-        degenerated_count = 0
-        for face in self.faces:
-            if self._is_degenerated_face(face):
-                degenerated_count += 1
-        return degenerated_count
+        # A triangle is degenerated if its area is close to zero
+        return int(np.count_nonzero(self.degenerate_faces))
 
     def _is_degenerated_face(self, face):
         # A triangle is degenerated if its area is close to zero
-        return self.calculate_triangle_area(face) < 1e-15
+        return bool(self._single_face_mesh(face).degenerate_faces[0])
     
+    # 두 면에 속한 모든 엣지를 두 면이 서로 반대 방향으로 지나가면 일관된 방향
     def is_oriented(self):
-        # 각 면의 법선 계산
-        face_normals = {i: self.calculate_normal(face) for i, face in enumerate(self.faces)}
-
-        # 각 면에 대해 인접한 면들과의 법선 방향 일치 여부 검사
-        for i, face in enumerate(self.faces):
-            current_normal = face_normals[i]
-
-            # 인접 면 찾기
-            adjacent_faces = self._find_adjacent_faces(i)
-
-            for adjacent_face in adjacent_faces:
-                adjacent_normal = face_normals[adjacent_face]
-
-                # 내적이 음수라면, 두 법선이 반대 방향임
-                if np.dot(current_normal, adjacent_normal) < 0:
-                    return False
-
-        return True
-
-    def _find_adjacent_faces(self, face_index):
-        adjacent_faces = set()
-        face = self.faces[face_index]
-        num_vertices = len(face)
-
-        for i in range(num_vertices):
-            edge = (min(face[i], face[(i + 1) % num_vertices]), 
-                    max(face[i], face[(i + 1) % num_vertices]))
-            if edge in self.edge_face_map:
-                for adjacent_face_index in self.edge_face_map[edge]:
-                    if adjacent_face_index != face_index:
-                        adjacent_faces.add(adjacent_face_index)
-
-        return list(adjacent_faces)  
+        return self.orientation.num_inconsistent_edges == 0
     
     # 닫힌 메쉬인지 판단
     def is_closed(self):
-        edge_face_count = {}
-        
-        # Count the number of faces each edge belongs to
-        for face in self.faces:
-            num_vertices = len(face)
-            for i in range(num_vertices):
-                edge = (min(face[i], face[(i + 1) % num_vertices]), 
-                        max(face[i], face[(i + 1) % num_vertices]))
-                edge_face_count[edge] = edge_face_count.get(edge, 0) + 1
-
         # Check if all edges belong to exactly two faces
-        for edge_count in edge_face_count.values():
-            if edge_count != 2:
-                return False  # Found a boundary edge or an edge shared by more than 2 faces
-
-        return True  # No boundary edges found, the mesh is closed
+        return bool(np.all(self.incidence.manifold_mask()))
     
     # 엣지 매니폴드 판단
     def is_edge_manifold(self):
-        edge_face_count = {}
-
-        # Count the number of faces each edge belongs to
-        for face in self.faces:
-            num_vertices = len(face)
-            for i in range(num_vertices):
-                edge = (min(face[i], face[(i + 1) % num_vertices]), 
-                        max(face[i], face[(i + 1) % num_vertices]))
-                edge_face_count[edge] = edge_face_count.get(edge, 0) + 1
-
         # Check if any edge belongs to more than two faces
-        for count in edge_face_count.values():
-            if count > 2:
-                return False  # Found an edge that is not manifold
-
-        return True  # All edges are manifold
+        return not bool(np.any(self.incidence.face_count > 2))
     
     def is_vertex_manifold(self):
-        # Create a map from vertices to their adjacent faces and edges
-        vertex_face_map = {v: set() for v in range(len(self.vertices))}
-        vertex_edge_map = {v: set() for v in range(len(self.vertices))}
-        for i, face in enumerate(self.faces):
-            for j, vertex in enumerate(face):
-                vertex_face_map[vertex].add(i)
-                edge = (min(vertex, face[(j + 1) % len(face)]), max(vertex, face[(j + 1) % len(face)]))
-                vertex_edge_map[vertex].add(edge)
+        incidence = self.incidence
+        num_vertices = len(self.vertices)
+        vertices = incidence.half_edge_from.astype(np.int64)
 
-        # Check each vertex
-        for vertex, faces in vertex_face_map.items():
-            if not self._is_vertex_manifold(vertex, faces, vertex_edge_map[vertex]):
-                return False  # Found a vertex that violates the manifold condition
+        # 정점마다 속한 면의 수와, 그 정점에서 나가는 엣지의 수 (중복 제외)
+        num_faces = _count_distinct_pairs(vertices, incidence.half_edge_face, len(self.faces), num_vertices)
+        num_edges = _count_distinct_pairs(vertices, incidence.half_edge_edge, len(incidence.edges), num_vertices)
 
-        return True  # All vertices are manifold
+        # Check each vertex
+        return bool(np.all(self._is_vertex_manifold(num_faces, num_edges)))
 
-    def _is_vertex_manifold(self, vertex, faces, edges):
+    def _is_vertex_manifold(self, num_faces, num_edges):
         # In a manifold, the number of edges should be equal to or one more than the number of faces
         # The extra edge is for the boundary loop case
-        return len(edges) == len(faces) or len(edges) == len(faces) + 1
+        return (num_edges == num_faces) | (num_edges == num_faces + 1)
+
+    def load_obj(self, filename, fast=True, cache=None):
+        # 캐시가 있으면 텍스트 파싱 없이 메모리 매핑된 배열을 그대로 사용
+        if cache is not None:
+            key = cache.key(filename)
+            cached = cache.load(key)
+            if cached is not None:
+                self.vertices, self.faces, edges = cached
+                self._invalidate()
+                self._edges = edges
+                return
+
+        if fast:
+            self.vertices, self.faces = parse_obj(filename)
+        else:
+            self.vertices, self.faces = parse_obj_lines(filename)
+        self._invalidate()
+
+        if cache is not None:
+            cache.save(key, self)
+
+
+# (groups[i], items[i]) 쌍 중 서로 다른 것의 수를 그룹마다 셈
+# np.unique 는 정렬 후 추가 작업이 많아 큰 메쉬에서 느리므로 정렬한 키에서 앞 값과 다른 것만 남김
+def _count_distinct_pairs(groups, items, num_items, num_groups):
+    keys = np.sort(groups.astype(np.int64) * max(num_items, 1) + items)
+    distinct = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+    return np.bincount(distinct // max(num_items, 1), minlength=num_groups)
+
+
+# 병합 가능한 분위수 스케치
+# (값, 가중치) 점들을 정렬해두고, 점이 capacity의 두 배를 넘으면 누적 가중치가 고르게
+# 나뉘도록 capacity 개의 구간으로 합침 (순위 오차는 대략 1 / capacity)
+class QuantileSketch:
+    def __init__(self, capacity=QUANTILE_SKETCH_SIZE):
+        self.capacity = capacity
+        self.values = np.zeros(0, dtype=np.float64)
+        self.weights = np.zeros(0, dtype=np.float64)
+
+    def update(self, values, weights=None):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if weights is None:
+            weights = np.ones(len(values), dtype=np.float64)
+        self.values = np.concatenate([self.values, values])
+        self.weights = np.concatenate([self.weights, weights])
+        if len(self.values) > 2 * self.capacity:
+            self._compress()
+
+    def merge(self, other):
+        self.update(other.values, other.weights)
+
+    def _sorted(self):
+        order = np.argsort(self.values, kind='stable')
+        return self.values[order], self.weights[order]
+
+    def _compress(self):
+        values, weights = self._sorted()
+        cumulative = np.cumsum(weights)
+        buckets = np.minimum(((cumulative - weights / 2) / cumulative[-1] * self.capacity).astype(np.int64),
+                             self.capacity - 1)
+
+        bucket_weights = np.bincount(buckets, weights=weights, minlength=self.capacity)
+        bucket_sums = np.bincount(buckets, weights=values * weights, minlength=self.capacity)
+        used = bucket_weights > 0
+        self.values = bucket_sums[used] / bucket_weights[used]
+        self.weights = bucket_weights[used]
+
+    # np.percentile(linear)과 같은 방식으로 보간 (압축 전에는 정확히 같은 값)
+    def percentiles(self, percents):
+        values, weights = self._sorted()
+        centers = np.cumsum(weights) - weights + (weights - 1) / 2
+        ranks = np.asarray(percents, dtype=np.float64) / 100 * (np.sum(weights) - 1)
+        return np.interp(ranks, centers, values)
+
+
+# 한 번의 순회로 평균, 분산(Welford), 최소/최대, 합, 분위수를 구하는 누적기
+# 배열을 청크 단위로 넣거나 다른 누적기와 합칠 수 있음 (모델별 -> 데이터셋 전체)
+# exact=True 이면 값을 모두 보관해서 np.percentile과 같은 분위수를, False 이면 스케치로 근사
+class StatAccumulator:
+    def __init__(self, values=None, exact=True, sketch_size=QUANTILE_SKETCH_SIZE):
+        self.count = 0
+        self.mean = float('nan')
+        self.m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.total = 0.0
+        self.exact = exact
+        self.sketch_size = sketch_size
+        self._chunks = []
+        self._sketch = None if exact else QuantileSketch(sketch_size)
+
+        if values is not None:
+            self.update(values)
+
+    def _combine(self, count, mean, m2):
+        # 두 그룹의 평균/제곱합을 합치는 Chan의 병합 공식
+        if count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = count, mean, m2
+            return
+
+        total_count = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total_count
+        self.m2 += m2 + delta * delta * self.count * count / total_count
+        self.count = total_count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+
+        chunk_mean = np.mean(values)
+        self._combine(len(values), float(chunk_mean), float(np.sum((values - chunk_mean) ** 2)))
+        self.min = min(self.min, float(np.min(values)))
+        self.max = max(self.max, float(np.max(values)))
+        self.total += float(np.sum(values))
+
+        if self.exact:
+            self._chunks.append(values)
+        else:
+            self._sketch.update(values)
 
-    def load_obj(self, filename):
-        with open(filename, 'r') as file:
-            for line in file:
-                if line.startswith('v '):
-                    parts = line.split()
-                    vertex = tuple(map(float, parts[1:4]))  # x, y, z 좌표
-                    self.add_vertex(vertex)
-                elif line.startswith('f '):
-                    parts = line.split()
-                    # OBJ 파일은 1부터 인덱싱하지만 Python은 0부터 인덱싱함을 고려
-                    face = [int(p.split('/')[0]) - 1 for p in parts[1:]]
-                    self.add_face(face)
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total += other.total
+
+        if self.exact and other.exact:
+            self._chunks.extend(other._chunks)
+        else:
+            # 한쪽이라도 스케치면 합친 결과도 스케치 (크기는 둘 중 큰 쪽, 합쳐서 해상도가 줄지 않게)
+            self.sketch_size = max(self.sketch_size, other.sketch_size)
+            if self._sketch is None:
+                self._sketch = QuantileSketch(self.sketch_size)
+                for chunk in self._chunks:
+                    self._sketch.update(chunk)
+                self._chunks = []
+                self.exact = False
+            self._sketch.capacity = self.sketch_size
+            if other.exact:
+                for chunk in other._chunks:
+                    self._sketch.update(chunk)
+            else:
+                self._sketch.merge(other._sketch)
+        return self
+
+    def variance(self, ddof=1):
+        if self.count < 2:
+            raise ValueError("Variance requires at least two data points")
+        return self.m2 / (self.count - ddof)  # ddof=1: For a sample; ddof=0: for a population
+
+    def percentiles(self, percents):
+        if self.exact:
+            return np.percentile(np.concatenate(self._chunks), percents)
+
+        result = self._sketch.percentiles(percents)
+        # 최소/최대는 스케치 대신 정확한 값을 사용
+        percents = np.asarray(percents)
+        result[percents <= 0] = self.min
+        result[percents >= 100] = self.max
+        return result
 
 
 # 분산 계산
 def calculate_variance(data):
-    if len(data) < 2:
-        raise ValueError("Variance requires at least two data points")
-
-    mean = sum(data) / len(data)
-    squared_diff = [(x - mean) ** 2 for x in data]
-    variance = sum(squared_diff) / (len(data) - 1)  # For a sample; use len(data) for a population
-    return variance
+    return StatAccumulator(data).variance()
 
 
 # 백분위수 구한후 저장
+# data 에는 값 배열이나 StatAccumulator(청크 단위로 누적했거나 여러 모델을 합친 것)를 넘김
 def quantile_breakdown(data, name, info, txt_path, with_total=False):
 
-    ave = np.mean(data)
-    var = calculate_variance(data)
+    accumulator = data if isinstance(data, StatAccumulator) else StatAccumulator(data)
+
+    ave = accumulator.mean
+    var = accumulator.variance()
 
     if with_total:
-        total = np.sum(data)
+        total = accumulator.total
 
     p0, p25, p50, p75, p90, p95, p100 =\
-            np.percentile(data, [0, 25, 50, 75, 90, 95, 100])
+            accumulator.percentiles([0, 25, 50, 75, 90, 95, 100]).tolist()
 
     text = "-- {} --\n".format(name)
     text += "min: {:^7.3}\n".format(p0)
@@ -484,7 +1438,51 @@ def quantile_breakdown(data, name, info, txt_path, with_total=False):
 
     
 
+# 지표 레지스트리
+# 이름 -> (저장 함수, 필요한 중간 결과)
+# 중간 결과는 Mesh의 지연 속성 이름이고, save_status 가 선택된 지표에 필요한 것만 한 번씩 만듦
+METRICS = {}
+
+# 중간 결과를 만드는 순서 (앞의 것이 뒤의 것의 재료)
+MESH_INTERMEDIATES = ("incidence", "edges", "edge_lengths", "face_areas", "face_normals", "vertex_degrees",
+                      "components", "boundary_loops", "orientation")
+
+def register_metric(name, *requires):
+    for require in requires:
+        if require not in MESH_INTERMEDIATES:
+            raise ValueError("Unknown mesh intermediate: {}".format(require))
+
+    def decorator(func):
+        METRICS[name] = (func, requires)
+        return func
+    return decorator
+
+# 선택한 지표 이름들에 필요한 중간 결과 (만드는 순서대로)
+def metric_requirements(names):
+    required = set()
+    for name in names:
+        required.update(METRICS[name][1])
+    return [intermediate for intermediate in MESH_INTERMEDIATES if intermediate in required]
+
+# 지표 이름 목록 또는 프로필 이름을 지표 이름 목록으로 바꿈
+def resolve_metrics(metrics):
+    if metrics is None:
+        metrics = "full"
+    if isinstance(metrics, str):
+        if metrics not in METRIC_PROFILES:
+            raise ValueError("Unknown metric profile: {}".format(metrics))
+        metrics = METRIC_PROFILES[metrics]
+
+    unknown = [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise ValueError("Unknown metrics: {}".format(", ".join(unknown)))
+
+    # 출력 순서는 항상 레지스트리 순서
+    return [name for name in METRICS if name in metrics]
+
+
 # 기본 정보 저장
+@register_metric("basic_info", "edges")
 def save_basic_info(mesh ,info ,txt_path):
 
     num_vertex = len(mesh.vertices)
@@ -492,7 +1490,7 @@ def save_basic_info(mesh ,info ,txt_path):
     num_edge = len(mesh.edges)
     
     # 각 면에 속한 정점의 수를 합산
-    total_vertices_in_faces = sum(len(face) for face in mesh.faces)
+    total_vertices_in_faces = int(np.sum(mesh.face_sizes()))
 
     # 면의 수
     num_faces = len(mesh.faces)
@@ -515,6 +1513,7 @@ def save_basic_info(mesh ,info ,txt_path):
         append_to_file(txt_path, text)
 
 # 바운딩 박스 저장
+@register_metric("bounding_box")
 def save_bounding_box(mesh ,info ,txt_path):
 
     box_min, box_max = mesh.calculate_bounding_box()
@@ -530,27 +1529,31 @@ def save_bounding_box(mesh ,info ,txt_path):
         append_to_file(txt_path, text)
 
 # Edge Length ( 엣지 길이 )
+@register_metric("edge_length", "edge_lengths")
 def save_edge_length(mesh, info, txt_path):
 
-    edge_lengths = mesh.get_edge_lengths()
+    edge_lengths = mesh.edge_lengths
     data = edge_lengths
     quantile_breakdown(data, "Edge Length", info , txt_path)
 
 # Area Size ( 면적 크기 ) 
+@register_metric("area_size", "face_areas")
 def save_area_size(mesh, info, txt_path):
 
-    face_areas = mesh.get_face_areas()
+    face_areas = mesh.face_areas
     data = face_areas
     quantile_breakdown(data, "Area Size", info , txt_path, True)
 
 # Vertex Valance ( 정점 차수 )  
+@register_metric("vertex_valance", "vertex_degrees")
 def save_vertex_valance(mesh, info, txt_path):
 
-    vertex_degrees = mesh.calculate_vertex_degrees()
+    vertex_degrees = mesh.vertex_degrees
     data = vertex_degrees
     quantile_breakdown(data, "Vertex Valance", info , txt_path)
 
 # Face Aspect Ratio ( 면 종횡비 )       계산값 정확성 애매함
+@register_metric("face_aspect", "incidence", "edge_lengths", "face_areas")
 def save_face_acpect(mesh, info, txt_path):
 
     face_aspect_ratios = mesh.get_face_aspect_ratios()
@@ -558,6 +1561,7 @@ def save_face_acpect(mesh, info, txt_path):
     quantile_breakdown(data, "Face Aspect Ratio", info , txt_path)
 
 # Edge Dihedral Angle ( 모서리 이면각 )       
+@register_metric("dihedral_angle", "incidence", "face_normals")
 def save_dihedral_angle(mesh, info, txt_path):
 
     edge_dihedral_angles = mesh.get_edge_dihedral_angles()
@@ -567,6 +1571,8 @@ def save_dihedral_angle(mesh, info, txt_path):
     quantile_breakdown(data, "Edge Dihedral Angle", info , txt_path)
 
 # 그 외 정보
+@register_metric("extended_info", "edges", "face_areas", "vertex_degrees", "components", "orientation",
+                 "boundary_loops")
 def save_extended_info(mesh, info, txt_path):
 
     num_vertex = len(mesh.vertices)
@@ -585,6 +1591,9 @@ def save_extended_info(mesh, info, txt_path):
     # 중복된 정점 수
     num_duplicated_vertices = mesh.count_duplicated_vertices()
 
+    # 거의 같은 위치에 있는 중복 정점 수
+    num_near_duplicated_vertices = mesh.count_duplicated_vertices(NEAR_DUPLICATE_EPSILON)
+
     # 중복된 면 수
     num_duplicated_faces = mesh.count_duplicated_faces()
 
@@ -606,34 +1615,46 @@ def save_extended_info(mesh, info, txt_path):
     # 일관된 방향 판단
     oriented = mesh.is_oriented()
 
+    # 방향이 맞지 않는 면 수, 방향을 맞출 수 있는 패치 수
+    num_inconsistent_faces = mesh.orientation.num_inconsistent_faces
+    num_orientable_patches = mesh.orientation.num_orientable_patches
+
     # 닫힌 메쉬 판단
-    # closed = mesh.is_watertight
+    closed = mesh.is_closed()
 
     text = "-- Extended info --\n"
     text += f"euler characteristic : {eluer_charater}\n"
     text += f"num connected components : {num_connected_components}\n"
     text += f"num isolated vertices : {num_isolated_vertices}\n"
     text += f"num duplicated vertices : {num_duplicated_vertices}\n"
+    text += f"num near duplicated vertices : {num_near_duplicated_vertices}\n"
     text += f"num duplicated faces : {num_duplicated_faces}\n"
     text += f"num boundary edges : {num_boundary_edges}\n"
     text += f"num boundary loops : {num_boundary_loops}\n"
     text += f"num degenerated faces : {num_degenerated_faces}\n"
     text += f"edge manifold : {edge_manifold}\n"
     text += f"vertex manifold : {vertex_manifold}\n"
+    text += f"closed : {closed}\n"
     text += f"oriented : {oriented}\n"
+    text += f"num inconsistent faces : {num_inconsistent_faces}\n"
+    text += f"num orientable patches : {num_orientable_patches}\n"
 
 
     info["euler characteristic"] = eluer_charater
     info["num connected components"] = num_connected_components
     info["num isolated vertices"] = num_isolated_vertices
     info["num duplicated vertices"] = num_duplicated_vertices
+    info["num near duplicated vertices"] = num_near_duplicated_vertices
     info["num duplicated faces"] = num_duplicated_faces
     info["num boundary edges"] = num_boundary_edges
     info["num boundary loops"] = num_boundary_loops
     info["num degenerated faces"] = num_degenerated_faces
     info["edge manifold"] = edge_manifold
     info["vertex manifold"] = vertex_manifold
+    info["closed"] = closed
     info["oriented"] = oriented
+    info["num inconsistent faces"] = num_inconsistent_faces
+    info["num orientable patches"] = num_orientable_patches
   
 
     if txt_path:
@@ -641,6 +1662,243 @@ def save_extended_info(mesh, info, txt_path):
 
 
 
+# 경계 루프(구멍) 크기 정보
+@register_metric("boundary_loops", "edge_lengths", "boundary_loops")
+def save_boundary_loops(mesh, info, txt_path):
+
+    boundary_loops = mesh.boundary_loops
+
+    if boundary_loops.num_loops:
+        max_loop_length = int(boundary_loops.lengths.max())
+        max_loop_perimeter = float(boundary_loops.perimeters.max())
+        total_loop_perimeter = float(boundary_loops.perimeters.sum())
+    else:
+        max_loop_length = 0
+        max_loop_perimeter = 0.0
+        total_loop_perimeter = 0.0
+
+    text = "-- Boundary loops --\n"
+    text += f"max boundary loop length : {max_loop_length}\n"
+    text += f"max boundary loop perimeter : {max_loop_perimeter:.6g}\n"
+    text += f"total boundary loop perimeter : {total_loop_perimeter:.6g}\n"
+
+    info["max boundary loop length"] = max_loop_length
+    info["max boundary loop perimeter"] = max_loop_perimeter
+    info["total boundary loop perimeter"] = total_loop_perimeter
+
+    if txt_path:
+        append_to_file(txt_path, text)
+
+
+
+# 연결 요소 수만 필요할 때 (extended_info 보다 훨씬 가벼움)
+@register_metric("connected_components", "components")
+def save_connected_components(mesh, info, txt_path):
+
+    num_connected_components = mesh.count_connected_components()
+
+    text = "-- Connected components --\n"
+    text += f"num connected components : {num_connected_components}\n"
+
+    info["num connected components"] = num_connected_components
+
+    if txt_path:
+        append_to_file(txt_path, text)
+
+
+# 자주 쓰는 지표 묶음
+# full: 모든 지표, comparison: quality_comparison.save_comparison_data 에 필요한 키만
+METRIC_PROFILES = {
+    "full": [name for name in METRICS if name != "connected_components"],
+    "comparison": ["basic_info", "edge_length", "area_size", "face_aspect", "connected_components"],
+}
+
+
+
+# 모델별 지표를 한 데이터셋에 하나씩 두는 SQLite 테이블
+# 한 행이 (모델, 실행) 하나, 한 열이 지표 키 하나 (새 키가 나오면 열을 추가)
+# 여러 프로세스가 동시에 써도 되도록 쓰기마다 짧은 트랜잭션을 사용
+class StatsStore:
+    TABLE = "stats"
+
+    def __init__(self, db_path, timeout=60.0):
+        self.db_path = db_path
+        self.timeout = timeout
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS {} (model TEXT NOT NULL, run TEXT NOT NULL, "
+                               "created REAL, PRIMARY KEY (model, run))".format(self.TABLE))
+            # 지표 키별 원래 타입 (bool 을 JSON 으로 되돌릴 때 사용)
+            connection.execute("CREATE TABLE IF NOT EXISTS metric_columns (name TEXT PRIMARY KEY, type TEXT)")
+
+    # 데이터셋 폴더 안의 기본 위치
+    @classmethod
+    def in_folder(cls, folder_path):
+        return cls(os.path.join(folder_path, STATS_STORE_NAME))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=self.timeout)
+
+    @staticmethod
+    def _quote(name):
+        return '"{}"'.format(name.replace('"', '""'))
+
+    @staticmethod
+    def _value_type(value):
+        if isinstance(value, (bool, np.bool_)):
+            return "bool"
+        if isinstance(value, (int, np.integer)):
+            return "int"
+        return "float"
+
+    def _column_types(self, connection):
+        return dict(connection.execute("SELECT name, type FROM metric_columns").fetchall())
+
+    # 중첩된 딕셔너리(_timings 등)는 "바깥/안쪽" 이름의 열로 펼침
+    @classmethod
+    def _flatten(cls, info, prefix=""):
+        flat = {}
+        for key, value in info.items():
+            if isinstance(value, dict):
+                flat.update(cls._flatten(value, prefix + key + "/"))
+            elif value is not None:
+                flat[prefix + key] = value
+        return flat
+
+    def append(self, model, info, run=DEFAULT_RUN):
+        info = self._flatten(info)
+
+        with self._connect() as connection:
+            # 열 추가와 행 쓰기를 한 트랜잭션으로 (다른 프로세스와 겹치지 않게)
+            connection.execute("BEGIN IMMEDIATE")
+            column_types = self._column_types(connection)
+            for key, value in info.items():
+                if key not in column_types:
+                    connection.execute("ALTER TABLE {} ADD COLUMN {}".format(self.TABLE, self._quote(key)))
+                    connection.execute("INSERT INTO metric_columns VALUES (?, ?)", (key, self._value_type(value)))
+                    column_types[key] = self._value_type(value)
+
+            names = ["model", "run", "created"] + list(info)
+            values = [model, run, time.time()]
+            values += [value.item() if isinstance(value, np.generic) else value for value in info.values()]
+            connection.execute("INSERT OR REPLACE INTO {} ({}) VALUES ({})".format(
+                self.TABLE, ", ".join(self._quote(name) for name in names), ", ".join("?" * len(names))), values)
+
+    def runs(self):
+        with self._connect() as connection:
+            rows = connection.execute("SELECT DISTINCT run FROM {}".format(self.TABLE)).fetchall()
+        return [row[0] for row in rows]
+
+    def models(self, run=DEFAULT_RUN):
+        with self._connect() as connection:
+            rows = connection.execute("SELECT model FROM {} WHERE run = ? ORDER BY model".format(self.TABLE),
+                                      (run,)).fetchall()
+        return [row[0] for row in rows]
+
+    def keys(self):
+        with self._connect() as connection:
+            return list(self._column_types(connection))
+
+    # 모델 이름 리스트와 {지표 키: 배열}을 반환 (없는 값은 NaN, bool 열은 NaN이 없으면 bool 배열)
+    def read_columns(self, keys=None, run=DEFAULT_RUN):
+        with self._connect() as connection:
+            column_types = self._column_types(connection)
+            if keys is None:
+                keys = list(column_types)
+            unknown = [key for key in keys if key not in column_types]
+            if unknown:
+                raise KeyError("Unknown metric columns: {}".format(", ".join(unknown)))
+
+            names = ["model"] + list(keys)
+            rows = connection.execute("SELECT {} FROM {} WHERE run = ? ORDER BY model".format(
+                ", ".join(self._quote(name) for name in names), self.TABLE), (run,)).fetchall()
+
+        models = [row[0] for row in rows]
+        columns = {}
+        for i, key in enumerate(keys, start=1):
+            column = np.array([np.nan if row[i] is None else row[i] for row in rows], dtype=np.float64)
+            if column_types[key] == "bool" and not np.isnan(column).any():
+                column = column.astype(bool)
+            elif column_types[key] == "int" and not np.isnan(column).any():
+                column = column.astype(np.int64)
+            columns[key] = column
+        return models, columns
+
+    # 모델별 data_<이름>.json 으로 내보냄 (예전 save_data 형식과 같음)
+    def export_json(self, save_path, run=DEFAULT_RUN):
+        with self._connect() as connection:
+            column_types = self._column_types(connection)
+            cursor = connection.execute("SELECT * FROM {} WHERE run = ? ORDER BY model".format(self.TABLE), (run,))
+            names = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+
+        os.makedirs(save_path, exist_ok=True)
+        for row in rows:
+            record = dict(zip(names, row))
+            model = record.pop("model")
+            record.pop("run")
+            record.pop("created")
+
+            info = {}
+            for key, value in record.items():
+                if value is None:
+                    continue
+                value = bool(value) if column_types.get(key) == "bool" else value
+
+                # 펼친 열은 다시 중첩된 딕셔너리로
+                *parents, name = key.split("/")
+                target = info
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[name] = value
+
+            with open(os.path.join(save_path, 'data_{}.json'.format(model)), 'w') as file:
+                json.dump(info, file)
+        return len(rows)
+
+
+
+# 단계별 실행 시간(wall), CPU 시간, 최대 메모리 할당량(tracemalloc)을 기록
+# timings[단계 이름] = {"wall": 초, "cpu": 초, "peak_bytes": 바이트}
+class StageProfiler:
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def measure(self, name):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base_memory, _ = tracemalloc.get_traced_memory()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            _, peak_memory = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            self.timings[name] = {"wall": wall, "cpu": cpu, "peak_bytes": max(peak_memory - base_memory, 0)}
+
+
+# 프로파일링을 하지 않을 때 쓰는 빈 측정기
+class _NullProfiler:
+    timings = None
+
+    @contextmanager
+    def measure(self, name):
+        yield
+
+
 # 데이터를 파일에 추가하는 함수
 def append_to_file(path, text):
     with open(path, 'a') as file:  # 'a' 모드는 파일에 데이터를 추가합니다
@@ -649,7 +1907,14 @@ def append_to_file(path, text):
 
 
 # 메쉬 정보를 txt로 저장
-def save_status(obj_path, save_path, save_txt = True , save_data = False):
+# cache 에 MeshCache를 넘기면 파싱 결과를 캐시에서 읽고 씀
+# metrics 에 지표 이름 목록이나 프로필 이름("full", "comparison")을 넘기면 그 지표만 계산 (None 이면 full)
+# store 에 StatsStore를 넘기면 결과를 (모델 이름, run) 행으로 저장
+# profile=True 이면 파싱, 중간 결과, 지표별 시간과 메모리를 info["_timings"] 에 기록 (tracemalloc 때문에 느려짐)
+def save_status(obj_path, save_path, save_txt = True , save_data = False, cache = None, metrics = None,
+                store = None, run = DEFAULT_RUN, profile = False):
+
+    metric_names = resolve_metrics(metrics)
 
     txt_path = os.path.join(save_path, "meshstatus.txt")
 
@@ -660,33 +1925,417 @@ def save_status(obj_path, save_path, save_txt = True , save_data = False):
         txt_path = None
     
 
+    profiler = StageProfiler() if profile else _NullProfiler()
+
     mesh = Mesh()
-    mesh.load_obj(obj_path)
+    with profiler.measure("load_obj"):
+        mesh.load_obj(obj_path, cache=cache)
 
     # info 딕셔너리
     info = {}
 
-    save_basic_info(mesh ,info ,txt_path)
-    save_bounding_box(mesh ,info ,txt_path)
-    save_edge_length(mesh, info, txt_path)
-    save_area_size(mesh, info, txt_path)
-    save_vertex_valance(mesh, info, txt_path)
-    save_face_acpect(mesh, info, txt_path)
-    save_dihedral_angle(mesh, info, txt_path)
-    save_extended_info(mesh, info, txt_path)
+    # 선택한 지표에 필요한 중간 결과만 미리 만듦 (Mesh에 캐시되어 지표끼리 공유)
+    for intermediate in metric_requirements(metric_names):
+        with profiler.measure("build_" + intermediate):
+            getattr(mesh, intermediate)
 
-    if save_data:
-        # Extracting the file name
-        file_name_with_extension = os.path.basename(obj_path)
+    for name in metric_names:
+        save_func, _ = METRICS[name]
+        with profiler.measure(name):
+            save_func(mesh, info, txt_path)
+
+    # save_status_out_of_core 의 결과와 같은 열을 갖도록 처리 방식을 기록
+    info["out of core"] = False
 
-        # Splitting the file name and extension
-        file_name, file_extension = os.path.splitext(file_name_with_extension)
+    if profile:
+        info[TIMINGS_KEY] = profiler.timings
 
+
+    # Extracting the file name
+    file_name_with_extension = os.path.basename(obj_path)
+
+    # Splitting the file name and extension
+    file_name, file_extension = os.path.splitext(file_name_with_extension)
+
+    if store is not None:
+        store.append(file_name, info, run)
+
+    if save_data:
         file_path = os.path.join(save_path, 'data_{}.json'.format(file_name))
 
         with open(file_path, 'w') as file:
             json.dump(info, file)
 
+    return info
+
+
+
+
+# 메모리보다 큰 메쉬용: OBJ를 디스크의 원시 배열로 풀어두고 메모리 매핑으로 조금씩 읽음
+#   vertices   : (V,3) float64 memmap
+#   face_flat  : 모든 면의 정점 번호를 이어 붙인 int32 memmap
+#   face_sizes : (F,) int32 memmap
+# 한 번에 다루는 배열 크기는 memory_budget 안에 들어오도록 나눔
+class OutOfCoreMesh:
+    def __init__(self, work_dir=None, memory_budget=OUT_OF_CORE_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._own_work_dir = work_dir is None
+        self.work_dir = tempfile.mkdtemp(prefix="meshstat_") if work_dir is None else work_dir
+        os.makedirs(self.work_dir, exist_ok=True)
+
+        self.vertices = np.zeros((0, 3), dtype=np.float64)
+        self.face_flat = np.zeros(0, dtype=np.int32)
+        self.face_sizes = np.zeros(0, dtype=np.int32)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # 메모리 매핑을 먼저 닫아야 (윈도우에서) 파일을 지울 수 있음
+        self.vertices = self.face_flat = self.face_sizes = None
+        if self._own_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _path(self, name):
+        return os.path.join(self.work_dir, name)
+
+    def _memmap(self, name, dtype, count, shape=None):
+        if count == 0:
+            return np.zeros(shape or (0,), dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode='r', shape=shape or (count,))
+
+    # 한 번에 다룰 원소 수 (원소 하나가 bytes_per_item 바이트를 쓴다고 보고 예산을 나눔)
+    def _block(self, bytes_per_item):
+        return max(1024, self.memory_budget // bytes_per_item)
+
+    def load_obj(self, filename):
+        # 청크마다 바로 디스크에 덧붙이므로 메모리에는 청크 하나만 올라감
+        chunk_size = int(min(OBJ_CHUNK_SIZE, max(1 << 20, self.memory_budget // 16)))
+        num_vertices = num_flat = num_faces = 0
+
+        with open(self._path("vertices.f64"), 'wb') as vertex_file, \
+                open(self._path("face_flat.i32"), 'wb') as flat_file, \
+                open(self._path("face_sizes.i32"), 'wb') as size_file:
+            for vertices, flat, sizes in _iter_obj_chunks(filename, chunk_size):
+                np.ascontiguousarray(vertices, dtype=np.float64).tofile(vertex_file)
+                flat.astype(np.int32).tofile(flat_file)
+                sizes.astype(np.int32).tofile(size_file)
+                num_vertices += len(vertices)
+                num_flat += len(flat)
+                num_faces += len(sizes)
+
+        self.vertices = self._memmap("vertices.f64", np.float64, num_vertices, (num_vertices, 3))
+        self.face_flat = self._memmap("face_flat.i32", np.int32, num_flat)
+        self.face_sizes = self._memmap("face_sizes.i32", np.int32, num_faces)
+
+    # 정점 배열을 나눠서 반환
+    def iter_vertex_blocks(self):
+        block = self._block(3 * 8 * 4)
+        for start in range(0, len(self.vertices), block):
+            yield np.asarray(self.vertices[start:start + block])
+
+    # 면 배열을 나눠서 (F,k) 블록으로 반환 (Mesh와 같은 FACE_PAD 형식)
+    def iter_face_blocks(self):
+        width = int(self.face_sizes.max()) if len(self.face_sizes) else 3
+        # 면 하나에 정점 좌표 복사본과 중간 계산 배열이 여러 개 생김
+        block = self._block(width * 3 * 8 * 16)
+        offset = 0
+        for start in range(0, len(self.face_sizes), block):
+            sizes = np.asarray(self.face_sizes[start:start + block], dtype=np.int64)
+            end = offset + int(sizes.sum())
+            yield _faces_from_flat(np.asarray(self.face_flat[offset:end]), sizes)
+            offset = end
+
+    # 면 블록을 Mesh로 감싸서 기존 면 단위 계산을 그대로 사용 (정점은 메모리 매핑된 배열을 공유)
+    def iter_face_meshes(self):
+        for faces in self.iter_face_blocks():
+            yield Mesh(self.vertices, faces)
+
+    # 면 블록마다 (전체 면 번호, 시작 정점, 끝 정점) half-edge 배열
+    def iter_corner_blocks(self):
+        face_offset = 0
+        for mesh in self.iter_face_meshes():
+            face_ids, v_from, v_to = mesh._face_corners()
+            yield face_ids.astype(np.int64) + face_offset, v_from.astype(np.int64), v_to.astype(np.int64)
+            face_offset += len(mesh.faces)
+
+    # 외부 정렬: blocks 가 주는 (그룹, 키) 배열을 그룹(0 ~ num_groups-1) 범위로 나눈 버킷 파일에 쓰고,
+    # 버킷마다 메모리에서 정렬해 (서로 다른 키, 키의 수)를 반환 (그룹 순서, 버킷 안에서는 키 순서)
+    # width 가 1보다 크면 키는 (n, width) int64 행이고 행 단위로 비교함 (같은 키는 같은 그룹이어야 함)
+    def _iter_sorted_buckets(self, name, blocks, num_groups, num_keys, width=1):
+        if num_keys == 0 or num_groups == 0:
+            return
+
+        # 버킷 하나를 정렬할 때 키 배열의 여러 배 메모리가 필요함
+        num_buckets = int(min(num_groups, max(1, math.ceil(num_keys * width * 8 * 4 / self.memory_budget))))
+        bucket_paths = [self._path("{}_{}.i64".format(name, i)) for i in range(num_buckets)]
+        bucket_files = [open(path, 'wb') for path in bucket_paths]
+        try:
+            for groups, keys in blocks:
+                buckets = groups * num_buckets // num_groups
+                order = np.argsort(buckets, kind='stable')
+                bounds = np.searchsorted(buckets[order], np.arange(num_buckets + 1))
+                keys = keys[order]
+                for bucket in np.flatnonzero(np.diff(bounds)):
+                    keys[bounds[bucket]:bounds[bucket + 1]].tofile(bucket_files[bucket])
+        finally:
+            for file in bucket_files:
+                file.close()
+
+        for path in bucket_paths:
+            keys = np.fromfile(path, dtype=np.int64)
+            os.remove(path)
+            if len(keys) == 0:
+                continue
+            if width == 1:
+                keys = np.sort(keys)
+                is_first = np.r_[True, keys[1:] != keys[:-1]]
+            else:
+                keys = keys.reshape(-1, width)
+                keys = keys[np.lexsort(keys.T[::-1])]
+                is_first = np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)]
+            starts = np.flatnonzero(is_first)
+            yield keys[starts], np.diff(np.append(starts, len(keys)))
+
+    # 엣지 테이블을 외부 정렬로 만듦
+    # half-edge 키(작은 정점 * V + 큰 정점)를 작은 정점 범위로 나눈 버킷에서 정렬해
+    # 버킷마다 (엣지 키, 엣지를 지나는 면의 수)를 반환
+    def iter_edge_buckets(self):
+        num_vertices = len(self.vertices)
+
+        def blocks():
+            for _, v_from, v_to in self.iter_corner_blocks():
+                lo = np.minimum(v_from, v_to)
+                yield lo, lo * num_vertices + np.maximum(v_from, v_to)
+
+        return self._iter_sorted_buckets("edges", blocks(), num_vertices, len(self.face_flat))
+
+    # 좌표가 정확히 같은 중복 정점 수와 같은 정점들로 이루어진 중복 면 수
+    # (Mesh.count_duplicated_vertices(), Mesh.count_duplicated_faces() 와 같은 기준)
+    # 정점은 좌표의 비트 패턴, 면은 정렬한 정점 번호 행을 키로 외부 정렬하고 같은 키가 연속된 수를 셈
+    def count_duplicates(self):
+        num_vertices = len(self.vertices)
+
+        def vertex_blocks():
+            for vertices in self.iter_vertex_blocks():
+                # -0.0 과 0.0 을 같은 좌표로 보고, NaN 좌표는 다른 정점과 같지 않음
+                vertices = vertices[~np.any(np.isnan(vertices), axis=1)] + 0.0
+                keys = np.ascontiguousarray(vertices).view(np.int64)
+                yield _cell_hash(keys) % num_vertices, keys
+
+        width = int(self.face_sizes.max()) if len(self.face_sizes) else 3
+
+        def face_blocks():
+            for faces in self.iter_face_blocks():
+                # 블록마다 폭이 다르므로 전체 폭에 맞춰 앞쪽을 FACE_PAD 로 채움 (정렬하면 FACE_PAD 가 앞에 옴)
+                keys = np.full((len(faces), width), FACE_PAD, dtype=np.int64)
+                keys[:, width - faces.shape[1]:] = np.sort(faces, axis=1)
+                yield keys[:, -1], keys
+
+        num_duplicated_vertices = 0
+        for _, counts in self._iter_sorted_buckets("vertex_keys", vertex_blocks(), num_vertices,
+                                                   num_vertices, 3):
+            num_duplicated_vertices += int(np.sum(counts - 1))
+
+        num_duplicated_faces = 0
+        for _, counts in self._iter_sorted_buckets("face_keys", face_blocks(), num_vertices,
+                                                   len(self.face_sizes), width):
+            num_duplicated_faces += int(np.sum(counts - 1))
+        return num_duplicated_vertices, num_duplicated_faces
+
+    # 정점 매니폴드가 아닌 정점 수 (Mesh.is_vertex_manifold 와 같은 기준)
+    # 정점마다 속한 면의 수와 그 정점에서 나가는 엣지의 수(중복 제외)를 외부 정렬로 세어 디스크 배열에 누적
+    def count_non_manifold_vertices(self):
+        num_vertices = len(self.vertices)
+        num_faces = len(self.face_sizes)
+        if num_vertices == 0:
+            return 0
+
+        def face_blocks():
+            for face_ids, v_from, _ in self.iter_corner_blocks():
+                yield v_from, v_from * num_faces + face_ids
+
+        def edge_blocks():
+            for _, v_from, v_to in self.iter_corner_blocks():
+                # 시작 정점이 정해지면 끝 정점으로 엣지가 정해지므로 (시작, 끝) 쌍이 곧 (정점, 엣지) 쌍
+                yield v_from, v_from * num_vertices + v_to
+
+        counts = []
+        for name, blocks, stride in (("vertex_faces", face_blocks(), num_faces),
+                                     ("vertex_edges", edge_blocks(), num_vertices)):
+            count = np.memmap(self._path(name + ".i32"), dtype=np.int32, mode='w+', shape=(num_vertices,))
+            for keys, _ in self._iter_sorted_buckets(name, blocks, num_vertices, len(self.face_flat)):
+                vertices, vertex_counts = np.unique(keys // stride, return_counts=True)
+                count[vertices] += vertex_counts.astype(np.int32)
+            counts.append(count)
+
+        face_count, edge_count = counts
+        num_non_manifold = 0
+        block = self._block(8 * 4)
+        for start in range(0, num_vertices, block):
+            faces = np.asarray(face_count[start:start + block])
+            edges = np.asarray(edge_count[start:start + block])
+            num_non_manifold += int(np.count_nonzero((edges != faces) & (edges != faces + 1)))
+        del counts, face_count, edge_count
+        return num_non_manifold
+
+    # 정점마다 속한 면의 수 (디스크의 int32 배열에 누적)
+    def vertex_degrees(self):
+        num_vertices = len(self.vertices)
+        if num_vertices == 0:
+            return np.zeros(0, dtype=np.int32)
+
+        degrees = np.memmap(self._path("degrees.i32"), dtype=np.int32, mode='w+', shape=(num_vertices,))
+        block = self._block(8 * 4)
+        for start in range(0, len(self.face_flat), block):
+            vertices, counts = np.unique(np.asarray(self.face_flat[start:start + block]), return_counts=True)
+            degrees[vertices] += counts.astype(np.int32)
+        degrees.flush()
+        return degrees
+
+
+# OutOfCoreMesh 로 save_status 의 지표 중 청크 단위나 외부 정렬로 계산할 수 있는 것만 계산
+# (기본 정보, 바운딩 박스, 엣지 길이, 면 넓이, 정점 차수, 종횡비, 오일러 특성, 고립 정점, 경계 엣지,
+#  중복 정점/면, 퇴화된 면, 엣지/정점 매니폴드, 닫힌 메쉬) 분위수는 스케치로 근사하고 info["out of core"] 에 표시
+# closed 는 경계 엣지가 없고 엣지 매니폴드인 메쉬 (in-core 의 Mesh.is_closed 와 같음)
+# OUT_OF_CORE_OMITTED 의 지표는 면 사이의 연결을 따라가거나 이웃 셀을 비교해야 해서 계산하지 않음 (meshstatus.txt 에 목록을 적음)
+# 결과 json/저장소에는 해당 키가 없으므로 statistic_analysis 에서 그 모델은 해당 지표의 비교에서 빠짐
+OUT_OF_CORE_OMITTED = ("num connected components", "num near duplicated vertices",
+                       "num boundary loops", "oriented", "num inconsistent faces",
+                       "num orientable patches", "Edge Dihedral Angle", "max boundary loop length",
+                       "max boundary loop perimeter", "total boundary loop perimeter")
+
+def save_status_out_of_core(obj_path, save_path, save_txt = True, save_data = False,
+                            memory_budget = OUT_OF_CORE_MEMORY_BUDGET, work_dir = None,
+                            store = None, run = DEFAULT_RUN):
+
+    txt_path = os.path.join(save_path, "meshstatus.txt")
+
+    if save_txt:
+        if os.path.exists(txt_path):
+            os.remove(txt_path)
+    else:
+        txt_path = None
+
+    info = {}
+
+    with OutOfCoreMesh(work_dir, memory_budget) as mesh:
+        mesh.load_obj(obj_path)
+        num_vertex = len(mesh.vertices)
+        num_face = len(mesh.face_sizes)
+
+        # 면 단위 지표
+        area_size = StatAccumulator(exact=False)
+        face_aspect = StatAccumulator(exact=False)
+        num_degenerated_faces = 0
+        for block_mesh in mesh.iter_face_meshes():
+            area_size.update(block_mesh.face_areas)
+            face_aspect.update(block_mesh.get_face_aspect_ratios())
+            num_degenerated_faces += int(np.count_nonzero(block_mesh.degenerate_faces))
+
+        # 엣지 단위 지표 (외부 정렬한 엣지 테이블)
+        edge_length = StatAccumulator(exact=False)
+        num_edge = num_boundary_edges = 0
+        edge_manifold = True
+        for keys, face_count in mesh.iter_edge_buckets():
+            lo, hi = np.divmod(keys, num_vertex)
+            edge_length.update(np.linalg.norm(mesh.vertices[lo] - mesh.vertices[hi], axis=1))
+            num_edge += len(keys)
+            num_boundary_edges += int(np.count_nonzero(face_count == 1))
+            edge_manifold &= not bool(np.any(face_count > 2))
+        closed = num_boundary_edges == 0 and edge_manifold
+
+        vertex_manifold = mesh.count_non_manifold_vertices() == 0
+        num_duplicated_vertices, num_duplicated_faces = mesh.count_duplicates()
+
+        # 정점 단위 지표
+        vertex_valance = StatAccumulator(exact=False)
+        degrees = mesh.vertex_degrees()
+        num_isolated_vertices = 0
+        block = mesh._block(8 * 4)
+        for start in range(0, num_vertex, block):
+            degree_block = np.asarray(degrees[start:start + block])
+            vertex_valance.update(degree_block)
+            num_isolated_vertices += int(np.count_nonzero(degree_block == 0))
+        del degrees
+
+        box_min = np.full(3, np.inf)
+        box_max = np.full(3, -np.inf)
+        for vertices in mesh.iter_vertex_blocks():
+            box_min = np.minimum(box_min, vertices.min(axis=0))
+            box_max = np.maximum(box_max, vertices.max(axis=0))
+
+        total_vertices_in_faces = int(mesh.face_sizes.sum(dtype=np.int64))
+
+    average_vertices_per_face = total_vertices_in_faces / num_face if num_face else 0.0
+
+    text = "-- Basic information --\n"
+    text += f"Vertex count: {num_vertex}\n"
+    text += f"Edge count: {num_edge}\n"
+    text += f"Face count: {num_face}\n"
+    text += f"vertex per face: {average_vertices_per_face}\n"
+    info["num_vertex"] = num_vertex
+    info["num_edge"] = num_edge
+    info["num_face"] = num_face
+    info["vertices_per_face"] = average_vertices_per_face
+    if txt_path:
+        append_to_file(txt_path, text)
+
+    box_min, box_max = box_min.tolist(), box_max.tolist()
+    box_size = [round(box_max[0]-box_min[0], 6), round(box_max[1]-box_min[1], 6), round(box_max[2]-box_min[2], 6)]
+    text = "-- Boundding box --\n"
+    text += f"bbox_min: {box_min}\n"
+    text += f"bbox_max: {box_max}\n"
+    text += f"bbox_size: {box_size}\n"
+    if txt_path:
+        append_to_file(txt_path, text)
+
+    # 면이나 엣지가 없는 obj(점 구름 등)는 분포를 만들 수 없으므로 해당 지표를 건너뜀
+    for accumulator, name, with_total in ((edge_length, "Edge Length", False), (area_size, "Area Size", True),
+                                          (vertex_valance, "Vertex Valance", False),
+                                          (face_aspect, "Face Aspect Ratio", False)):
+        if accumulator.count >= 2:
+            quantile_breakdown(accumulator, name, info, txt_path, with_total)
+
+    eluer_charater = num_vertex - num_edge + num_face
+
+    text = "-- Extended info (out of core) --\n"
+    text += f"euler characteristic : {eluer_charater}\n"
+    text += f"num isolated vertices : {num_isolated_vertices}\n"
+    text += f"num duplicated vertices : {num_duplicated_vertices}\n"
+    text += f"num duplicated faces : {num_duplicated_faces}\n"
+    text += f"num boundary edges : {num_boundary_edges}\n"
+    text += f"num degenerated faces : {num_degenerated_faces}\n"
+    text += f"edge manifold : {edge_manifold}\n"
+    text += f"vertex manifold : {vertex_manifold}\n"
+    text += f"closed : {closed}\n"
+    text += "omitted (not computed out of core) : {}\n".format(", ".join(OUT_OF_CORE_OMITTED))
+    info["euler characteristic"] = eluer_charater
+    info["num isolated vertices"] = num_isolated_vertices
+    info["num duplicated vertices"] = num_duplicated_vertices
+    info["num duplicated faces"] = num_duplicated_faces
+    info["num boundary edges"] = num_boundary_edges
+    info["num degenerated faces"] = num_degenerated_faces
+    info["edge manifold"] = edge_manifold
+    info["vertex manifold"] = vertex_manifold
+    info["closed"] = closed
+    info["out of core"] = True
+    if txt_path:
+        append_to_file(txt_path, text)
+
+    file_name, _ = os.path.splitext(os.path.basename(obj_path))
+
+    if store is not None:
+        store.append(file_name, info, run)
+
+    if save_data:
+        with open(os.path.join(save_path, 'data_{}.json'.format(file_name)), 'w') as file:
+            json.dump(info, file)
+
+    return info
 
     
 
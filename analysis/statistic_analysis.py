@@ -1,15 +1,27 @@
-import tkinter as tk
-from tkinter import filedialog
 import os
+import csv
 import json
 import math
+import argparse
+import numpy as np
+from meshstat import StatsStore, STATS_STORE_NAME, DEFAULT_RUN
+
+# save_status / export_json 이 쓰는 모델별 결과 파일 (data_<이름>.json)
+# 이 스크립트가 쓰는 summary.json 등 다른 json 은 모델로 읽지 않음
+def is_model_json(filename):
+    return filename.startswith('data_') and filename.endswith('.json')
+
+# make_data.py 가 만든 저장소(stats.sqlite)가 있으면 거기서 한 번에 읽고, 없으면 모델별 json 을 읽음
+def load_json_files(folder_path, run=DEFAULT_RUN):
+    if os.path.exists(os.path.join(folder_path, STATS_STORE_NAME)):
+        models, columns = StatsStore.in_folder(folder_path).read_columns(run=run)
+        return [{key: column[i].item() for key, column in columns.items()} for i in range(len(models))]
 
-def load_json_files(folder_path):
     all_data = []
 
     # List all files in the directory
     for filename in os.listdir(folder_path):
-        if filename.endswith('.json'):
+        if is_model_json(filename):
             file_path = os.path.join(folder_path, filename)
             with open(file_path, 'r') as file:
                 data = json.load(file)
@@ -17,45 +29,182 @@ def load_json_files(folder_path):
 
     return all_data
 
-def print_statistic(total_list, num_of_data):
-
-    print("데이터 수 : {}".format(num_of_data))
-    print("평균 정점 감소율 : {:.2f} %".format(total_list[0] / num_of_data))
-    print("평균 면 감소율 : {:.2f} %".format(total_list[1] / num_of_data))
-    print("평균 Edge length cv 감소율 : {:.2f} %".format(total_list[2] / num_of_data))
-    print("평균 Area Size cv 감소율 : {:.2f} %".format(total_list[3] / num_of_data))
-    print("평균 Face Aspect Ratio average 감소율 : {:.2f} %".format(total_list[4] / num_of_data))
-    print("평균 num connected components 감소율 : {:.2f} %".format(total_list[6] / num_of_data))
-    print("isolated vertices 갯수")
-    print("     개선 전 : {}".format(total_list[7]))
-    print("     개선 후 : {}".format(total_list[8]))      
-    print("duplicated vertices 갯수")
-    print("     개선 전 : {}".format(total_list[9]))
-    print("     개선 후 : {}".format(total_list[10]))
-    print("duplicated faces 갯수")
-    print("     개선 전 : {}".format(total_list[11]))
-    print("     개선 후 : {}".format(total_list[12]))
-    print("boundary edges 갯수")
-    print("     개선 전 : {}".format(total_list[13]))
-    print("     개선 후 : {}".format(total_list[14]))
-    print("boundary loops 갯수")
-    print("     개선 전 : {}".format(total_list[15]))
-    print("     개선 후 : {}".format(total_list[16]))
-    print("degenerated faces 갯수")
-    print("     개선 전 : {}".format(total_list[17]))
-    print("     개선 후 : {}".format(total_list[18]))
-    print("edge manifold 불만족 갯수")
-    print("     개선 전 : {}".format(total_list[19]))
-    print("     개선 후 : {}".format(total_list[20]))
-    print("vertex manifold 불만족 갯수")
-    print("     개선 전 : {}".format(total_list[21]))
-    print("     개선 후 : {}".format(total_list[22]))
-    print("oriented 불만족 갯수")
-    print("     개선 전 : {}".format(total_list[23]))
-    print("     개선 후 : {}".format(total_list[24]))
+# 폴더의 결과를 (모델 이름 배열, {지표 키: 배열})로 읽음
+# 저장소가 있으면 열 단위로, 없으면 data_<이름>.json 파일만 읽고 파일 이름에서 모델 이름을 얻음
+def load_columns(folder_path, run=DEFAULT_RUN):
+    if os.path.exists(os.path.join(folder_path, STATS_STORE_NAME)):
+        models, columns = StatsStore.in_folder(folder_path).read_columns(run=run)
+        return np.array(models, dtype=object), columns
+
+    models = []
+    records = []
+    for filename in sorted(os.listdir(folder_path)):
+        if is_model_json(filename):
+            models.append(os.path.splitext(filename)[0][len('data_'):])
+            with open(os.path.join(folder_path, filename), 'r') as file:
+                records.append(json.load(file))
+
+    # _timings 처럼 "_" 로 시작하는 부가 정보는 제외
+    keys = sorted(key for key in set().union(*records) if not key.startswith('_')) if records else []
+    columns = {key: np.array([record.get(key, np.nan) for record in records], dtype=np.float64) for key in keys}
+    return np.array(models, dtype=object), columns
+
+# 두 폴더를 모델 이름으로 맞춤
+# (공통 모델 이름, 개선 전 인덱스, 개선 후 인덱스, 개선 전에만 있는 모델, 개선 후에만 있는 모델)
+def match_models(before_models, after_models):
+    before_names = before_models.astype(str)
+    after_names = after_models.astype(str)
+    if len(np.unique(before_names)) != len(before_names) or len(np.unique(after_names)) != len(after_names):
+        raise ValueError("Model names must be unique in each folder")
+
+    names, before_index, after_index = np.intersect1d(before_names, after_names, return_indices=True)
+    only_before = np.setdiff1d(before_names, after_names)
+    only_after = np.setdiff1d(after_names, before_names)
+    return names, before_index, after_index, only_before, only_after
+
+def _column(columns, key, index):
+    if key not in columns:
+        return np.full(len(index), np.nan)
+    return np.asarray(columns[key], dtype=np.float64)[index]
+
+def _cv(columns, name, index):
+    return np.sqrt(_column(columns, 'var_' + name, index)) / _column(columns, 'ave_' + name, index)
+
+# 감소율(%) 지표: (이름, 표시 이름, 모델별 값을 꺼내는 함수)
+REDUCTION_METRICS = [
+    ("vertex", "정점 감소율",
+     lambda c, i: _column(c, 'num_vertex', i)),
+    ("face", "면 감소율",
+     lambda c, i: _column(c, 'num_face', i)),
+    ("edge_length_cv", "Edge length cv 감소율",
+     lambda c, i: _cv(c, 'Edge Length', i)),
+    ("area_size_cv", "Area Size cv 감소율",
+     lambda c, i: _cv(c, 'Area Size', i)),
+    ("face_aspect_ratio_ave", "Face Aspect Ratio average 감소율",
+     lambda c, i: _column(c, 'ave_Face Aspect Ratio', i)),
+    ("dihedral_angle_cv", "Edge Dihedral Angle cv 감소율",
+     lambda c, i: _cv(c, 'Edge Dihedral Angle', i)),
+    ("connected_components", "num connected components 감소율",
+     lambda c, i: _column(c, 'num connected components', i)),
+]
+
+# 문제가 있는 모델 수를 세는 지표: (키, 표시 이름, 문제 조건)
+FAILURE_FLAGS = [
+    ('num isolated vertices', "isolated vertices", lambda x: x > 0),
+    ('num duplicated vertices', "duplicated vertices", lambda x: x > 0),
+    ('num duplicated faces', "duplicated faces", lambda x: x > 0),
+    ('num boundary edges', "boundary edges", lambda x: x > 0),
+    ('num boundary loops', "boundary loops", lambda x: x > 0),
+    ('num degenerated faces', "degenerated faces", lambda x: x > 0),
+    ('edge manifold', "edge manifold 불만족", lambda x: x == 0),
+    ('vertex manifold', "vertex manifold 불만족", lambda x: x == 0),
+    ('oriented', "oriented 불만족", lambda x: x == 0),
+]
+
+# 매칭된 모델 전체에 대해 감소율과 문제 모델 수를 배열 연산으로 계산
+# 반환: (요약 행 리스트, {모델별 열 이름: 배열})
+def compare_columns(before_columns, after_columns, before_index, after_index):
+    summary = []
+    deltas = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for key, label, values in REDUCTION_METRICS:
+            before = values(before_columns, before_index)
+            after = values(after_columns, after_index)
+            reduction = (before - after) / before * 100
+
+            # 값이 없거나 0으로 나눈 모델은 평균에서 제외
+            valid = np.isfinite(reduction)
+            deltas["before_" + key] = before
+            deltas["after_" + key] = after
+            deltas["reduction_" + key] = reduction
+            summary.append({
+                "metric": key,
+                "label": label,
+                "mean_reduction": float(np.mean(reduction[valid])) if valid.any() else float('nan'),
+                "num_models": int(np.count_nonzero(valid))
+            })
+
+    for key, label, is_failure in FAILURE_FLAGS:
+        before = _column(before_columns, key, before_index)
+        after = _column(after_columns, key, after_index)
+        summary.append({
+            "metric": key,
+            "label": label,
+            "before_count": int(np.count_nonzero(is_failure(before))),
+            "after_count": int(np.count_nonzero(is_failure(after))),
+            "num_models": int(np.count_nonzero(~np.isnan(before) & ~np.isnan(after)))
+        })
+
+    return summary, deltas
+
+def analyze(before_folder_path, after_folder_path, run=DEFAULT_RUN):
+    before_models, before_columns = load_columns(before_folder_path, run)
+    after_models, after_columns = load_columns(after_folder_path, run)
+
+    names, before_index, after_index, only_before, only_after = match_models(before_models, after_models)
+    summary, deltas = compare_columns(before_columns, after_columns, before_index, after_index)
+
+    return {
+        "models": names,
+        "summary": summary,
+        "deltas": deltas,
+        "only_before": only_before,
+        "only_after": only_after
+    }
+
+def print_statistic(result):
+
+    summary = result["summary"]
+
+    print("데이터 수 : {}".format(len(result["models"])))
+    for row in summary:
+        if "mean_reduction" in row:
+            print("평균 {} : {:.2f} %".format(row["label"], row["mean_reduction"]))
+    for row in summary:
+        if "before_count" in row:
+            print("{} 갯수".format(row["label"]))
+            print("     개선 전 : {}".format(row["before_count"]))
+            print("     개선 후 : {}".format(row["after_count"]))
+
+    # 한쪽 폴더에만 있는 모델은 비교에서 빠짐
+    if len(result["only_before"]) or len(result["only_after"]):
+        print("매칭되지 않은 모델")
+        print("     개선 전에만 있음 ({}) : {}".format(len(result["only_before"]), ", ".join(result["only_before"])))
+        print("     개선 후에만 있음 ({}) : {}".format(len(result["only_after"]), ", ".join(result["only_after"])))
     print()
 
-if __name__ == "__main__":
+# summary.csv, summary.json, model_deltas.csv 저장
+def save_result(result, output_path):
+    os.makedirs(output_path, exist_ok=True)
+
+    summary = result["summary"]
+    fields = ["metric", "label", "mean_reduction", "before_count", "after_count", "num_models"]
+    with open(os.path.join(output_path, "summary.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(summary)
+
+    with open(os.path.join(output_path, "summary.json"), 'w', encoding='utf-8') as file:
+        json.dump({
+            "num_models": len(result["models"]),
+            "summary": summary,
+            "only_before": result["only_before"].tolist(),
+            "only_after": result["only_after"].tolist()
+        }, file, ensure_ascii=False, indent=2)
+
+    deltas = result["deltas"]
+    with open(os.path.join(output_path, "model_deltas.csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(["model"] + list(deltas))
+        table = np.column_stack([deltas[key] for key in deltas]) if deltas else np.zeros((len(result["models"]), 0))
+        for name, row in zip(result["models"], table):
+            writer.writerow([name] + ["" if math.isnan(value) else repr(float(value)) for value in row])
+
+def choose_folders():
+    import tkinter as tk
+    from tkinter import filedialog
+
     # Create a root window and hide it
     root = tk.Tk()
     root.withdraw()
@@ -63,99 +212,26 @@ if __name__ == "__main__":
     # Open the dialog to choose a folder
     before_folder_path = filedialog.askdirectory()
     after_folder_path = filedialog.askdirectory()
+    return before_folder_path, after_folder_path
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="개선 전/후 meshstat 결과를 모델 이름으로 맞춰 비교")
+    parser.add_argument("before", nargs="?", help="개선 전 결과 폴더 (생략하면 폴더 선택 창을 띄움)")
+    parser.add_argument("after", nargs="?", help="개선 후 결과 폴더")
+    parser.add_argument("--output", help="summary.csv, summary.json, model_deltas.csv 를 저장할 폴더")
+    parser.add_argument("--run", default=DEFAULT_RUN, help="저장소에서 읽을 실행 이름")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.before and args.after:
+        before_folder_path, after_folder_path = args.before, args.after
+    else:
+        before_folder_path, after_folder_path = choose_folders()
+
+    result = analyze(before_folder_path, after_folder_path, args.run)
+    print_statistic(result)
 
-    # Load all JSON files from the selected files
-    before_data_list = load_json_files(before_folder_path)
-    after_data_list = load_json_files(after_folder_path)
-
-    num_of_data = len(after_data_list)
-
-    total_list = [0] * 25
-    before_count_cc = [float('inf'), 0, 0] 
-
-    for i in range(0,num_of_data):
-        
-        before_num_v = before_data_list[i]['num_vertex']
-        after_num_v = after_data_list[i]['num_vertex']
-        changed_num_v = ( before_num_v - after_num_v ) / before_num_v
-        total_list[0] += changed_num_v * 100
-
-        before_num_f = before_data_list[i]['num_face']
-        after_num_f = after_data_list[i]['num_face']
-        changed_num_f = ( before_num_f - after_num_f ) / before_num_v
-        total_list[1] += changed_num_f * 100
-
-        before_cv_edge_length = math.sqrt(before_data_list[i]['var_Edge Length']) / before_data_list[i]['ave_Edge Length']
-        after_cv_edge_length = math.sqrt(after_data_list[i]['var_Edge Length']) / after_data_list[i]['ave_Edge Length']
-        changed_cv_edge_length = ( before_cv_edge_length - after_cv_edge_length ) / before_cv_edge_length
-        total_list[2] += changed_cv_edge_length * 100
-
-        before_cv_area_size = math.sqrt(before_data_list[i]['var_Area Size']) / before_data_list[i]['ave_Area Size']
-        after_cv_area_size = math.sqrt(after_data_list[i]['var_Area Size']) / after_data_list[i]['ave_Area Size']
-        changed_cv_area_size = ( before_cv_area_size - after_cv_area_size ) / before_cv_area_size
-        total_list[3] += changed_cv_area_size * 100
-    
-        before_cv_aspect_ratio = before_data_list[i]['ave_Face Aspect Ratio']
-        after_cv_aspect_ratio = after_data_list[i]['ave_Face Aspect Ratio']
-        changed_cv_aspect_ratio = ( before_cv_aspect_ratio - after_cv_aspect_ratio ) / before_cv_aspect_ratio
-        total_list[4] += changed_cv_aspect_ratio * 100
-
-        before_cv_dihedral_angle = math.sqrt(before_data_list[i]['var_Edge Dihedral Angle']) / before_data_list[i]['ave_Edge Dihedral Angle']
-        after_cv_dihedral_angle = math.sqrt(after_data_list[i]['var_Edge Dihedral Angle']) / after_data_list[i]['ave_Edge Dihedral Angle']
-        changed_cv_dihedral_angle = ( before_cv_dihedral_angle - after_cv_dihedral_angle ) / before_cv_dihedral_angle
-        total_list[5] += changed_cv_dihedral_angle * 100
-
-        before_num_cc = before_data_list[i]['num connected components']
-        after_num_cc = after_data_list[i]['num connected components']
-        changed_num_cc = ( before_num_cc - after_num_cc ) / before_num_cc
-        total_list[6] += changed_num_cc * 100
-        before_count_cc[0] = min(before_count_cc[0], before_num_cc)
-        before_count_cc[1] = max(before_count_cc[1], before_num_cc)
-        before_count_cc[2] += before_num_cc
-
-        if before_data_list[i]['num isolated vertices'] > 0 :
-            total_list[7] += 1
-        if after_data_list[i]['num isolated vertices'] > 0 :
-            total_list[8] += 1
-
-        if before_data_list[i]['num duplicated vertices'] > 0 :
-            total_list[9] += 1
-        if after_data_list[i]['num duplicated vertices'] > 0 :
-            total_list[10] += 1
-
-        if before_data_list[i]['num duplicated faces'] > 0 :
-            total_list[11] += 1
-        if after_data_list[i]['num duplicated faces'] > 0 :
-            total_list[12] += 1
-   
-        if before_data_list[i]['num boundary edges'] > 0 :
-            total_list[13] += 1
-        if after_data_list[i]['num boundary edges'] > 0 :
-            total_list[14] += 1
-
-        if before_data_list[i]['num boundary loops'] > 0 :
-            total_list[15] += 1
-        if after_data_list[i]['num boundary loops'] > 0 :
-            total_list[16] += 1
-
-        if before_data_list[i]['num degenerated faces'] > 0 :
-            total_list[17] += 1
-        if after_data_list[i]['num degenerated faces'] > 0 :
-            total_list[18] += 1     
-
-        if before_data_list[i]['edge manifold'] == False :
-            total_list[19] += 1
-        if after_data_list[i]['edge manifold'] == False :
-            total_list[20] += 1        
-
-        if before_data_list[i]['vertex manifold'] == False :
-            total_list[21] += 1
-        if after_data_list[i]['vertex manifold'] == False :
-            total_list[22] += 1  
-
-        if before_data_list[i]['oriented'] == False :
-            total_list[23] += 1
-        if after_data_list[i]['oriented'] == False :
-            total_list[24] += 1
-
-    print_statistic(total_list, num_of_data)   
\ No newline at end of file
+    if args.output:
+        save_result(result, args.output)
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+refine_directory = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if refine_directory not in sys.path:
+    sys.path.append(refine_directory)
+
+from meshstat import parse_obj, parse_obj_lines
+
+
+# 격자 형태의 OBJ 파일 생성 (v/vt/vn 토큰, 삼각형과 사각형을 섞어서 사용)
+def write_grid_obj(path, size):
+    rng = np.random.default_rng(0)
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size))
+    vertices = np.stack([xs.ravel(), ys.ravel(), rng.random(size * size)], axis=1)
+
+    with open(path, 'w') as file:
+        file.write("# benchmark grid\nmtllib grid.mtl\no grid\n")
+        np.savetxt(file, vertices, fmt="v %.6f %.6f %.6f")
+        np.savetxt(file, vertices[:, :2] / size, fmt="vt %.6f %.6f")
+        file.write("vn 0 0 1\nusemtl Material\ns 1\n")
+
+        for j in range(size - 1):
+            a = j * size + np.arange(size - 1) + 1
+            b, c, d = a + 1, a + size + 1, a + size
+            quads = np.stack([a, b, c, d], axis=1)
+            for row, quad in enumerate(quads.tolist()):
+                if row % 2:
+                    file.write("f {0}/{0}/1 {1}/{1}/1 {2}/{2}/1 {3}/{3}/1\n".format(*quad))
+                else:
+                    file.write("f {0}/{0}/1 {1}/{1}/1 {2}/{2}/1\n".format(*quad[:3]))
+                    file.write("f {0}/{0}/1 {2}/{2}/1 {3}/{3}/1\n".format(*quad))
+
+
+def count_lines(path):
+    with open(path, 'rb') as file:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: file.read(1 << 24), b''))
+
+
+def time_parser(parser, path, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parser(path)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="OBJ 파서 속도 비교 (한 줄씩 파싱 vs 청크 단위 파싱)")
+    parser.add_argument("obj_path", nargs="?", help="측정할 obj 파일 (없으면 격자 모델 생성)")
+    parser.add_argument("--grid", type=int, default=500, help="생성할 격자 모델의 한 변 정점 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (가장 빠른 값 사용)")
+    args = parser.parse_args()
+
+    temp_directory = None
+    obj_path = args.obj_path
+    if obj_path is None:
+        temp_directory = tempfile.TemporaryDirectory()
+        obj_path = os.path.join(temp_directory.name, "grid.obj")
+        write_grid_obj(obj_path, args.grid)
+
+    num_lines = count_lines(obj_path)
+    line_time, (line_vertices, line_faces) = time_parser(parse_obj_lines, obj_path, args.repeat)
+    fast_time, (fast_vertices, fast_faces) = time_parser(parse_obj, obj_path, args.repeat)
+
+    same = np.array_equal(line_vertices, fast_vertices) and np.array_equal(line_faces, fast_faces)
+
+    print("-- OBJ parser benchmark --")
+    print("file: {}".format(obj_path))
+    print("lines: {}  vertices: {}  faces: {}".format(num_lines, len(fast_vertices), len(fast_faces)))
+    print("line parser : {:8.3f} s  {:>12,.0f} lines/s".format(line_time, num_lines / line_time))
+    print("chunk parser: {:8.3f} s  {:>12,.0f} lines/s".format(fast_time, num_lines / fast_time))
+    print("speedup     : {:8.2f} x".format(line_time / fast_time))
+    print("same result : {}".format(same))
+
+    if temp_directory is not None:
+        temp_directory.cleanup()
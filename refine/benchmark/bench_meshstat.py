@@ -0,0 +1,375 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import importlib.util
+import numpy as np
+
+refine_directory = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+if refine_directory not in sys.path:
+    sys.path.append(refine_directory)
+
+
+# 합성 메쉬 생성 (모두 (vertices (V,3) float64, faces (F,3) int64) 반환, 면 번호는 0부터)
+
+# 정이십면체를 level 번 나눈 구 (면 수 20 * 4^level)
+def make_icosphere(level):
+    t = (1 + math.sqrt(5)) / 2
+    vertices = np.array([(-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0),
+                         (0, -1, t), (0, 1, t), (0, -1, -t), (0, 1, -t),
+                         (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)], dtype=np.float64)
+    faces = np.array([(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+                      (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+                      (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+                      (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)], dtype=np.int64)
+
+    for _ in range(level):
+        # 모든 엣지의 중점을 한 번씩만 만듦
+        corners = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+        edges, edge_ids = np.unique(np.sort(corners, axis=1), axis=0, return_inverse=True)
+        edge_ids = edge_ids.reshape(3, -1)
+        midpoints = (vertices[edges[:, 0]] + vertices[edges[:, 1]]) / 2
+
+        a, b, c = faces[:, 0], faces[:, 1], faces[:, 2]
+        ab, bc, ca = edge_ids + len(vertices)
+        vertices = np.concatenate([vertices, midpoints])
+        faces = np.concatenate([np.stack([a, ab, ca], axis=1), np.stack([b, bc, ab], axis=1),
+                                np.stack([c, ca, bc], axis=1), np.stack([ab, bc, ca], axis=1)])
+
+    vertices /= np.linalg.norm(vertices, axis=1, keepdims=True)
+    return vertices, faces
+
+
+# size x size 정점 격자를 삼각형으로 나눈 평면 (면 수 2 * (size-1)^2)
+def make_grid(size, seed=0):
+    rng = np.random.default_rng(seed)
+    xs, ys = np.meshgrid(np.arange(size, dtype=np.float64), np.arange(size, dtype=np.float64))
+    vertices = np.stack([xs.ravel(), ys.ravel(), rng.random(size * size) * 0.1], axis=1)
+
+    rows, cols = np.meshgrid(np.arange(size - 1), np.arange(size - 1), indexing='ij')
+    a = (rows * size + cols).ravel()
+    b, c, d = a + 1, a + size + 1, a + size
+    faces = np.concatenate([np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)])
+    return vertices, faces
+
+
+# 원형 구멍이 여러 개 뚫린 격자 (경계 루프가 많음)
+def make_grid_with_holes(size, num_holes=None, seed=0):
+    rng = np.random.default_rng(seed)
+    vertices, faces = make_grid(size, seed)
+    num_holes = num_holes or max(1, size // 20)
+
+    centers = rng.random((num_holes, 2)) * (size - 1)
+    radius = max(1.0, size / (4 * math.sqrt(num_holes)))
+    centroids = vertices[faces].mean(axis=1)[:, :2]
+
+    inside = np.zeros(len(faces), dtype=bool)
+    for center in centers:
+        inside |= np.sum((centroids - center) ** 2, axis=1) < radius * radius
+    return vertices, faces[~inside]
+
+
+# 정점 일부를 같은 위치(또는 아주 가까운 위치)에 복제하고 면의 절반이 복제본을 가리키게 한 격자
+def make_duplicated_vertices(size, fraction=0.1, jitter=1e-8, seed=0):
+    rng = np.random.default_rng(seed)
+    vertices, faces = make_grid(size, seed)
+
+    duplicated = rng.choice(len(vertices), int(len(vertices) * fraction), replace=False)
+    copies = vertices[duplicated].copy()
+    # 절반은 정확히 같은 위치, 절반은 jitter 만큼 떨어진 위치
+    copies[len(copies) // 2:] += rng.normal(scale=jitter, size=(len(copies) - len(copies) // 2, 3))
+
+    remap = np.arange(len(vertices))
+    remap[duplicated] = len(vertices) + np.arange(len(duplicated))
+    use_copy = rng.random(len(faces)) < 0.5
+    faces = np.where(use_copy[:, None], remap[faces], faces)
+    return np.concatenate([vertices, copies]), faces
+
+
+# 격자의 일부 엣지에 지느러미 면을 여러 장 붙이고, 일부 정점에 나비 모양 부채를 붙인 비매니폴드 메쉬
+def make_nonmanifold_fans(size, fraction=0.05, fan_faces=3, seed=0):
+    rng = np.random.default_rng(seed)
+    vertices, faces = make_grid(size, seed)
+
+    # 엣지 하나에 면이 3장 이상 (엣지 비매니폴드)
+    fin_faces = faces[rng.choice(len(faces), max(1, int(len(faces) * fraction)), replace=False)]
+    fin_edges = np.repeat(fin_faces[:, :2], fan_faces, axis=0)
+    apexes = (vertices[fin_edges[:, 0]] + vertices[fin_edges[:, 1]]) / 2
+    apexes[:, 2] += np.tile(np.arange(1, fan_faces + 1), len(fin_faces))
+    apex_ids = len(vertices) + np.arange(len(apexes))
+    vertices = np.concatenate([vertices, apexes])
+    fins = np.stack([fin_edges[:, 0], fin_edges[:, 1], apex_ids], axis=1)
+
+    # 정점 하나에 떨어진 부채 두 개 (정점 비매니폴드)
+    hubs = rng.choice(size * size, max(1, int(size * size * fraction / 4)), replace=False)
+    fan_vertices = vertices[hubs][:, None, :] + np.array([(0.3, 0.3, 1), (-0.3, 0.3, 1),
+                                                            (0.3, -0.3, -1), (-0.3, -0.3, -1)])
+    fan_ids = len(vertices) + np.arange(len(hubs) * 4).reshape(-1, 4)
+    vertices = np.concatenate([vertices, fan_vertices.reshape(-1, 3)])
+    bowties = np.concatenate([np.stack([hubs, fan_ids[:, 0], fan_ids[:, 1]], axis=1),
+                              np.stack([hubs, fan_ids[:, 2], fan_ids[:, 3]], axis=1)])
+
+    return vertices, np.concatenate([faces, fins, bowties])
+
+
+# 작은 정팔면체 여러 개 (연결 요소가 많음, 요소 하나에 면 8개)
+def make_many_components(count):
+    base_vertices = np.array([(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)],
+                             dtype=np.float64) * 0.4
+    base_faces = np.array([(0, 2, 4), (2, 1, 4), (1, 3, 4), (3, 0, 4),
+                           (2, 0, 5), (1, 2, 5), (3, 1, 5), (0, 3, 5)], dtype=np.int64)
+
+    side = int(math.ceil(count ** (1 / 3)))
+    offsets = np.stack(np.unravel_index(np.arange(count), (side, side, side)), axis=1).astype(np.float64)
+    vertices = (offsets[:, None, :] + base_vertices).reshape(-1, 3)
+    faces = (np.arange(count)[:, None, None] * len(base_vertices) + base_faces).reshape(-1, 3)
+    return vertices, faces
+
+
+# 목표 면 수에 가깝게 각 종류의 메쉬를 만듦
+def _grid_size(num_faces):
+    return max(3, int(round(math.sqrt(num_faces / 2))) + 1)
+
+CASES = {
+    "icosphere": lambda num_faces: make_icosphere(max(0, int(round(math.log(max(num_faces, 20) / 20, 4))))),
+    "grid_holes": lambda num_faces: make_grid_with_holes(_grid_size(num_faces * 1.1)),
+    "duplicated": lambda num_faces: make_duplicated_vertices(_grid_size(num_faces)),
+    "nonmanifold": lambda num_faces: make_nonmanifold_fans(_grid_size(num_faces / 1.2)),
+    "components": lambda num_faces: make_many_components(max(1, num_faces // 8)),
+}
+
+
+def write_obj(path, vertices, faces):
+    with open(path, 'w') as file:
+        file.write("# meshstat benchmark\n")
+        np.savetxt(file, vertices, fmt="v %.9g %.9g %.9g")
+        np.savetxt(file, faces + 1, fmt="f %d %d %d")
+
+
+# 측정할 Mesh 메서드 (이름, 호출 함수), 메서드마다 새 Mesh 를 만들어 캐시된 중간 결과를 공유하지 않음
+METHODS = [
+    ("edges", lambda mesh: mesh.edges),
+    ("get_edge_lengths", lambda mesh: mesh.get_edge_lengths()),
+    ("get_face_areas", lambda mesh: mesh.get_face_areas()),
+    ("calculate_vertex_degrees", lambda mesh: mesh.calculate_vertex_degrees()),
+    ("get_face_aspect_ratios", lambda mesh: mesh.get_face_aspect_ratios()),
+    ("get_face_normals", lambda mesh: mesh.get_face_normals()),
+    ("get_edge_dihedral_angles", lambda mesh: mesh.get_edge_dihedral_angles()),
+    ("calculate_bounding_box", lambda mesh: mesh.calculate_bounding_box()),
+    ("count_connected_components", lambda mesh: mesh.count_connected_components()),
+    ("count_isolated_vertices", lambda mesh: mesh.count_isolated_vertices()),
+    ("count_duplicated_vertices", lambda mesh: mesh.count_duplicated_vertices()),
+    ("count_near_duplicated_vertices", lambda mesh: mesh.count_duplicated_vertices(1e-6)),
+    ("count_duplicated_faces", lambda mesh: mesh.count_duplicated_faces()),
+    ("count_boundary_edges", lambda mesh: mesh.count_boundary_edges()),
+    ("count_boundary_loops", lambda mesh: mesh.count_boundary_loops()),
+    ("count_degenerated_faces", lambda mesh: mesh.count_degenerated_faces()),
+    ("is_edge_manifold", lambda mesh: mesh.is_edge_manifold()),
+    ("is_vertex_manifold", lambda mesh: mesh.is_vertex_manifold()),
+    ("is_oriented", lambda mesh: mesh.is_oriented()),
+]
+
+
+# 파일 경로로 meshstat 구현을 불러옴 (두 구현을 같은 조건에서 비교하기 위함)
+def load_implementation(label, path):
+    spec = importlib.util.spec_from_file_location("meshstat_bench_{}".format(label), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _make_mesh(module, vertices, faces):
+    try:
+        return module.Mesh(vertices, faces)
+    except TypeError:
+        # 배열 생성자가 없는 예전 구현은 add_vertex/add_face 로 채움 (엣지 집합도 여기서 만들어짐)
+        mesh = module.Mesh()
+        for vertex in vertices.tolist():
+            mesh.add_vertex(tuple(vertex))
+        for face in faces.tolist():
+            mesh.add_face(face)
+        return mesh
+
+
+# 프로세스 전체의 최대 상주 메모리 (MB), 알 수 없으면 None
+def max_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None  # resource 가 없는 윈도우
+    # 리눅스에서 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# 한 번 실행의 (wall 초, 최대 할당 바이트)
+# setup 이 있으면 측정 전에 setup() 을 호출하고 그 결과로 func(...) 를 측정 (메쉬 생성은 측정에서 제외)
+def _measure(func, memory, setup=None):
+    args = () if setup is None else (setup(),)
+    if memory:
+        import tracemalloc
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func(*args)
+        wall = time.perf_counter() - start
+    finally:
+        peak = tracemalloc.get_traced_memory()[1] if memory else 0
+        if memory:
+            tracemalloc.stop()
+    return wall, peak
+
+
+def _best_of(func, repeat, memory, setup=None):
+    results = [_measure(func, memory, setup) for _ in range(repeat)]
+    return min(wall for wall, _ in results), max(peak for _, peak in results)
+
+
+def run_case(module, case, vertices, faces, obj_path, args):
+    results = {}
+    methods = [(name, func) for name, func in METHODS if not args.methods or name in args.methods]
+
+    def record(name, func, setup=None):
+        try:
+            wall, peak = _best_of(func, args.repeat, args.memory, setup)
+            results[name] = {"wall": wall, "peak_bytes": peak}
+        except Exception as error:
+            # 구현에 없는 메서드이거나 이 메쉬에서 실패한 경우 (예전 구현은 비매니폴드에서 예외)
+            results[name] = {"error": "{}: {}".format(type(error).__name__, error)}
+
+    if not args.methods or "load_obj" in args.methods:
+        record("load_obj", lambda: module.Mesh().load_obj(obj_path))
+
+    # 메서드마다 새 Mesh 를 만들되 생성 시간은 construct 로 따로 기록
+    # (예전 구현은 add_vertex/add_face 로 만들어서 생성이 메서드보다 훨씬 오래 걸림)
+    make_mesh = lambda: _make_mesh(module, vertices, faces)
+    if methods:
+        record("construct", make_mesh)
+    for name, func in methods:
+        record(name, func, make_mesh)
+
+    if not args.methods or "save_status" in args.methods:
+        with tempfile.TemporaryDirectory() as save_path:
+            record("save_status", lambda: module.save_status(obj_path, save_path, False, False))
+
+    return results
+
+
+# log(시간) ~ log(면 수) 기울기 (1 이면 선형, 2 이면 제곱)
+def scaling_exponent(face_counts, walls):
+    points = [(math.log(f), math.log(w)) for f, w in zip(face_counts, walls) if w and w > 0 and f > 0]
+    if len(points) < 2:
+        return float('nan')
+    x, y = np.array(points).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def print_results(results):
+    for label, cases in results["implementations"].items():
+        for case, runs in cases.items():
+            face_counts = [run["num_faces"] for run in runs]
+            print("\n-- {} / {} --".format(label, case))
+            print("{:<32}".format("faces") + "".join("{:>12,}".format(count) for count in face_counts) + "{:>8}".format("slope"))
+
+            names = list(runs[0]["methods"])
+            for name in names:
+                walls = [run["methods"].get(name, {}).get("wall") for run in runs]
+                cells = "".join("{:>12}".format("-" if wall is None else "{:.2f}ms".format(wall * 1000)) for wall in walls)
+                print("{:<32}{}{:>8.2f}".format(name, cells, scaling_exponent(face_counts, walls)))
+
+            if results["memory"]:
+                peaks = [max(m.get("peak_bytes", 0) for m in run["methods"].values()) for run in runs]
+                print("{:<32}".format("max peak MB") + "".join("{:>12.1f}".format(peak / (1 << 20)) for peak in peaks))
+
+
+# 두 결과 파일(또는 한 파일의 두 구현)을 비교해서 (기준 시간 / 비교 시간) 배율 출력
+def compare_results(base, other, base_label=None, other_label=None):
+    base_cases = base["implementations"][base_label or next(iter(base["implementations"]))]
+    other_cases = other["implementations"][other_label or next(iter(other["implementations"]))]
+
+    print("\n-- speedup (base / other, >1 이면 other 가 빠름) --")
+    for case in base_cases:
+        if case not in other_cases:
+            continue
+        for base_run, other_run in zip(base_cases[case], other_cases[case]):
+            print("{} {:,} faces".format(case, base_run["num_faces"]))
+            for name, base_method in base_run["methods"].items():
+                other_method = other_run["methods"].get(name, {})
+                if "wall" in base_method and "wall" in other_method and other_method["wall"] > 0:
+                    print("    {:<32}{:>10.2f}x".format(name, base_method["wall"] / other_method["wall"]))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="합성 메쉬로 meshstat 의 Mesh 메서드와 save_status 속도/메모리 측정")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000,5000000",
+                        help="목표 면 수 목록 (쉼표 구분, 예: 1000,100000)")
+    parser.add_argument("--cases", default=",".join(CASES), help="측정할 메쉬 종류 ({})".format(", ".join(CASES)))
+    parser.add_argument("--methods", default="",
+                        help="측정할 메서드만 (쉼표 구분, load_obj 와 save_status 포함, 기본: 모두)")
+    parser.add_argument("--impl", action="append", default=[],
+                        help="비교할 구현 label=meshstat.py 경로 (여러 번 사용 가능, 기본: 현재 meshstat.py)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (가장 빠른 값 사용)")
+    parser.add_argument("--memory", action="store_true", help="tracemalloc 으로 최대 할당량도 측정 (느려짐)")
+    parser.add_argument("--output", help="결과를 저장할 json 경로")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE_JSON", "OTHER_JSON"),
+                        help="측정하지 않고 저장된 두 결과 비교")
+    args = parser.parse_args()
+
+    args.sizes = [int(float(size)) for size in args.sizes.split(",") if size]
+    args.cases = [case for case in args.cases.split(",") if case]
+    args.methods = [method for method in args.methods.split(",") if method]
+    return args
+
+
+if __name__ == "__main__":
+
+    args = parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as file:
+            base = json.load(file)
+        with open(args.compare[1]) as file:
+            other = json.load(file)
+        compare_results(base, other)
+        sys.exit(0)
+
+    implementations = {}
+    for spec in args.impl or ["current=" + os.path.join(refine_directory, "meshstat.py")]:
+        label, _, path = spec.rpartition("=")
+        implementations[label or os.path.splitext(os.path.basename(path))[0]] = load_implementation(label or "impl", path)
+
+    results = {"sizes": args.sizes, "memory": args.memory, "implementations": {label: {} for label in implementations}}
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        for case in args.cases:
+            for size in args.sizes:
+                vertices, faces = CASES[case](size)
+                obj_path = os.path.join(temp_directory, "{}_{}.obj".format(case, size))
+                write_obj(obj_path, vertices, faces)
+                print("{} target {:,}: {:,} vertices, {:,} faces".format(case, size, len(vertices), len(faces)), flush=True)
+
+                for label, module in implementations.items():
+                    methods = run_case(module, case, vertices, faces, obj_path, args)
+                    results["implementations"][label].setdefault(case, []).append({
+                        "target_faces": size,
+                        "num_faces": len(faces),
+                        "num_vertices": len(vertices),
+                        "methods": methods
+                    })
+                os.remove(obj_path)
+
+    results["max_rss_mb"] = max_rss_mb()
+
+    print_results(results)
+    if results["max_rss_mb"] is not None:
+        print("\nmax RSS: {:.1f} MB".format(results["max_rss_mb"]))
+
+    labels = list(implementations)
+    for other_label in labels[1:]:
+        compare_results(results, results, labels[0], other_label)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import queue
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 블렌더를 한 번만 띄워 두고 여러 모델을 차례로 개선하기 위한 작업 프로세스
+# 드라이버 -> 블렌더 : stdin 으로 작업 한 줄(json)
+# 블렌더 -> 드라이버 : stdout 중 WORKER_RESULT_PREFIX 로 시작하는 줄이 결과, 나머지는 해당 작업의 로그
+
+WORKER_ARG = "--worker"
+WORKER_RESULT_PREFIX = "@@refine-worker "
+
+# 블렌더 메모리가 계속 늘어나는 것을 막기 위해 이 수만큼 처리하면 새로 띄움
+MAX_JOBS_PER_WORKER = 50
+
+# 블렌더가 뜨고 첫 준비 신호를 보낼 때까지 기다리는 시간 (초)
+WORKER_START_TIMEOUT = 120
+
+# 블렌더 하나가 쓰는 메모리 추정치 (Cycles 베이크 포함), 동시에 띄울 블렌더 수를 정할 때 사용
+BLENDER_WORKER_MEMORY = 2 << 30
+
+RUN_BLENDER_BAT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "run_blender.bat")
+
+# 블렌더 쪽(run_blender.py)에서 결과를 드라이버로 보냄
+def report_result(result):
+    print(WORKER_RESULT_PREFIX + json.dumps(result), flush=True)
+
+# 전체 물리 메모리 (바이트), 알 수 없으면 None
+def total_memory():
+    if os.name == 'nt':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullTotalPhys
+        return None
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+# 동시에 띄울 블렌더 수: CPU 수와 (메모리의 80% / 블렌더 하나 추정치) 중 작은 값
+# 모디파이어와 bmesh 스크립트는 대부분 단일 스레드라 CPU 하나에 블렌더 하나
+def default_num_workers(memory_per_worker=BLENDER_WORKER_MEMORY):
+    num_workers = os.cpu_count() or 1
+    memory = total_memory()
+    if memory is not None:
+        num_workers = min(num_workers, int(memory * 0.8) // memory_per_worker)
+    return max(num_workers, 1)
+
+class BlenderWorker:
+    def __init__(self, max_jobs=MAX_JOBS_PER_WORKER, job_timeout=None, command=None):
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self.command = command or [RUN_BLENDER_BAT, WORKER_ARG]
+        self.process = None
+        self.lines = None
+        self.num_jobs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, encoding='utf-8', errors='replace', bufsize=1)
+        self.lines = queue.Queue()
+        self.num_jobs = 0
+
+        # stdout 을 계속 비워야 블렌더가 출력 중에 멈추지 않음
+        reader = threading.Thread(target=self._read_output, args=(self.process.stdout, self.lines), daemon=True)
+        reader.start()
+
+        ready, log = self._wait_result(WORKER_START_TIMEOUT)
+        if ready is None:
+            self.kill()
+            raise RuntimeError("blender worker did not start\n" + "".join(log))
+
+    @staticmethod
+    def _read_output(stdout, lines):
+        for line in stdout:
+            lines.put(line)
+        lines.put(None)  # 블렌더 종료
+
+    # 결과 줄이 올 때까지 로그를 모음, 시간 초과나 블렌더 종료면 결과는 None
+    def _wait_result(self, timeout):
+        log = []
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            try:
+                line = self.lines.get(timeout=None if deadline is None else max(deadline - time.time(), 0))
+            except queue.Empty:
+                log.append("timed out after {} s\n".format(timeout))
+                return None, log
+            if line is None:
+                return None, log
+            if line.startswith(WORKER_RESULT_PREFIX):
+                return json.loads(line[len(WORKER_RESULT_PREFIX):]), log
+            log.append(line)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    # 모델 하나를 개선하고 결과를 반환
+    # {"model", "ok", "obj_path", "resumed_from", "error", "exit_code", "seconds", "log"}, 실패해도 예외를 내지 않음
+    # pipeline 은 pipelines 폴더의 명세 이름이나 json 경로 (None 이면 default)
+    # checkpoint_dir 가 있으면 명세에서 고른 단계마다 체크포인트를 남기고, 있으면 이어서 처리
+    def refine(self, model_path, model_name, output_directory, pipeline=None, checkpoint_dir=None):
+        if not self.is_alive() or self.num_jobs >= self.max_jobs:
+            self.close()
+            self.start()
+
+        start = time.time()
+        job = {"model_path": model_path, "model_name": model_name, "output_directory": output_directory,
+               "pipeline": pipeline, "checkpoint_dir": checkpoint_dir}
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            pass  # 블렌더가 이미 종료됨, 아래에서 결과 없음으로 처리
+        self.num_jobs += 1
+
+        result, log = self._wait_result(self.job_timeout)
+        if result is None:
+            # 블렌더가 죽었거나 시간 초과, 다음 작업에서 새로 띄움
+            self.kill()
+            result = {"model": model_name, "ok": False, "obj_path": None, "exit_code": self.process.returncode,
+                      "error": "blender worker exited (code {})".format(self.process.returncode)}
+        result.setdefault("exit_code", 0)
+        result.setdefault("resumed_from", None)
+        result["seconds"] = time.time() - start
+        result["log"] = "".join(log)
+        return result
+
+    def close(self):
+        if self.process is None:
+            return
+        if self.is_alive():
+            # stdin 을 닫으면 블렌더가 작업 대기를 끝내고 스스로 종료
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=30)
+            except (OSError, subprocess.TimeoutExpired):
+                self.kill()
+        self.process = None
+
+    def kill(self):
+        if self.is_alive():
+            if os.name == 'nt':
+                # run_blender.bat 의 cmd 만 죽이면 blender.exe 가 남으므로 자식 프로세스까지 종료
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(self.process.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.process.kill()
+        if self.process is not None:
+            self.process.wait()
+
+# 블렌더 작업 프로세스 num_workers 개를 띄워 두고 모델을 나눠 처리
+# 각 작업은 스레드에서 실행되며 실행 중에는 블렌더 하나를 혼자 사용
+class BlenderPool:
+    def __init__(self, num_workers=None, **worker_options):
+        self.num_workers = num_workers or default_num_workers()
+        self.workers = [BlenderWorker(**worker_options) for _ in range(self.num_workers)]
+        self.idle = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self, function, item):
+        worker = self.idle.get()
+        try:
+            return function(worker, item)
+        finally:
+            self.idle.put(worker)
+
+    # function(worker, item) 을 모든 item 에 대해 실행하고 끝나는 순서대로 (item, 반환값, 예외) 를 돌려줌
+    # 한 모델에서 예외가 나도 나머지는 계속 처리
+    def map(self, function, items):
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            futures = {executor.submit(self._run, function, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as error:
+                    yield futures[future], None, error
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
@@ -1,48 +1,220 @@
 import os
+import sys
+import csv
+import json
+import time
+import argparse
 import tkinter as tk
 from tkinter import filedialog
 import shutil
-import subprocess
 from meshstat import *
+from blender_worker import *
+from pipeline_spec import *
+from pipeline_trace import *
+from pipeline_checkpoint import *
+
+# 모델별 성공 여부, 종료 코드, 시간 기록 (output 폴더)
+BATCH_REPORT_NAME = "batch_report.csv"
+
+# 블렌더 로그 (모델 폴더)
+BLENDER_LOG_NAME = "blender.log"
+
+# 작업 중인 모델은 "<모델>.partial" 폴더에 쓰고 끝나면 "<모델>" 로 옮김
+# 중간에 실패한 결과가 완성된 결과처럼 남지 않고, 실패한 폴더는 로그와 함께 남아 원인을 볼 수 있음
+PARTIAL_SUFFIX = ".partial"
+
+def get_output_directory():
+    script_directory = os.path.dirname(os.path.realpath(__file__))
+    output_directory = os.path.join(script_directory, "output")
+    if not os.path.exists(output_directory):
+        os.makedirs(output_directory, exist_ok=True)
+    return output_directory
+
+# 다시 실행하면 같은 입력과 명세로 끝난 모델은 건너뛰고(force 면 모두 다시), 중간에 멈춘 모델은 체크포인트부터 이어서 처리
+def improve_obj_files_in_folder(folder_path=None, num_workers=None, memory_per_worker=BLENDER_WORKER_MEMORY,
+                                job_timeout=None, pipeline=None, checkpoint_dir=CHECKPOINT_DIRECTORY,
+                                keep_checkpoints=False, force=False):
+    # 블렌더를 띄우기 전에 명세부터 검사 (잘못되면 여기서 ValueError)
+    stages = load_pipeline(pipeline)
+    pipeline = pipeline_path(pipeline)
 
-def improve_obj_files_in_folder():
     # 폴더 선택
-    root = tk.Tk()
-    root.withdraw()
-    folder_path = filedialog.askdirectory()
+    if folder_path is None:
+        root = tk.Tk()
+        root.withdraw()
+        folder_path = filedialog.askdirectory()
 
     # 폴더 내 모든 .obj 파일 찾기
-    obj_files = [f for f in os.listdir(folder_path) if f.endswith('.obj')]
+    obj_files = sorted(f for f in os.listdir(folder_path) if f.endswith('.obj'))
+    if not obj_files:
+        print("no obj files in {}".format(folder_path))
+        return []
 
-    # 각 .obj 파일에 대한 작업 수행
-    for file in obj_files:
-        improve_single_obj_file(folder_path, file)
+    # 블렌더 여러 개를 띄워 두고 각 .obj 파일에 대한 작업을 나눠 수행
+    num_workers = min(num_workers or default_num_workers(memory_per_worker), len(obj_files))
+    print("{} obj files, {} blender workers, pipeline {} ({} stages)".format(
+        len(obj_files), num_workers, pipeline, len(stages)))
 
-def improve_single_obj_file(folder_path, file_name):
+    results = []
+    with BlenderPool(num_workers, job_timeout=job_timeout) as pool:
+        jobs = pool.map(lambda worker, file: improve_single_obj_file(
+            folder_path, file, worker, pipeline, checkpoint_dir, keep_checkpoints, force), obj_files)
+        for file, result, error in jobs:
+            if error is not None:
+                # 통계 계산 등 블렌더 밖에서 난 예외
+                model_name, _ = os.path.splitext(file)
+                result = {"model": model_name, "ok": False, "obj_path": None, "exit_code": None,
+                          "seconds": None, "error": "{}: {}".format(type(error).__name__, error)}
+            results.append(result)
+            if result.get("skipped"):
+                status = "is up to date, skipped"
+            elif not result["ok"]:
+                status = "failed"
+            elif result.get("resumed_from") is not None:
+                status = "is complete! (resumed after stage {})".format(result["resumed_from"])
+            else:
+                status = "is complete!"
+            print("[{} / {}] model : {} {}".format(len(results), len(obj_files), result["model"], status))
+
+    report_path = save_batch_report(results, get_output_directory())
+    report_traces(results, get_output_directory())
+    failures = [result for result in results if not result["ok"]]
+    skipped = [result for result in results if result.get("skipped")]
+    print("complete {}, skipped {}, failed {} (report: {})".format(
+        len(results) - len(failures) - len(skipped), len(skipped), len(failures), report_path))
+    for result in failures:
+        print("failed: {}\n{}".format(result["model"], result["error"]))
+    return results
+
+# worker(BlenderWorker)로 모델 하나를 개선
+# 블렌더가 실패해도 예외를 내지 않고 결과({"model", "ok", "skipped", "obj_path", "resumed_from", "error", "exit_code", "seconds"})를 반환
+# checkpoint_dir 가 있으면 체크포인트에서 이어서 처리하고, 끝나면 keep_checkpoints 가 아닌 한 그 모델의 체크포인트를 지움
+def improve_single_obj_file(folder_path, file_name, worker, pipeline=None, checkpoint_dir=None,
+                            keep_checkpoints=False, force=False):
     # 파일 이름 및 디렉토리 추출
     model_name, _ = os.path.splitext(file_name)
 
     # output 디렉토리 설정
-    script_directory = os.path.dirname(os.path.realpath(__file__))
-    output_directory = os.path.join(script_directory, "output")
-    if not os.path.exists(output_directory):
-        os.makedirs(output_directory, exist_ok=True)
-
-    # 선택된 obj 파일과 동명의 디렉토리 생성
+    output_directory = get_output_directory()
     selected_obj_folder = os.path.join(output_directory, model_name)
+    improve_model = model_name + ".obj"
+
+    # 입력과 명세가 같으면 이미 끝난 모델
+    input_hash = input_digest(folder_path, model_name)
+    digests = stage_digests(input_hash, load_pipeline(pipeline))
+    done_key = digests[-1] if digests else input_hash
+    done = read_done(selected_obj_folder)
+    if not force and done is not None and done["key"] == done_key:
+        return {"model": model_name, "ok": True, "skipped": True, "obj_path": os.path.join(selected_obj_folder, improve_model),
+                "resumed_from": None, "exit_code": None, "seconds": 0.0, "error": None}
+
+    # 선택된 obj 파일과 동명의 작업 디렉토리 생성
+    partial_folder = selected_obj_folder + PARTIAL_SUFFIX
+    if os.path.exists(partial_folder):
+        shutil.rmtree(partial_folder)
+    os.makedirs(partial_folder)
+
+    result = worker.refine(folder_path, model_name, partial_folder, pipeline, checkpoint_dir)
+
+    # 블렌더가 성공이라고 해도 개선된 obj 가 없으면 실패
+    if result["ok"] and not os.path.exists(os.path.join(partial_folder, improve_model)):
+        result["ok"] = False
+        result["error"] = "refined model not found: {}".format(os.path.join(partial_folder, improve_model))
+
+    with open(os.path.join(partial_folder, BLENDER_LOG_NAME), 'w', encoding='utf-8') as file:
+        file.write(result.pop("log"))
+        if result["error"]:
+            file.write(result["error"])
+    if not result["ok"]:
+        return result
+
+    # 모델 통계 저장
+    save_status(os.path.join(partial_folder, improve_model), partial_folder, save_txt=True, save_data=True)
+    write_done(partial_folder, done_key, pipeline_path(pipeline))
+
+    # 모두 끝났으면 이전 결과를 새 결과로 교체
     if os.path.exists(selected_obj_folder):
         shutil.rmtree(selected_obj_folder)
-    os.makedirs(selected_obj_folder)
+    os.replace(partial_folder, selected_obj_folder)
+    result["obj_path"] = os.path.join(selected_obj_folder, improve_model)
 
-    # .bat 파일 실행
-    bat_file_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "run_blender.bat")
-    subprocess.run([bat_file_path, folder_path, model_name, selected_obj_folder], check=True)
+    if checkpoint_dir and not keep_checkpoints:
+        CheckpointStore(checkpoint_dir).remove(digests)
+    return result
 
-    # 모델 통계 저장
-    improve_model = model_name + ".obj"
-    obj_path = os.path.join(selected_obj_folder, improve_model)
-    save_status(obj_path, selected_obj_folder, save_txt=True, save_data=True)
-    print("model : {} is complete!".format(model_name))
+def save_batch_report(results, output_directory):
+    report_path = os.path.join(output_directory, BATCH_REPORT_NAME)
+    with open(report_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=["model", "ok", "skipped", "resumed_from", "exit_code", "seconds",
+                                                        "obj_path", "error"],
+                                extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(sorted(results, key=lambda result: result["model"]))
+    return report_path
+
+# 모델별 pipeline_trace.json 을 모아 output 폴더에 batch_trace.json(합친 trace), stage_summary.csv 저장
+# 오래 걸린 단계와 모델을 출력
+def report_traces(results, output_directory, count=10):
+    traces = []
+    for result in results:
+        if result.get("skipped"):
+            continue  # 이전 실행의 기록
+        folder = os.path.join(output_directory, result["model"])
+        trace = load_trace(folder if result["ok"] else folder + PARTIAL_SUFFIX)
+        if trace is not None:
+            traces.append(trace)
+    if not traces:
+        return
+
+    with open(os.path.join(output_directory, BATCH_TRACE_NAME), 'w', encoding='utf-8') as file:
+        json.dump(merge_traces(traces), file)
+
+    rows = stage_summary(traces)
+    with open(os.path.join(output_directory, STAGE_SUMMARY_NAME), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    total = sum(row["total_s"] for row in rows)
+    print("{:<32}{:>6}{:>12}{:>8}{:>10}{:>10}{:>10}  {}".format(
+        "stage", "runs", "total s", "share", "mean s", "p95 s", "max s", "slowest model"))
+    for row in rows:
+        print("{:<32}{:>6}{:>12.1f}{:>7.1f}%{:>10.2f}{:>10.2f}{:>10.2f}  {}".format(
+            row["stage"], row["runs"], row["total_s"], row["total_s"] / total * 100 if total else 0.0,
+            row["mean_s"], row["p95_s"], row["max_s"], row["slowest_model"]))
+
+    print("slowest models")
+    for model, seconds in model_totals(traces)[:count]:
+        print("     {} : {:.1f} s".format(model, seconds))
+    print("slowest stages")
+    for row in slowest_stages(traces, count):
+        print("     {} / {} [{}] : {:.1f} s (faces {} -> {})".format(
+            row["model"], row["stage"], row["index"], row["seconds"], row["faces_before"], row["faces_after"]))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="폴더의 모든 obj 모델을 블렌더 여러 개로 나눠 개선")
+    parser.add_argument("folder", nargs="?", help="obj 파일이 있는 폴더 (생략하면 폴더 선택 창을 띄움)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="동시에 띄울 블렌더 수 (기본: CPU 수와 메모리로 결정)")
+    parser.add_argument("--memory-per-worker", type=float, default=BLENDER_WORKER_MEMORY / (1 << 30), metavar="GB",
+                        help="블렌더 하나가 쓰는 메모리 추정치 (GB, 기본 블렌더 수 계산에 사용)")
+    parser.add_argument("--timeout", type=float, default=None, metavar="SECONDS",
+                        help="모델 하나의 최대 처리 시간, 넘으면 해당 블렌더를 종료하고 실패로 기록")
+    parser.add_argument("--pipeline", default=DEFAULT_PIPELINE,
+                        help="개선 단계 명세 (pipelines 폴더의 이름이나 json 경로, 기본: default, 미리보기: preview)")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIRECTORY,
+                        help="체크포인트 폴더 (기본: output/.checkpoints), 명세에서 \"checkpoint\": true 인 단계 뒤에 저장")
+    parser.add_argument("--no-checkpoints", action="store_true", help="체크포인트를 저장하거나 이어서 처리하지 않음")
+    parser.add_argument("--keep-checkpoints", action="store_true",
+                        help="모델이 끝나도 체크포인트를 지우지 않음 (앞부분이 같은 다른 명세로 다시 돌릴 때 재사용)")
+    parser.add_argument("--force", action="store_true", help="이미 끝난 모델도 모두 다시 처리")
+    return parser.parse_args()
 
-# 함수 호출
-improve_obj_files_in_folder()
\ No newline at end of file
+if __name__ == "__main__":
+    args = parse_args()
+    results = improve_obj_files_in_folder(args.folder, args.workers, int(args.memory_per_worker * (1 << 30)),
+                                          args.timeout, args.pipeline,
+                                          None if args.no_checkpoints else args.checkpoint_dir,
+                                          args.keep_checkpoints, args.force)
+    if any(not result["ok"] for result in results):
+        sys.exit(1)
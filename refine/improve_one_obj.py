@@ -38,8 +38,11 @@ subprocess.run([bat_file_path, model_path, model_name, selected_obj_folder], che
 improve_model = model_name + ".obj"
 obj_path = os.path.join(selected_obj_folder, improve_model)
 
-original_data = save_status(file_path, selected_obj_folder, save_txt = False , save_data = True)
-refine_data = save_status(obj_path, selected_obj_folder, save_txt = True , save_data = True)
+# 원본 모델은 매번 같은 파일이므로 output 디렉토리의 캐시를 사용
+mesh_cache = MeshCache(os.path.join(output_directory, MESH_CACHE_DIR_NAME))
+# 원본은 비교에 필요한 지표만, 개선된 모델은 모든 지표를 계산
+original_data = save_status(file_path, selected_obj_folder, save_txt = False , save_data = True, cache = mesh_cache, metrics = "comparison")
+refine_data = save_status(obj_path, selected_obj_folder, save_txt = True , save_data = True, metrics = "full")
 
 save_comparison_data(original_data, refine_data, selected_obj_folder, model_name)
 
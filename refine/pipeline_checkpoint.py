@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+
+# 개선 단계 중간 결과(.blend 와 출력 폴더 파일)를 저장해 두고 다시 실행할 때 이어서 처리
+# 항목은 모델 이름, 입력 파일(obj, mtl, png) 내용의 해시와 그 단계까지의 명세(단계 이름, 매개변수)로 구분
+# 같은 입력에 앞부분이 같은 명세라면 다른 명세에서 만든 체크포인트도 이어 쓸 수 있음
+
+CHECKPOINT_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "output", ".checkpoints")
+CHECKPOINT_BLEND = "mesh.blend"
+CHECKPOINT_FILES = "files"
+CHECKPOINT_META = "meta.json"
+
+# 모델을 끝까지 처리했다는 표시 (모델 출력 폴더), 같은 입력과 명세면 다시 처리하지 않음
+DONE_NAME = "refine_done.json"
+
+INPUT_EXTENSIONS = (".obj", ".mtl", ".png")
+
+# 모델 이름과 입력 파일 내용의 해시
+# 체크포인트의 객체와 베이크한 텍스처가 모델 이름을 쓰므로 내용이 같아도 이름이 다르면 다른 항목
+def input_digest(model_path, model_name, chunk_size=1 << 20):
+    digest = hashlib.blake2b(model_name.encode(), digest_size=16)
+    for extension in INPUT_EXTENSIONS:
+        path = os.path.join(model_path, model_name + extension)
+        if not os.path.exists(path):
+            continue
+        digest.update(extension.encode())
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+# 단계마다 (입력, 처음부터 그 단계까지의 명세) 해시
+# 마지막 값은 입력과 명세 전체의 해시 (완료 표시에 사용)
+def stage_digests(input_hash, pipeline):
+    digest = hashlib.blake2b(input_hash.encode(), digest_size=16)
+    digests = []
+    for stage in pipeline:
+        digest.update(json.dumps([stage["stage"], stage["params"]], sort_keys=True).encode())
+        digests.append(digest.copy().hexdigest())
+    return digests
+
+class CheckpointStore:
+    def __init__(self, directory=CHECKPOINT_DIRECTORY):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    # 완성된 체크포인트의 meta, 없거나 쓰다 만 것이면 None
+    def meta(self, key):
+        try:
+            with open(os.path.join(self.path(key), CHECKPOINT_META), 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    # 체크포인트를 남기는 단계 중 이어서 시작할 수 있는 마지막 단계의 인덱스, 없으면 None
+    def latest(self, pipeline, digests):
+        for index in reversed(range(len(pipeline))):
+            if pipeline[index].get("checkpoint") and self.meta(digests[index]) is not None:
+                return index
+        return None
+
+    # 임시 디렉토리에 쓰고 meta 를 마지막에 쓴 뒤 이름을 바꿈 (중간에 죽으면 meta 가 없어 무시됨)
+    def begin(self, key):
+        temp_path = "{}.tmp-{}".format(self.path(key), os.getpid())
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        return temp_path
+
+    def commit(self, key, temp_path, meta):
+        meta = dict(meta, created=time.time())
+        with open(os.path.join(temp_path, CHECKPOINT_META), 'w') as file:
+            json.dump(meta, file)
+
+        entry_path = self.path(key)
+        shutil.rmtree(entry_path, ignore_errors=True)
+        try:
+            os.rename(temp_path, entry_path)
+        except OSError:
+            shutil.rmtree(temp_path, ignore_errors=True)
+
+    # 모델을 끝까지 처리한 뒤 그 모델의 체크포인트를 지움
+    def remove(self, keys):
+        for key in keys:
+            shutil.rmtree(self.path(key), ignore_errors=True)
+
+def read_done(folder):
+    try:
+        with open(os.path.join(folder, DONE_NAME), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def write_done(folder, key, pipeline_name=None):
+    with open(os.path.join(folder, DONE_NAME), 'w') as file:
+        json.dump({"key": key, "pipeline": pipeline_name, "finished": time.time()}, file)
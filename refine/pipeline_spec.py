@@ -0,0 +1,122 @@
+import os
+import json
+
+# 블렌더 개선 단계를 json 파일로 정함 (run_blender.py 가 읽어서 순서대로 실행)
+# {
+#   "name": "default",
+#   "stages": [
+#     {"stage": "merge_edge", "params": {"gamma": 0.1}},
+#     {"stage": "remake_texture_uv", "enabled": false},
+#     {"stage": "saliency_based_smoothing", "checkpoint": true},
+#     ...
+#   ]
+# }
+# params 에 없는 매개변수는 아래 기본값을 사용, enabled 가 false 인 단계는 건너뜀
+# checkpoint 가 true 인 단계는 끝난 뒤 중간 결과를 저장 (pipeline_checkpoint.py)
+
+PIPELINE_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "pipelines")
+DEFAULT_PIPELINE = "default"
+
+# 단계 이름(script 폴더의 함수 이름): {매개변수: 기본값}
+# 블렌더 없이도 검사할 수 있도록 여기 따로 적어 둠 (run_blender.py 가 실제 함수와 맞는지 확인)
+STAGE_PARAMETERS = {
+    "merge_edge": {"gamma": 0.2},
+    "remove_connected_components": {"gamma": 0.2, "min_component": 6},
+    "mirror_modifier": {},
+    "remove_internal_vertices": {"angle": 10, "initial_location": (10, 0, 0)},
+    "triangulate_modifier": {},
+    "remake_texture_uv": {},
+    "decimate_modifier": {"ratio": 0.5},
+    "saliency_based_smoothing": {"saliency_threshold": 0.25, "smoothingIteration": 30, "lambda_factor": 0.1},
+    "laplacian_smoothing_modifier": {"iterations": 3, "lambda_factor": 0.1},
+    "make_manifold": {},
+    "remesh_modifier": {"octree_depth": 6, "scale": 0.9},
+    "remove_boundary_loops": {},
+    "remove_edges_not_include_face": {},
+    "dissolve_manifold_vertex": {},
+    "saliency_based_subdivision": {"saliency_threshold": 0.35},
+}
+
+STAGE_KEYS = ("stage", "params", "enabled", "checkpoint")
+
+# 이름만 주면 pipelines/<이름>.json
+def pipeline_path(pipeline):
+    if pipeline is None:
+        pipeline = DEFAULT_PIPELINE
+    if os.path.splitext(pipeline)[1] != ".json":
+        return os.path.join(PIPELINE_DIRECTORY, pipeline + ".json")
+    return os.path.abspath(pipeline)
+
+def _check_value(default, value):
+    if isinstance(default, tuple):
+        return isinstance(value, list) and len(value) == len(default) and \
+               all(_check_value(item, element) for item, element in zip(default, value))
+    if isinstance(value, bool):
+        return False
+    if isinstance(default, int):
+        return isinstance(value, int)
+    return isinstance(value, (int, float))
+
+# 명세의 모든 오류를 모아서 한 번에 ValueError 로 알림 (블렌더에서 모델을 처리하기 전에 확인)
+# 반환: 실행할 단계 리스트 [{"stage", "params", "checkpoint"}], params 는 기본값과 합친 값
+def validate_pipeline(spec, source="pipeline"):
+    errors = []
+    stages = spec.get("stages") if isinstance(spec, dict) else None
+    if not isinstance(stages, list):
+        raise ValueError("{}: expected an object with a \"stages\" list".format(source))
+
+    pipeline = []
+    for index, entry in enumerate(stages):
+        where = "{}: stages[{}]".format(source, index)
+        if not isinstance(entry, dict):
+            errors.append("{}: expected an object".format(where))
+            continue
+
+        for key in entry:
+            if key not in STAGE_KEYS:
+                errors.append("{}: unknown key \"{}\"".format(where, key))
+
+        name = entry.get("stage")
+        if name not in STAGE_PARAMETERS:
+            errors.append("{}: unknown stage {!r} (available: {})".format(where, name, ", ".join(STAGE_PARAMETERS)))
+            continue
+        where += " ({})".format(name)
+
+        enabled = entry.get("enabled", True)
+        if not isinstance(enabled, bool):
+            errors.append("{}: \"enabled\" must be true or false".format(where))
+        checkpoint = entry.get("checkpoint", False)
+        if not isinstance(checkpoint, bool):
+            errors.append("{}: \"checkpoint\" must be true or false".format(where))
+
+        params = entry.get("params", {})
+        if not isinstance(params, dict):
+            errors.append("{}: \"params\" must be an object".format(where))
+            continue
+
+        defaults = STAGE_PARAMETERS[name]
+        for key, value in params.items():
+            if key not in defaults:
+                errors.append("{}: unknown parameter \"{}\" (available: {})".format(
+                    where, key, ", ".join(defaults) or "none"))
+            elif not _check_value(defaults[key], value):
+                errors.append("{}: parameter \"{}\" should look like {!r}, got {!r}".format(
+                    where, key, defaults[key], value))
+
+        if enabled is True:
+            merged = dict(defaults)
+            merged.update({key: tuple(value) if isinstance(value, list) else value for key, value in params.items()})
+            pipeline.append({"stage": name, "params": merged, "checkpoint": checkpoint is True})
+
+    if errors:
+        raise ValueError("invalid refine pipeline\n" + "\n".join(errors))
+    return pipeline
+
+def load_pipeline(pipeline=None):
+    path = pipeline_path(pipeline)
+    with open(path, 'r', encoding='utf-8') as file:
+        try:
+            spec = json.load(file)
+        except ValueError as error:
+            raise ValueError("{}: {}".format(path, error))
+    return validate_pipeline(spec, path)
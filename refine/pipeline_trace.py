@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import numpy as np
+
+# 개선 단계별 시간, 정점/엣지/면 수, 프로세스 메모리(RSS) 기록
+# 크롬 trace event 형식이라 chrome://tracing 이나 https://ui.perfetto.dev 에서 바로 열 수 있음
+
+TRACE_NAME = "pipeline_trace.json"
+
+# 배치 전체 결과 (output 폴더)
+BATCH_TRACE_NAME = "batch_trace.json"
+STAGE_SUMMARY_NAME = "stage_summary.csv"
+
+# 현재 프로세스의 RSS (바이트), 알 수 없으면 None
+def process_rss():
+    if os.name == 'nt':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+# 모델 하나의 단계 기록 (블렌더 안에서 사용)
+# counts 는 (정점 수, 엣지 수, 면 수) 를 돌려주는 함수
+class PipelineTrace:
+    def __init__(self, model_name, pipeline=None, counts=None):
+        self.model_name = model_name
+        self.pipeline = pipeline
+        self.counts = counts
+        self.pid = os.getpid()
+        self.events = []
+
+    # 단계가 끝난 뒤(__exit__)에도 불리므로 지워진 블렌더 객체(ReferenceError)는 무시 (기록 때문에 단계가 실패하지 않게)
+    def _state(self):
+        state = {"rss": process_rss()}
+        if self.counts is not None:
+            try:
+                state["vertices"], state["edges"], state["faces"] = self.counts()
+            except ReferenceError:
+                pass
+        return state
+
+    def _counter(self, ts, state):
+        if "vertices" in state:
+            self.events.append({"name": "mesh", "ph": "C", "ts": ts, "pid": self.pid, "tid": 0,
+                                "args": {key: state[key] for key in ("vertices", "edges", "faces")}})
+        if state["rss"] is not None:
+            self.events.append({"name": "rss MB", "ph": "C", "ts": ts, "pid": self.pid, "tid": 0,
+                                "args": {"rss": state["rss"] / (1 << 20)}})
+
+    # with trace.stage("merge_edge", index=0): ...
+    # 단계에서 예외가 나도 거기까지의 기록은 남김
+    def stage(self, name, **args):
+        return _TraceStage(self, name, args)
+
+    def to_dict(self):
+        return {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"model": self.model_name, "pipeline": self.pipeline}
+        }
+
+    def save(self, output_directory):
+        path = os.path.join(output_directory, TRACE_NAME)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file)
+        return path
+
+class _TraceStage:
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.before = self.trace._state()
+        self.start = time.time()
+        self.trace._counter(self.start * 1e6, self.before)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.time()
+        after = self.trace._state() if exc_type is None else {"rss": process_rss()}
+
+        args = dict(self.args, model=self.trace.model_name)
+        for key, value in self.before.items():
+            args[key + "_before"] = value
+        for key, value in after.items():
+            args[key + "_after"] = value
+        if exc_type is not None:
+            args["error"] = "{}: {}".format(exc_type.__name__, exc)
+
+        self.trace.events.append({"name": self.name, "cat": "stage", "ph": "X", "ts": self.start * 1e6,
+                                  "dur": (end - self.start) * 1e6, "pid": self.trace.pid, "tid": 0, "args": args})
+        self.trace._counter(end * 1e6, after)
+        return False
+
+def load_trace(folder):
+    path = os.path.join(folder, TRACE_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+# 여러 모델의 trace 를 하나로 합침 (같은 블렌더 작업 프로세스는 같은 줄에 표시)
+def merge_traces(traces):
+    events = []
+    for pid in sorted(set(event["pid"] for trace in traces for event in trace["traceEvents"])):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+                       "args": {"name": "blender {}".format(pid)}})
+    for trace in traces:
+        events.extend(trace["traceEvents"])
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def _stage_events(traces):
+    return [event for trace in traces for event in trace["traceEvents"] if event.get("ph") == "X"]
+
+# 단계별 모델 수, 시간 합/평균/p95/최대, 최대 RSS (오래 걸린 단계부터)
+def stage_summary(traces):
+    events = _stage_events(traces)
+    rows = []
+    for name in sorted(set(event["name"] for event in events)):
+        stage = [event for event in events if event["name"] == name]
+        seconds = np.array([event["dur"] for event in stage]) / 1e6
+        rss = [event["args"].get("rss_after") for event in stage]
+        rss = [value for value in rss if value is not None]
+        rows.append({
+            "stage": name,
+            "runs": len(stage),
+            "failed": sum("error" in event["args"] for event in stage),
+            "total_s": float(np.sum(seconds)),
+            "mean_s": float(np.mean(seconds)),
+            "p95_s": float(np.percentile(seconds, 95)),
+            "max_s": float(np.max(seconds)),
+            "slowest_model": stage[int(np.argmax(seconds))]["args"].get("model"),
+            "max_rss_mb": max(rss) / (1 << 20) if rss else float('nan')
+        })
+    rows.sort(key=lambda row: row["total_s"], reverse=True)
+    return rows
+
+# 가장 오래 걸린 (모델, 단계) count 개
+def slowest_stages(traces, count=10):
+    events = sorted(_stage_events(traces), key=lambda event: event["dur"], reverse=True)[:count]
+    return [{
+        "model": event["args"].get("model"),
+        "stage": event["name"],
+        "index": event["args"].get("index"),
+        "seconds": event["dur"] / 1e6,
+        "faces_before": event["args"].get("faces_before"),
+        "faces_after": event["args"].get("faces_after")
+    } for event in events]
+
+# 모델별 전체 시간 (오래 걸린 모델부터)
+def model_totals(traces):
+    totals = {}
+    for event in _stage_events(traces):
+        model = event["args"].get("model")
+        totals[model] = totals.get(model, 0.0) + event["dur"] / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
@@ -1 +1 @@
-"C:\Program Files\Blender Foundation\Blender 3.6\blender.exe" -b -P "%~dp0\run_blender.py" -- "%~1" "%~2" "%~3"
\ No newline at end of file
+"C:\Program Files\Blender Foundation\Blender 3.6\blender.exe" -b --python-exit-code 1 -P "%~dp0\run_blender.py" -- %*
\ No newline at end of file
@@ -1,5 +1,9 @@
 import os
 import sys
+import json
+import inspect
+import shutil
+import traceback
 import bpy
 import bmesh
 import math
@@ -20,100 +24,211 @@ from model_setting import *
 from script.subdivide_polygon import *
 from script.make_manifold import *
 from script.saliency_high_smoothing import *
+from blender_worker import *
+from pipeline_spec import *
+from pipeline_trace import *
+from pipeline_checkpoint import *
 
 
-
-
-# 전달받은 인자로 디렉토리 및 파일 이름 설정
-# main스크립트의 맨 마지막 subprocess.run 구문에서 맨 오른쪽 변수(경로)가 sys.argv[-1]
-modelPath = sys.argv[-3] + "\\"
-model_name = sys.argv[-2]
-output_directory = sys.argv[-1]
-
-# 입력 파일 경로 설정
-obj_file = modelPath + model_name + ".obj"
-mtl_file = modelPath + model_name + ".mtl"
-texture_file = modelPath + model_name + ".png"
+# 작업 사이에 지우는 데이터 (작업 프로세스 시작 시 있던 것은 남김)
+RESET_DATA = ("objects", "meshes", "materials", "images", "textures", "node_groups")
 
 # 기본으로 있는 큐브 오브젝트 삭제
-cube = bpy.data.objects.get("Cube")
-if cube:
+def remove_default_cube():
+    cube = bpy.data.objects.get("Cube")
+    if cube:
+        bpy.ops.object.select_all(action='DESELECT')
+        cube.select_set(True)
+        bpy.ops.object.delete()
+
+# 지금 장면에 있는 데이터 이름 목록
+def scene_snapshot():
+    snapshot = {name: set(block.name for block in getattr(bpy.data, name)) for name in RESET_DATA}
+    snapshot["render_engine"] = bpy.context.scene.render.engine
+    return snapshot
+
+# 블렌더를 다시 띄우지 않고 snapshot 이후에 생긴 객체, 메시, 재질, 이미지를 지움
+# 남겨 두면 다음 모델이 같은 이름일 때 "이름.001" 로 불러와져 remake_texture_uv 가 엉뚱한 객체를 찾음
+def reset_scene(snapshot):
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    for name in RESET_DATA:
+        collection = getattr(bpy.data, name)
+        for block in [block for block in collection if block.name not in snapshot[name]]:
+            collection.remove(block)
+
+    bpy.context.scene.render.engine = snapshot["render_engine"]
+
+# 명세의 단계 이름 -> script 폴더의 함수
+STAGE_FUNCTIONS = {name: globals()[name] for name in STAGE_PARAMETERS}
+
+# 모델 대신 모델 이름과 출력 폴더를 받는 단계
+CONTEXT_STAGES = ("remake_texture_uv",)
+
+# pipeline_spec.py 의 기본값이 실제 함수의 매개변수와 맞는지 확인
+def check_stage_functions():
+    for name, defaults in STAGE_PARAMETERS.items():
+        parameters = inspect.signature(STAGE_FUNCTIONS[name]).parameters
+        missing = [key for key in defaults if key not in parameters]
+        if missing:
+            raise ValueError("stage {} has no parameter {}".format(name, ", ".join(missing)))
+
+def run_stage(stage, obj, model_name, output_directory):
+    if stage["stage"] in CONTEXT_STAGES:
+        STAGE_FUNCTIONS[stage["stage"]](model_name, output_directory, **stage["params"])
+    else:
+        STAGE_FUNCTIONS[stage["stage"]](obj, **stage["params"])
+
+# 개선 중인 객체를 이름으로 다시 찾음, 없으면 활성 객체
+# 단계가 객체를 지우거나 새 객체로 바꾸면(remesh, make_manifold 등) 이전 참조는 ReferenceError 를 냄
+def current_object(name):
+    obj = bpy.data.objects.get(name)
+    if obj is None:
+        obj = bpy.context.view_layer.objects.active
+    return obj
+
+# 지금 메시의 (정점 수, 엣지 수, 면 수), 편집 모드면 편집 내용을 먼저 메시에 반영
+# 메시 객체가 없으면 (None, None, None)
+def mesh_counts(obj):
+    if obj is None or obj.type != 'MESH':
+        return None, None, None
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+    mesh = obj.data
+    return len(mesh.vertices), len(mesh.edges), len(mesh.polygons)
+
+# 지금 장면(.blend)과 출력 폴더 파일(베이크한 텍스처 등)을 체크포인트로 저장
+def save_checkpoint(store, key, obj, output_directory, index, stage):
+    temp_path = store.begin(key)
+    bpy.ops.wm.save_as_mainfile(filepath=os.path.join(temp_path, CHECKPOINT_BLEND), copy=True, compress=True)
+    shutil.copytree(output_directory, os.path.join(temp_path, CHECKPOINT_FILES))
+    store.commit(key, temp_path, {"object": obj.name, "index": index, "stage": stage["stage"]})
+
+# 체크포인트의 출력 폴더 파일을 되돌리고 .blend 에서 개선 중인 객체를 가져와(append) 반환
+# open_mainfile 로 파일을 통째로 열면 bpy.data 전체가 바뀌어 작업 프로세스의 scene_snapshot 과
+# 다른 참조가 모두 무효가 되므로, 객체만 (메시, 재질, 이미지와 함께) 지금 장면에 가져옴
+def load_checkpoint(store, key, output_directory):
+    entry_path = store.path(key)
+    meta = store.meta(key)
+    shutil.copytree(os.path.join(entry_path, CHECKPOINT_FILES), output_directory, dirs_exist_ok=True)
+    with bpy.data.libraries.load(os.path.join(entry_path, CHECKPOINT_BLEND), link=False) as (data_from, data_to):
+        data_to.objects = [meta["object"]]
+
+    # 같은 이름이 이미 있으면 "이름.001" 로 들어오므로 가져온 객체를 그대로 사용
+    obj = data_to.objects[0]
+    if obj is None:
+        raise RuntimeError("checkpoint {} has no object {}".format(key, meta["object"]))
+    bpy.context.scene.collection.objects.link(obj)
     bpy.ops.object.select_all(action='DESELECT')
-    cube.select_set(True)
-    bpy.ops.object.delete()
-
-# 메시 불러오기 및 초기설정 
-imported_objs = mesh_initial_setting(obj_file, texture_file)
-
-# obj 선택 
-obj = bpy.context.active_object
-
-
-############################ 개선 스크립트 ##############################
-
-# 임계점 이하 엣지 병합 ( target < 평균 * gamma ) 
-merge_edge(obj, gamma = 0.1)
-
-# 연결요소 제거
-remove_connected_components(obj, 0.1)
-
-# 미러 모디파이어 적용
-mirror_modifier(obj)
-
-# 내부 요소 제거
-remove_internal_vertices(obj)
-
-# 연결요소 제거 ( 한번 더? 안할수도 )
-remove_connected_components(obj, 0.9)
-
-# 삼각 분할 모디파이어 적용
-triangulate_modifier(obj)
-
-# ---------------- 메쉬 최적화 완료 --------------------
-
-
-# -------------- 연결성 및 무결성 완료 ------------------
-
-# 텍스쳐 UV 매핑 및 Bake
-remake_texture_uv(model_name, output_directory)
-
-# -------------- 텍스처 및 UV 매핑 완료 -----------------
-
-# 데시메이트
-decimate_modifier(obj, ratio = 0.99)
-
-# saliency가 높은부분 제외하고 스무딩 ( 메쉬의 디테일을 살리는 부분 )
-saliency_based_smoothing(obj, saliency_threshold = 0.25, smoothingIteration = 30,lambda_factor = 0.1)
-
-# 라플라시안 스무딩 모디파이어 적용
-laplacian_smoothing_modifier(obj, 10, 0.1)
-
-# 매니폴드 만들기
-make_manifold(obj)
-make_manifold(obj)
-
-# 삼각 분할 모디파이어 적용
-triangulate_modifier(obj)
-
-# -------------- 메쉬 부드럽게 만들기 완료 ---------------
-
-###########################################################################
-
-
-# Make sure the object's name does not contain invalid characters for a filename
-safe_obj_name = "".join([c for c in obj.name if c.isalpha() or c.isdigit() or c==' ']).rstrip()
-
-# Set the OBJ and MTL file paths
-obj_file_path = os.path.join(output_directory, f"{safe_obj_name}.obj")
-mtl_file_path = os.path.join(output_directory, f"{safe_obj_name}.mtl")
-
-# 개선된 메시 정보 저장 
-bpy.ops.export_scene.obj(
-    filepath= obj_file_path,
-    use_selection=True,
-    use_materials=True,
-    path_mode='COPY'
-)
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+    return obj
+
+# 모델 하나 개선 후 (저장한 obj 경로, 이어서 시작한 체크포인트 단계 인덱스 또는 None)를 반환
+# pipeline 은 load_pipeline 이 돌려준 단계 리스트 (pipelines/default.json 이 예전 고정 순서와 같음)
+# 단계별 시간, 메시 크기, 메모리는 출력 폴더의 pipeline_trace.json 에 기록 (실패해도 거기까지 기록)
+# checkpoint_dir 가 있으면 "checkpoint": true 인 단계 뒤에 저장하고, 저장된 것이 있으면 마지막 것부터 이어서 처리
+def refine_model(modelPath, model_name, output_directory, pipeline, pipeline_name=None, checkpoint_dir=None):
+    # 입력 파일 경로 설정
+    obj_file = os.path.join(modelPath, model_name + ".obj")
+    texture_file = os.path.join(modelPath, model_name + ".png")
+
+    store = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+    digests = stage_digests(input_digest(modelPath, model_name), pipeline) if store else None
+    resume = store.latest(pipeline, digests) if store else None
+
+    trace = PipelineTrace(model_name, pipeline_name)
+    try:
+        if resume is None:
+            # 메시 불러오기 및 초기설정 
+            with trace.stage("import_obj"):
+                imported_objs = mesh_initial_setting(obj_file, texture_file)
+
+            # obj 선택 
+            obj = bpy.context.active_object
+        else:
+            with trace.stage("load_checkpoint", index=resume):
+                obj = load_checkpoint(store, digests[resume], output_directory)
+        obj_name = obj.name
+        trace.counts = lambda: mesh_counts(current_object(obj_name))
+
+        # 개선 스크립트
+        start = 0 if resume is None else resume + 1
+        for index, stage in enumerate(pipeline[start:], start):
+            with trace.stage(stage["stage"], index=index, params=stage["params"]):
+                run_stage(stage, obj, model_name, output_directory)
+            obj = current_object(obj_name)
+            if obj is None:
+                raise RuntimeError("stage {} left no object to refine".format(stage["stage"]))
+            obj_name = obj.name
+
+            if store and stage["checkpoint"]:
+                with trace.stage("save_checkpoint", index=index):
+                    save_checkpoint(store, digests[index], obj, output_directory, index, stage)
+
+        # Make sure the object's name does not contain invalid characters for a filename
+        safe_obj_name = "".join([c for c in obj.name if c.isalpha() or c.isdigit() or c==' ']).rstrip()
+
+        # Set the OBJ and MTL file paths
+        obj_file_path = os.path.join(output_directory, f"{safe_obj_name}.obj")
+
+        # 개선된 메시 정보 저장 
+        with trace.stage("export_obj"):
+            bpy.ops.export_scene.obj(
+                filepath= obj_file_path,
+                use_selection=True,
+                use_materials=True,
+                path_mode='COPY'
+            )
+    finally:
+        trace.save(output_directory)
+    return obj_file_path, resume
+
+# 작업 프로세스 모드: stdin 으로 받은 작업을 하나씩 처리하고 결과를 보고 (stdin 이 닫히면 종료)
+# 모델 하나가 실패해도 장면을 정리하고 다음 작업을 계속 받음
+def run_worker():
+    snapshot = scene_snapshot()
+    report_result({"ready": True})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        result = {"model": job["model_name"], "ok": True, "obj_path": None, "resumed_from": None, "error": None}
+        try:
+            pipeline = load_pipeline(job.get("pipeline"))
+            result["obj_path"], result["resumed_from"] = refine_model(
+                job["model_path"], job["model_name"], job["output_directory"], pipeline,
+                pipeline_path(job.get("pipeline")), job.get("checkpoint_dir"))
+        except Exception:
+            result["ok"] = False
+            result["error"] = traceback.format_exc()
+
+        try:
+            reset_scene(snapshot)
+        except Exception:
+            # 장면을 정리하지 못하면 다음 모델 결과를 믿을 수 없으므로 종료 (드라이버가 새로 띄움)
+            report_result(result)
+            raise
+        report_result(result)
+
+
+# blender -b -P run_blender.py -- <모델 폴더> <모델 이름> <출력 폴더> [명세 [체크포인트 폴더]]  : 모델 하나
+# blender -b -P run_blender.py -- --worker                                                  : 작업 프로세스
+# 명세는 pipelines 폴더의 이름이나 json 경로 (생략하면 default), 체크포인트 폴더를 생략하면 체크포인트 없이 실행
+args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[-3:]
+
+check_stage_functions()
+remove_default_cube()
+
+if args == [WORKER_ARG]:
+    run_worker()
+else:
+    # 명세를 먼저 검사하고 모델을 불러옴
+    pipeline_name = args[3] if len(args) > 3 else None
+    pipeline = load_pipeline(pipeline_name)
+    refine_model(args[0], args[1], args[2], pipeline, pipeline_path(pipeline_name), args[4] if len(args) > 4 else None)
 
 # 블렌더 종료
 bpy.ops.wm.quit_blender()
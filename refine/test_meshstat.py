@@ -0,0 +1,97 @@
+import numpy as np
+from meshstat import *
+
+# 오목한 사각형 (0.5, 0.5) 이 안쪽으로 들어간 정점, 실제 넓이는 1
+CONCAVE_QUAD = np.array([(0, 2, 0), (0, 0, 0), (2, 0, 0), (0.5, 0.5, 0)], dtype=np.float64)
+
+def test_concave_quad_area():
+    for shift in range(4):
+        face = np.roll(np.arange(4, dtype=np.int32), shift)
+        mesh = Mesh(CONCAVE_QUAD, face.reshape(1, -1))
+        assert np.allclose(mesh.get_face_areas(), [1.0])
+        # 법선(부채꼴 외적의 합)의 크기는 넓이의 두 배
+        assert np.allclose(mesh.get_face_normals(), [(0, 0, 2)])
+
+def test_mixed_faces_area():
+    vertices = np.vstack([CONCAVE_QUAD, [(3, 0, 0), (4, 0, 0), (3, 1, 0)]])
+    faces = np.array([[0, 1, 2, 3], [4, 5, 6, FACE_PAD]], dtype=np.int32)
+    assert np.allclose(Mesh(vertices, faces).get_face_areas(), [1.0, 0.5])
+
+# 토큰 형식이 섞인 줄, 음수 인덱스, 다각형, 청크 경계를 지나는 줄
+MIXED_OBJ = """v 0 0 0
+v 1 0 0
+v 0 1 0
+v 1 1 0
+vt 0 0
+vn 0 0 1
+f 1/1/1 2 3/1
+f 1//1 2//1 3//1 4//1
+f -4 -3 -1
+f 2/1 4/1 3/1
+v 2 0 0
+f 2 5 4
+"""
+
+def test_fast_parser_matches_line_parser(tmp_path):
+    path = tmp_path / "mixed.obj"
+    path.write_text(MIXED_OBJ)
+    expected_vertices, expected_faces = parse_obj_lines(str(path))
+    for chunk_size in (16, 64, OBJ_CHUNK_SIZE):
+        vertices, faces = parse_obj(str(path), chunk_size)
+        assert np.array_equal(vertices, expected_vertices)
+        assert np.array_equal(faces, expected_faces)
+
+def test_merged_accumulator_matches_sequential():
+    rng = np.random.default_rng(0)
+    chunks = [rng.normal(size=size) for size in (1, 7, 1000, 333)]
+    values = np.concatenate(chunks)
+
+    merged = StatAccumulator()
+    for chunk in chunks:
+        merged.merge(StatAccumulator(chunk))
+    assert merged.count == len(values)
+    assert np.isclose(merged.mean, np.mean(values))
+    assert np.isclose(merged.variance(), np.var(values, ddof=1))
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    assert np.isclose(merged.total, np.sum(values))
+    assert np.allclose(merged.percentiles([0, 25, 50, 95, 100]), np.percentile(values, [0, 25, 50, 95, 100]))
+
+    # 스케치와 합치면 스케치가 되고 큰 쪽 크기를 유지
+    sketched = StatAccumulator(chunks[0]).merge(StatAccumulator(values, exact=False, sketch_size=4096))
+    assert not sketched.exact and sketched.sketch_size == 4096
+
+def _write_obj(path, vertices, faces):
+    with open(path, 'w') as file:
+        for vertex in vertices:
+            file.write("v {} {} {}\n".format(*vertex))
+        for face in faces:
+            file.write("f {}\n".format(" ".join(str(index + 1) for index in face)))
+
+def test_out_of_core_matches_in_core(tmp_path):
+    # 격자 + 중복 정점/면 + 사각형 + 엣지 하나에 면 세 장 + 고립 정점
+    size = 12
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size))
+    vertices = np.stack([xs.ravel(), ys.ravel(), np.zeros(size * size)], axis=1).tolist()
+    faces = []
+    for row in range(size - 1):
+        for col in range(size - 1):
+            a = row * size + col
+            faces += [[a, a + 1, a + size + 1], [a, a + size + 1, a + size]]
+    vertices += [vertices[0], vertices[5], [0.5, 0.5, 3.0], [9.0, 9.0, 9.0]]
+    num_grid = size * size
+    faces += [faces[3][::-1], [0, 1, num_grid + 2], [num_grid, 1, size + 1, size]]
+
+    path = tmp_path / "mesh.obj"
+    _write_obj(path, vertices, faces)
+
+    in_core = save_status(str(path), str(tmp_path), False)
+    out_of_core = save_status_out_of_core(str(path), str(tmp_path), False, memory_budget=1 << 12)
+    for key in ("num_vertex", "num_edge", "num_face", "euler characteristic", "num isolated vertices",
+                "num duplicated vertices", "num duplicated faces", "num boundary edges", "num degenerated faces",
+                "edge manifold", "vertex manifold", "closed", "total_Area Size", "max_Edge Length"):
+        assert np.isclose(in_core[key], out_of_core[key]), key
+
+    # 두 방식의 키는 out of core 에서 계산하지 않는 지표만 다름 (분위수 지표는 "ave_" 등이 붙은 키)
+    for key in set(in_core) - set(out_of_core):
+        assert any(key == name or key.endswith("_" + name) for name in OUT_OF_CORE_OMITTED), key
+    assert set(out_of_core) <= set(in_core)
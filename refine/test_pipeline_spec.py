@@ -0,0 +1,46 @@
+import pytest
+from pipeline_spec import *
+from pipeline_checkpoint import *
+
+def test_validate_pipeline_merges_defaults():
+    pipeline = validate_pipeline({"stages": [
+        {"stage": "merge_edge", "params": {"gamma": 0.1}, "checkpoint": True},
+        {"stage": "decimate_modifier", "enabled": False},
+        {"stage": "remove_internal_vertices", "params": {"initial_location": [1, 2, 3]}},
+    ]})
+    assert [stage["stage"] for stage in pipeline] == ["merge_edge", "remove_internal_vertices"]
+    assert pipeline[0] == {"stage": "merge_edge", "params": {"gamma": 0.1}, "checkpoint": True}
+    assert pipeline[1]["params"] == {"angle": 10, "initial_location": (1, 2, 3)}
+
+@pytest.mark.parametrize("spec", [
+    [],
+    {"stages": {}},
+    {"stages": ["merge_edge"]},
+    {"stages": [{"stage": "no_such_stage"}]},
+    {"stages": [{"stage": "merge_edge", "params": {"gama": 0.1}}]},
+    {"stages": [{"stage": "merge_edge", "params": {"gamma": "0.1"}}]},
+    {"stages": [{"stage": "merge_edge", "params": {"gamma": True}}]},
+    {"stages": [{"stage": "remove_connected_components", "params": {"min_component": 6.5}}]},
+    {"stages": [{"stage": "remove_internal_vertices", "params": {"initial_location": [1, 2]}}]},
+    {"stages": [{"stage": "merge_edge", "enabled": "no"}]},
+    {"stages": [{"stage": "merge_edge", "checkpoint": 1}]},
+    {"stages": [{"stage": "merge_edge", "extra": 1}]},
+])
+def test_validate_pipeline_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        validate_pipeline(spec)
+
+def test_bundled_pipelines_are_valid():
+    for name in ("default", "preview"):
+        assert load_pipeline(name)
+
+def test_stage_digests_share_prefix(tmp_path):
+    (tmp_path / "model.obj").write_text("v 0 0 0\n")
+    first = validate_pipeline({"stages": [{"stage": "merge_edge"}, {"stage": "decimate_modifier"}]})
+    second = validate_pipeline({"stages": [{"stage": "merge_edge"}, {"stage": "triangulate_modifier"}]})
+    input_hash = input_digest(str(tmp_path), "model")
+    first_digests, second_digests = stage_digests(input_hash, first), stage_digests(input_hash, second)
+    assert first_digests[0] == second_digests[0] and first_digests[1] != second_digests[1]
+    # 내용이 같아도 모델 이름이 다르면 다른 항목
+    (tmp_path / "other.obj").write_text("v 0 0 0\n")
+    assert input_digest(str(tmp_path), "other") != input_hash